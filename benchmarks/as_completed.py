@@ -0,0 +1,75 @@
+"""
+Compares gather with as_completed over many futures that finish on
+another thread, reporting the time to the first result and peak memory.
+"""
+import time
+import threading
+import tracemalloc
+
+from yakusoku.future import monkeypatch_future, SlimFuture
+from yakusoku import gather, as_completed
+
+monkeypatch_future()
+
+N = 100000
+
+
+def inputs():
+    for i in range(N):
+        fut = SlimFuture()
+        fut.set_result(i)
+        yield fut
+
+
+def finish_later(futs):
+    def _run():
+        for i, f in enumerate(futs):
+            f.set_result(i)
+    threading.Thread(target=_run).start()
+
+
+def bench_gather():
+    futs = [SlimFuture() for _ in range(N)]
+    start = time.perf_counter()
+    result = gather(*futs)
+    finish_later(futs)
+    result.result()
+    return time.perf_counter() - start
+
+
+def bench_as_completed():
+    futs = [SlimFuture() for _ in range(N)]
+    start = time.perf_counter()
+    stream = as_completed(futs)
+    finish_later(futs)
+    next(stream)
+    first = time.perf_counter() - start
+    for _ in stream:
+        pass
+    return first
+
+
+def bench_windowed():
+    start = time.perf_counter()
+    stream = as_completed(inputs(), ordered=True, window=64)
+    next(stream)
+    first = time.perf_counter() - start
+    for _ in stream:
+        pass
+    return first
+
+
+def report(name, bench):
+    # Tracing slows everything down, so time and memory are measured in separate runs.
+    first = bench()
+    tracemalloc.start()
+    bench()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20} first result after {first * 1e3:>8.2f} ms, peak {peak / 2 ** 20:>7.2f} MiB")
+
+
+if __name__ == "__main__":
+    report("gather", bench_gather)
+    report("as_completed", bench_as_completed)
+    report("as_completed window", bench_windowed)
@@ -0,0 +1,118 @@
+"""
+Measures the per-await overhead of a yakusoku task in tight loops over
+different kinds of awaitables, and the cost of the check that decides
+how a future is awaited.
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from yakusoku.future import monkeypatch_future
+from yakusoku.context import in_run_coro
+from yakusoku import resolve, run_coroutine
+
+monkeypatch_future()
+
+N = 200000
+
+
+def report(name, elapsed, n=N):
+    print(f"{name:<28} {elapsed / n * 1e9:>9.1f} ns per await")
+
+
+def bench_check():
+    start = time.perf_counter()
+    for _ in range(N):
+        in_run_coro()
+    elapsed = time.perf_counter() - start
+    print(f"{'in_run_coro()':<28} {elapsed / N * 1e9:>9.1f} ns per call")
+
+
+def run_loop(name, coro_func, n=N):
+    start = time.perf_counter()
+    run_coroutine(coro_func()).result()
+    report(name, time.perf_counter() - start, n)
+
+
+def bench_ready_slim():
+    fut = resolve(None)
+
+    async def loop():
+        for _ in range(N):
+            await fut
+    run_loop("ready SlimFuture", loop)
+
+
+def bench_ready_concurrent():
+    fut = Future()
+    fut.set_result(None)
+
+    async def loop():
+        for _ in range(N):
+            await fut
+    run_loop("ready concurrent Future", loop)
+
+
+def bench_pending_concurrent():
+    n = N // 10
+
+    async def loop():
+        for i in range(n):
+            fut = Future()
+            threading.Thread(target=fut.set_result, args=(i,)).start()
+            await fut
+    run_loop("pending concurrent Future", loop, n)
+
+
+def bench_nested():
+    fut = resolve(None)
+
+    async def child():
+        return await fut
+
+    async def loop():
+        for _ in range(N):
+            await child()
+    run_loop("nested coroutine", loop)
+
+
+def bench_asyncio():
+    n = N // 10
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def body():
+        for i in range(n):
+            fut = loop.create_future()
+            loop.call_soon_threadsafe(fut.set_result, i)
+            await fut
+
+    async def native_body():
+        for i in range(n):
+            fut = loop.create_future()
+            loop.call_soon(fut.set_result, i)
+            await fut
+
+    def native():
+        start = time.perf_counter()
+        run_coroutine(native_body(), loop=loop).result()
+        report("asyncio Future, loop task", time.perf_counter() - start, n)
+
+    try:
+        run_loop("asyncio Future", body, n)
+        native()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+if __name__ == "__main__":
+    bench_check()
+    bench_ready_slim()
+    bench_ready_concurrent()
+    bench_pending_concurrent()
+    bench_nested()
+    bench_asyncio()
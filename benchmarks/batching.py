@@ -0,0 +1,38 @@
+"""
+Looks up many keys from concurrent tasks, once with a call per key and
+once through batched, against a backend with a fixed cost per call.
+"""
+import time
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import batched, futurize, gather, sleep
+
+monkeypatch_future()
+
+N = 2000
+CALL_COST = 0.002
+
+
+def bench():
+    calls = [0]
+
+    @futurize
+    async def get_users(ids):
+        calls[0] += 1
+        await sleep(CALL_COST)
+        return ids
+
+    @futurize
+    async def get_user(id):
+        return (await get_users([id]))[0]
+
+    for name, lookup in (("single", get_user), ("batched", batched(max_batch=500, max_delay=0.002)(get_users))):
+        calls[0] = 0
+        start = time.perf_counter()
+        gather(*(lookup(i) for i in range(N))).result()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>7}: {calls[0]:>5} backend calls, {elapsed * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,65 @@
+"""
+Calls a futurized lookup from many tasks with few distinct keys and
+reports how many backend calls the cache saves.
+
+With a persistent backend, it also reports how long a result takes to
+come back from disk after a restart.
+"""
+import os
+import time
+import tempfile
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import cached, futurize, gather, sleep, SqliteBackend
+
+monkeypatch_future()
+
+N = 2000
+KEYS = 20
+
+
+def bench(decorate):
+    calls = [0]
+
+    @futurize
+    async def lookup(key):
+        calls[0] += 1
+        await sleep(0.01)
+        return key
+
+    if decorate:
+        lookup = cached()(lookup)
+
+    start = time.perf_counter()
+    gather(*(lookup(i % KEYS) for i in range(N))).result()
+    elapsed = time.perf_counter() - start
+    print(f"{'cached' if decorate else 'plain':>6}: {calls[0]:>5} backend calls, {elapsed * 1e3:>8.1f} ms")
+
+
+def bench_backend():
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SqliteBackend(os.path.join(tmp, "cache.db"))
+
+        def make():
+            @cached(backend=backend)
+            @futurize
+            async def compute(key):
+                await sleep(0.05)
+                return bytes(1000)
+            return compute
+
+        gather(*(make()(i) for i in range(KEYS))).result()
+        # Let the background writes finish.
+        time.sleep(0.5)
+
+        start = time.perf_counter()
+        gather(*(make()(i) for i in range(KEYS))).result()
+        elapsed = time.perf_counter() - start
+        print(f"backend: {KEYS:>5} restored results, {elapsed / KEYS * 1e6:>8.1f} us each (computing takes 50 ms)")
+        backend.close()
+
+
+if __name__ == "__main__":
+    bench(False)
+    bench(True)
+    bench_backend()
@@ -0,0 +1,90 @@
+"""
+Moves items from a producer thread to an asyncio consumer through a
+Channel, one by one and in batches, and reports items per second.
+"""
+import time
+import asyncio
+import queue
+import threading
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import Channel, ChannelClosed
+
+monkeypatch_future()
+
+N = 200000
+BATCH = 256
+
+
+def bench_queue_polling():
+    q = queue.Queue(1024)
+
+    def produce():
+        for i in range(N):
+            q.put(i)
+
+    async def consume():
+        received = 0
+        while received < N:
+            try:
+                q.get_nowait()
+                received += 1
+            except queue.Empty:
+                await asyncio.sleep(0)
+
+    return run("queue.Queue polling", produce, consume)
+
+
+def bench_single():
+    ch = Channel(1024)
+
+    def produce():
+        for i in range(N):
+            ch.put_sync(i)
+        ch.close()
+
+    async def consume():
+        async for _ in ch:
+            pass
+
+    return run("Channel put/get", produce, consume)
+
+
+def bench_batched():
+    ch = Channel(1024)
+
+    def produce():
+        for i in range(0, N, BATCH):
+            ch.put_many(range(i, min(i + BATCH, N))).result()
+        ch.close()
+
+    async def consume():
+        while True:
+            try:
+                await ch.get_many(BATCH)
+            except ChannelClosed:
+                return
+
+    return run("Channel put_many/get_many", produce, consume)
+
+
+def run(name, produce, consume):
+    loop = asyncio.new_event_loop()
+
+    async def main():
+        thread = threading.Thread(target=produce)
+        start = time.perf_counter()
+        thread.start()
+        await consume()
+        thread.join()
+        return time.perf_counter() - start
+
+    elapsed = loop.run_until_complete(main())
+    loop.close()
+    print(f"{name:<26} {N / elapsed:>10.0f} items/s")
+
+
+if __name__ == "__main__":
+    bench_queue_polling()
+    bench_single()
+    bench_batched()
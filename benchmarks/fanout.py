@@ -0,0 +1,27 @@
+"""
+Measures the bookkeeping cost of wait() and gather() for fan-outs
+of 10 to 1M futures.
+"""
+import time
+from concurrent.futures import Future
+
+from yakusoku import wait, gather
+
+
+def bench(name, combine, n):
+    futs = [Future() for _ in range(n)]
+
+    start = time.perf_counter()
+    combined = combine(futs)
+    for f in futs:
+        f.set_result(None)
+    combined.result()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<7} N={n:>8}: {elapsed:>8.3f}s, {elapsed / n * 1e6:>6.2f}us per future")
+
+
+if __name__ == "__main__":
+    for n in (10, 100, 1000, 10000, 100000, 1000000):
+        bench("wait", wait, n)
+        bench("gather", lambda futs: gather(*futs), n)
@@ -0,0 +1,36 @@
+"""
+Starts many futurized calls at once and reports call throughput and the
+peak number of live threads.
+"""
+import time
+import threading
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import futurize, gather
+
+monkeypatch_future()
+
+
+@futurize
+async def work(n):
+    return n + 1
+
+
+def bench(n):
+    peak = threading.active_count()
+    start = time.monotonic()
+
+    futs = []
+    for i in range(n):
+        futs.append(work(i))
+        if i % 100 == 0:
+            peak = max(peak, threading.active_count())
+
+    gather(*futs).result()
+    elapsed = time.monotonic() - start
+    print(f"{n:>7} calls: {n / elapsed:>10.0f} calls/s, peak {peak} threads")
+
+
+if __name__ == "__main__":
+    for n in (100, 1000, 10000, 100000):
+        bench(n)
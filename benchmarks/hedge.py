@@ -0,0 +1,42 @@
+"""
+Calls a backend whose latency has a long tail, once directly and once
+hedged at its 95th percentile, and reports the latency percentiles.
+"""
+import time
+import random
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import futurize, hedge, sleep
+
+monkeypatch_future()
+
+N = 500
+random.seed(0)
+
+
+@futurize
+async def backend():
+    # 5% of the calls take ten times as long.
+    await sleep(0.05 if random.random() < 0.05 else 0.005)
+
+
+@futurize
+async def timed(factory):
+    start = time.perf_counter()
+    await factory()
+    return time.perf_counter() - start
+
+
+def bench():
+    for name, factory in (
+            ("direct", backend),
+            ("hedged", lambda: hedge(backend, 0.008))
+    ):
+        # One call at a time, so the latencies are not skewed by a busy pool.
+        latencies = sorted(timed(factory).result() for _ in range(N))
+        p50, p99 = latencies[N // 2], latencies[N * 99 // 100]
+        print(f"{name}: p50 {p50 * 1e3:>6.1f} ms, p99 {p99 * 1e3:>6.1f} ms, max {latencies[-1] * 1e3:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,52 @@
+"""
+Throttles many futurized calls with a RateLimiter and reports the
+achieved rate and the memory per parked waiter.
+"""
+import time
+import tracemalloc
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import RateLimiter, ConcurrencyLimiter, futurize, gather
+
+monkeypatch_future()
+
+N = 2000
+RATE = 1000
+
+
+def bench_rate():
+    limiter = RateLimiter(RATE, burst=50)
+
+    @limiter
+    @futurize
+    async def call(i):
+        return i
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    calls = [call(i) for i in range(N)]
+    parked, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gather(*calls).result()
+    elapsed = time.perf_counter() - start
+    print(f"rate: {N / elapsed:>8.0f} calls/s for a limit of {RATE}/s, {parked / N:>7.0f} bytes per parked call")
+
+
+def bench_concurrency():
+    limiter = ConcurrencyLimiter(8)
+
+    @limiter
+    @futurize
+    async def call(i):
+        return i
+
+    start = time.perf_counter()
+    gather(*(call(i) for i in range(N))).result()
+    elapsed = time.perf_counter() - start
+    print(f"concurrency: {elapsed / N * 1e6:>8.1f} us per limited call")
+
+
+if __name__ == "__main__":
+    bench_rate()
+    bench_concurrency()
@@ -0,0 +1,39 @@
+"""
+Parks many coroutines on a yakusoku Lock and reports the time per
+hand-over and the memory per waiter.
+"""
+import time
+import tracemalloc
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import Lock, run_coroutine
+
+monkeypatch_future()
+
+N = 10000
+
+
+def bench():
+    lock = Lock()
+    lock.acquire()
+
+    async def work():
+        async with lock:
+            pass
+
+    tracemalloc.start()
+    tasks = [run_coroutine(work()) for _ in range(N)]
+    parked, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    lock.release()
+    for task in tasks:
+        task.result()
+    elapsed = time.perf_counter() - start
+
+    print(f"{N} waiters: {parked / N:>7.0f} bytes per waiter, {elapsed / N * 1e9:>8.1f} ns per hand-over")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,46 @@
+"""
+Completes concurrent futures on a thread pool while asyncio tasks on one
+loop await them, and reports completions per second.
+"""
+import time
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from yakusoku.future import monkeypatch_future
+
+monkeypatch_future()
+
+N = 100000
+
+
+async def await_all(futs, wrap):
+    await asyncio.gather(*(wrap(f) for f in futs))
+
+
+def bench(name, wrap):
+    loop = asyncio.new_event_loop()
+    futs = [Future() for _ in range(N)]
+    pool = ThreadPoolExecutor(4)
+
+    async def main():
+        waiter = loop.create_task(await_all(futs, wrap))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        for chunk in range(0, N, 1000):
+            pool.submit(lambda c: [f.set_result(None) for f in futs[c:c + 1000]], chunk)
+        await waiter
+        return time.perf_counter() - start
+
+    elapsed = loop.run_until_complete(main())
+    pool.shutdown()
+    loop.close()
+    print(f"{name:<22} {N / elapsed:>10.0f} completions/s")
+
+
+async def _await(fut):
+    return await fut
+
+
+if __name__ == "__main__":
+    bench("asyncio.wrap_future", asyncio.wrap_future)
+    bench("yakusoku await", _await)
@@ -0,0 +1,35 @@
+"""
+Gathers many futures of one asyncio loop from a coroutine on that loop,
+comparing asyncio.gather with yakusoku's gather.
+"""
+import time
+import asyncio
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import gather
+
+monkeypatch_future()
+
+N = 100000
+
+
+def bench(name, combine):
+    loop = asyncio.new_event_loop()
+
+    async def main():
+        futs = [loop.create_future() for _ in range(N)]
+        start = time.perf_counter()
+        combined = combine(*futs)
+        for i, f in enumerate(futs):
+            f.set_result(i)
+        await combined
+        return time.perf_counter() - start
+
+    elapsed = loop.run_until_complete(main())
+    loop.close()
+    print(f"{name:<18} {elapsed / N * 1e9:>9.1f} ns per future")
+
+
+if __name__ == "__main__":
+    bench("asyncio.gather", asyncio.gather)
+    bench("yakusoku.gather", gather)
@@ -0,0 +1,46 @@
+"""
+Runs a coroutine function over many items with gather and with map_concurrent,
+reporting throughput and peak memory.
+"""
+import gc
+import time
+import tracemalloc
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import gather, map_concurrent, sleep
+
+monkeypatch_future()
+
+N = 100000
+
+
+async def work(x):
+    if x % 100 == 0:
+        await sleep(0)
+    return x * 2
+
+
+def bench_gather():
+    return len(gather(*[work(x) for x in range(N)]).result())
+
+
+def bench_map_concurrent():
+    return sum(1 for _ in map_concurrent(work, range(N), concurrency=64))
+
+
+def report(name, bench):
+    # Tracing slows everything down, so time and memory are measured in separate runs.
+    start = time.perf_counter()
+    bench()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    bench()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<14} {N / elapsed:>10.0f} items/s, peak {peak / 2 ** 20:>7.2f} MiB")
+
+
+if __name__ == "__main__":
+    report("gather", bench_gather)
+    report("map_concurrent", bench_map_concurrent)
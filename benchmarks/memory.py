@@ -0,0 +1,62 @@
+"""
+Uses tracemalloc to measure the memory held per resolved future, per
+in-flight task and per completed task on large fan-outs.
+"""
+import gc
+import tracemalloc
+from concurrent.futures import Future
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import resolve, futurize, gather, run_coroutine
+
+monkeypatch_future()
+
+N = 50000
+
+
+def measure(name, create):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = create()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name:<28} {(after - before) / N:>8.0f} bytes each")
+    return held
+
+
+def in_flight_tasks():
+    gate = Future()
+
+    async def task():
+        return await gate
+
+    tasks = [run_coroutine(task()) for _ in range(N)]
+    return gate, tasks
+
+
+def completed_tasks():
+    async def task(i):
+        return await resolve(i)
+
+    return [run_coroutine(task(i)) for i in range(N)]
+
+
+def gathered_tasks():
+    gate = Future()
+
+    @futurize(spawn=False)
+    async def task():
+        return await gate
+
+    return gate, gather(*(task() for _ in range(N)))
+
+
+if __name__ == "__main__":
+    measure("concurrent.futures.Future", lambda: [Future() for _ in range(N)])
+    measure("resolve()", lambda: [resolve(i) for i in range(N)])
+    gate, _ = measure("in-flight task", in_flight_tasks)
+    gate.set_result(None)
+    measure("completed task", completed_tasks)
+    gate, _ = measure("in-flight task in gather()", gathered_tasks)
+    gate.set_result(None)
@@ -0,0 +1,47 @@
+"""
+Runs a fetch/parse job with uneven item latencies, once as gather
+batches per stage and once as a Pipeline, and reports the wall time.
+"""
+import time
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import Pipeline, gather, sleep
+
+monkeypatch_future()
+
+N = 400
+BATCH = 16
+
+
+async def fetch(x):
+    # Every eighth item is slow, which stalls a whole batch.
+    await sleep(0.04 if x % 8 == 0 else 0.005)
+    return x
+
+
+async def parse(x):
+    await sleep(0.002)
+    return x * 2
+
+
+def bench_batches():
+    results = []
+    for i in range(0, N, BATCH):
+        fetched = gather(*[fetch(x) for x in range(i, i + BATCH)]).result()
+        results.extend(gather(*[parse(x) for x in fetched]).result())
+    return results
+
+
+def bench_pipeline():
+    return list(Pipeline().stage(fetch, concurrency=BATCH).stage(parse, concurrency=BATCH).run(range(N)))
+
+
+def report(name, bench):
+    start = time.perf_counter()
+    bench()
+    print(f"{name:<14} {time.perf_counter() - start:>7.3f} s")
+
+
+if __name__ == "__main__":
+    report("gather batches", bench_batches)
+    report("pipeline", bench_pipeline)
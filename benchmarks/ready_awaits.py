@@ -0,0 +1,51 @@
+"""
+Awaits already completed futures in a tight loop and reports awaits per
+second and the deepest stack seen while doing so.
+"""
+import sys
+import time
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import resolve, run_coroutine
+
+monkeypatch_future()
+
+N = 100000
+
+
+def stack_depth():
+    frame, depth = sys._getframe(1), 0
+    while frame is not None:
+        frame, depth = frame.f_back, depth + 1
+    return depth
+
+
+async def child(value):
+    return await resolve(value)
+
+
+async def ready_futures(deepest):
+    for i in range(N):
+        await resolve(i)
+        if i % 1000 == 0:
+            deepest[0] = max(deepest[0], stack_depth())
+
+
+async def ready_coroutines(deepest):
+    for i in range(N):
+        await child(i)
+        if i % 1000 == 0:
+            deepest[0] = max(deepest[0], stack_depth())
+
+
+def bench(name, func):
+    deepest = [0]
+    start = time.perf_counter()
+    run_coroutine(func(deepest)).result()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} {N / elapsed:>10.0f} awaits/s, max stack depth {deepest[0]}")
+
+
+if __name__ == "__main__":
+    bench("ready futures", ready_futures)
+    bench("ready coroutines", ready_coroutines)
@@ -0,0 +1,73 @@
+"""
+Arms 100k sleep() and wait_for() timeouts and reports the number of live
+threads, the time it takes to arm them and how late they fire.
+"""
+import time
+import random
+import threading
+from concurrent.futures import Future
+
+from yakusoku.future import monkeypatch_future
+from yakusoku import sleep, wait_for
+
+N = 100000
+
+monkeypatch_future()
+
+
+def bench_sleep():
+    fired = []
+    done = threading.Event()
+
+    def _record(when):
+        def _cb(_):
+            fired.append(time.monotonic() - when)
+            if len(fired) == N:
+                done.set()
+        return _cb
+
+    # Arm all timers before the first one is due. Otherwise the timers that
+    # fire compete with the ones still being armed, and the lateness would
+    # measure that contention instead of the timer service.
+    start = time.monotonic()
+    for _ in range(1000):
+        sleep(60).cancel()
+    first_due = time.monotonic() + (time.monotonic() - start) / 1000 * N * 4 + 0.5
+
+    start = time.monotonic()
+    for _ in range(N):
+        due = first_due + random.random()
+        sleep(due - time.monotonic()).add_done_callback(_record(due))
+    armed = time.monotonic() - start
+    assert time.monotonic() < first_due, "arming took longer than expected"
+
+    threads = threading.active_count()
+    done.wait()
+    fired.sort()
+
+    print(f"sleep:    {N} timers armed in {armed:.3f}s, {threads} live threads")
+    print(f"          lateness p50={fired[N // 2] * 1000:.2f}ms "
+          f"p99={fired[int(N * 0.99)] * 1000:.2f}ms max={fired[-1] * 1000:.2f}ms")
+
+
+def bench_wait_for_cancelled():
+    futs = [Future() for _ in range(N)]
+
+    start = time.monotonic()
+    waits = [wait_for(f, 60) for f in futs]
+    armed = time.monotonic() - start
+    threads = threading.active_count()
+
+    start = time.monotonic()
+    for f in futs:
+        f.set_result(None)
+    completed = time.monotonic() - start
+
+    assert all(w.done() for w in waits)
+    print(f"wait_for: {N} timeouts armed in {armed:.3f}s, {threads} live threads, "
+          f"completed and disarmed in {completed:.3f}s")
+
+
+if __name__ == "__main__":
+    bench_sleep()
+    bench_wait_for_cancelled()
@@ -0,0 +1,10 @@
+import asyncio
+
+
+def run_in_new_loop(coro):
+    # asyncio.run() would unset the event loop of the main thread for later tests.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
@@ -1,6 +1,11 @@
 import unittest
-from asyncio import get_event_loop, sleep as asleep
-from yakusoku.operations import sleep, futurize
+import threading
+from types import coroutine
+from asyncio import ensure_future, get_event_loop, new_event_loop, SelectorEventLoop, gather as agather, sleep as asleep
+from concurrent.futures import Future
+
+from yakusoku.operations import sleep, futurize, gather, wait
+from yakusoku.coroutines import run_coroutine
 from yakusoku.typings import AbstractFuture
 
 
@@ -32,7 +37,8 @@ class AsyncIOTest(unittest.TestCase):
         self.assertIs(x, obj)
 
     def test_aio_future_in_futurized(self):
-        s = asleep(0.5, obj, loop=self.loop)
+        # One asyncio future for both awaiters; a coroutine can only be awaited once.
+        s = ensure_future(asleep(0.5, obj), loop=self.loop)
 
         @futurize
         async def sleeper():
@@ -41,9 +47,271 @@ class AsyncIOTest(unittest.TestCase):
         async def runner():
             await s
 
-        s: AbstractFuture[object] = sleeper()
+        # A new name, as the task may only start once this line has run.
+        task: AbstractFuture[object] = sleeper()
         self.loop.create_task(runner())
         self.loop.run_until_complete(sleep(0.75))
 
-        self.assertTrue(s.done())
-        self.assertIs(s.result(), obj)
+        self.assertTrue(task.done())
+        self.assertIs(task.result(), obj)
+
+
+class SharedBridgeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_shared_between_awaiters(self):
+        fut = Future()
+
+        async def _await():
+            return await fut
+
+        async def _main():
+            tasks = [self.loop.create_task(_await()) for _ in range(100)]
+            await asleep(0)
+            callbacks = len(fut._done_callbacks)
+            threading.Thread(target=fut.set_result, args=(obj,)).start()
+            return callbacks, await agather(*tasks)
+
+        callbacks, results = self.loop.run_until_complete(_main())
+        self.assertEqual(callbacks, 1)
+        self.assertTrue(all(r is obj for r in results))
+
+    def test_done_future_not_bridged(self):
+        fut = Future()
+        fut.set_result(obj)
+
+        async def _await():
+            return await fut
+
+        self.assertIs(self.loop.run_until_complete(_await()), obj)
+        self.assertEqual(len(fut._done_callbacks), 0)
+
+    def test_cancel_single_awaiter(self):
+        fut = Future()
+        fut.set_running_or_notify_cancel()
+
+        async def _await():
+            return await fut
+
+        async def _main():
+            t1 = self.loop.create_task(_await())
+            t2 = self.loop.create_task(_await())
+            await asleep(0)
+            t1.cancel()
+            await asleep(0)
+            threading.Thread(target=fut.set_result, args=(obj,)).start()
+            return await t2, t1.cancelled()
+
+        result, cancelled = self.loop.run_until_complete(_main())
+        self.assertIs(result, obj)
+        self.assertTrue(cancelled)
+
+    def test_cancel_propagates(self):
+        fut = Future()
+
+        async def _await():
+            return await fut
+
+        async def _main():
+            t1 = self.loop.create_task(_await())
+            await asleep(0)
+            t1.cancel()
+            await asleep(0)
+            return fut.cancelled()
+
+        self.assertTrue(self.loop.run_until_complete(_main()))
+
+
+class LoopTaskTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def test_runs_on_loop(self):
+        threads = []
+
+        async def _func():
+            threads.append(threading.current_thread())
+            await asleep(0.05)
+            threads.append(threading.current_thread())
+            await sleep(0.05)
+            threads.append(threading.current_thread())
+            return obj
+
+        fut = run_coroutine(_func(), loop=self.loop)
+        self.assertIs(fut.result(1), obj)
+        self.assertEqual(threads, [self.thread] * 3)
+
+    def test_native_aio_future(self):
+        async def _func():
+            fut = self.loop.create_future()
+            self.loop.call_later(0.05, fut.set_result, obj)
+            return (await fut), threading.current_thread()
+
+        result, thread = run_coroutine(_func(), loop=self.loop).result(1)
+        self.assertIs(result, obj)
+        self.assertIs(thread, self.thread)
+
+    def test_bare_yield(self):
+        async def _func():
+            await asleep(0)
+            await asleep(0)
+            return threading.current_thread()
+
+        self.assertIs(run_coroutine(_func(), loop=self.loop).result(1), self.thread)
+
+    def test_bad_yield(self):
+        @coroutine
+        def _bad():
+            yield obj
+
+        async def _func():
+            try:
+                await _bad()
+            except AttributeError:
+                return obj
+
+        self.assertIs(run_coroutine(_func(), loop=self.loop).result(1), obj)
+
+    def test_child_coroutine_on_loop(self):
+        async def _child():
+            await asleep(0.01)
+            return threading.current_thread()
+
+        async def _func():
+            return await _child()
+
+        self.assertIs(run_coroutine(_func(), loop=self.loop).result(1), self.thread)
+
+    def test_exception(self):
+        async def _func():
+            await asleep(0.01)
+            raise ValueError()
+
+        fut = run_coroutine(_func(), loop=self.loop)
+        self.assertIsInstance(fut.exception(1), ValueError)
+
+    def test_cancel(self):
+        started = threading.Event()
+        inner = []
+
+        async def _func():
+            fut = self.loop.create_future()
+            inner.append(fut)
+            started.set()
+            await fut
+
+        task = run_coroutine(_func(), loop=self.loop)
+        self.assertTrue(started.wait(1))
+        task.cancel()
+        sleep(0.05).result()
+        self.assertTrue(inner[0].cancelled())
+
+    def test_futurize_loop(self):
+        @futurize(loop=self.loop)
+        async def _func():
+            await asleep(0.01)
+            return threading.current_thread()
+
+        self.assertIs(_func().result(1), self.thread)
+
+    def test_executor_and_loop(self):
+        async def _func():
+            pass
+        coro = _func()
+        with self.assertRaises(ValueError):
+            run_coroutine(coro, loop=self.loop, executor=object())
+        coro.close()
+
+
+class _CountingLoop(SelectorEventLoop):
+    threadsafe_calls = 0
+
+    def call_soon_threadsafe(self, *args, **kwargs):
+        self.threadsafe_calls += 1
+        return super(_CountingLoop, self).call_soon_threadsafe(*args, **kwargs)
+
+
+class SameLoopCombineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = _CountingLoop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_gather_native(self):
+        async def _main():
+            futs = [self.loop.create_future() for _ in range(100)]
+            combined = gather(*futs)
+            for i, f in enumerate(futs):
+                self.loop.call_soon(f.set_result, i)
+            return await combined
+
+        self.assertEqual(self.loop.run_until_complete(_main()), list(range(100)))
+        # Only the combined future crosses threads.
+        self.assertLessEqual(self.loop.threadsafe_calls, 1)
+
+    def test_gather_native_exception(self):
+        async def _main():
+            futs = [self.loop.create_future() for _ in range(3)]
+            combined = gather(*futs)
+            futs[1].set_exception(ValueError())
+            with self.assertRaises(ValueError):
+                await combined
+            # The loop runs the pending cancellations with its next iteration.
+            combined.cancel()
+            await asleep(0)
+            return futs
+
+        futs = self.loop.run_until_complete(_main())
+        self.assertFalse(futs[0].cancelled())
+
+    def test_gather_native_cancel(self):
+        async def _main():
+            futs = [self.loop.create_future() for _ in range(3)]
+            futs[0].set_result(1)
+            combined = gather(*futs)
+            combined.cancel()
+            await asleep(0)
+            return futs
+
+        futs = self.loop.run_until_complete(_main())
+        self.assertFalse(futs[0].cancelled())
+        self.assertTrue(futs[1].cancelled())
+        self.assertTrue(futs[2].cancelled())
+
+    def test_wait_native(self):
+        async def _main():
+            futs = [self.loop.create_future() for _ in range(3)]
+            futs[0].set_result(1)
+            futs[1].cancel()
+            return await wait(futs, timeout=0.05)
+
+        done, not_done = self.loop.run_until_complete(_main())
+        self.assertEqual(len(done), 2)
+        self.assertEqual(len(not_done), 1)
+        # The futures are copies that can be used from any thread.
+        results = sorted(f.result() if not f.exception() else -1 for f in done)
+        self.assertEqual(results, [-1, 1])
+        self.assertIsInstance(not_done[0], Future)
+
+    def test_mixed_inputs_are_bridged(self):
+        async def _main():
+            fut = self.loop.create_future()
+            self.loop.call_soon(fut.set_result, 1)
+            return await gather(fut, sleep(0.01, 2))
+
+        self.assertEqual(self.loop.run_until_complete(_main()), [1, 2])
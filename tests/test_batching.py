@@ -0,0 +1,128 @@
+import time
+import unittest
+import threading
+
+from yakusoku.future import SlimFuture
+from yakusoku.coroutines import run_coroutine
+from yakusoku.operations import futurize, gather, resolve
+from yakusoku.batching import batched
+
+
+class BatchedTest(unittest.TestCase):
+
+    def test_window(self):
+        batches = []
+
+        @batched(max_batch=100, max_delay=0.02)
+        def double(keys):
+            batches.append(keys)
+            return resolve([k * 2 for k in keys])
+
+        futs = [double(i) for i in range(5)]
+        self.assertEqual([f.result(1) for f in futs], [0, 2, 4, 6, 8])
+        self.assertEqual(batches, [[0, 1, 2, 3, 4]])
+
+    def test_max_batch(self):
+        batches = []
+
+        @batched(max_batch=3, max_delay=10)
+        def double(keys):
+            batches.append(keys)
+            return resolve([k * 2 for k in keys])
+
+        futs = [double(i) for i in range(7)]
+        # The first two batches are full and dispatched right away.
+        self.assertEqual([f.result(0) for f in futs[:6]], [0, 2, 4, 6, 8, 10])
+        self.assertFalse(futs[6].done())
+        double.flush()
+        self.assertEqual(futs[6].result(0), 12)
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_per_item_errors(self):
+        @batched(max_delay=0)
+        def lookup(keys):
+            return resolve([KeyError(k) if k < 0 else k for k in keys])
+
+        ok, bad = lookup(1), lookup(-1)
+        self.assertEqual(ok.result(1), 1)
+        with self.assertRaises(KeyError):
+            bad.result(1)
+
+    def test_batch_error(self):
+        @batched(max_delay=0)
+        @futurize
+        async def lookup(keys):
+            raise RuntimeError("down")
+
+        futs = [lookup(i) for i in range(3)]
+        for fut in futs:
+            with self.assertRaises(RuntimeError):
+                fut.result(1)
+
+    def test_wrong_length(self):
+        @batched(max_delay=0)
+        def lookup(keys):
+            return resolve([])
+
+        with self.assertRaises(ValueError):
+            lookup(1).result(1)
+
+    def test_cancelled_before_dispatch(self):
+        batches = []
+        pending = SlimFuture()
+
+        @batched(max_delay=10)
+        def lookup(keys):
+            batches.append(keys)
+            return pending
+
+        first, second = lookup(1), lookup(2)
+        first.cancel()
+        lookup.flush()
+        self.assertEqual(batches, [[2]])
+        # Dispatched calls cannot be cancelled anymore.
+        self.assertFalse(second.cancel())
+        pending.set_result([2])
+        self.assertEqual(second.result(0), 2)
+
+    def test_threads_and_tasks(self):
+        batches = []
+
+        @batched(max_batch=1000, max_delay=0.05)
+        @futurize
+        async def lookup(keys):
+            batches.append(len(keys))
+            return keys
+
+        results = []
+
+        def thread(i):
+            results.append(lookup(i).result(1))
+
+        async def task(i):
+            return await lookup(i)
+
+        threads = [threading.Thread(target=thread, args=(i,)) for i in range(10)]
+        for t in threads:
+            t.start()
+        tasks = gather(*(run_coroutine(task(i)) for i in range(10, 20)))
+        for t in threads:
+            t.join()
+
+        self.assertEqual(tasks.result(1), list(range(10, 20)))
+        self.assertEqual(sorted(results), list(range(10)))
+        self.assertEqual(sum(batches), 20)
+        self.assertLess(len(batches), 20)
+
+    def test_timer_does_not_wait_for_full_batch(self):
+        @batched(max_batch=1000, max_delay=0.01)
+        def lookup(keys):
+            return resolve(keys)
+
+        start = time.monotonic()
+        self.assertEqual(lookup(1).result(1), 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+import os
+import time
+import tempfile
+import unittest
+
+from yakusoku.future import SlimFuture
+from yakusoku.operations import futurize, resolve, sleep
+from yakusoku.cache import cached, _digest, _read
+from yakusoku.backends import CacheBackend, SqliteBackend, DirectoryBackend
+
+
+class CachedTest(unittest.TestCase):
+
+    def test_hit(self):
+        calls = []
+
+        @cached()
+        def lookup(key):
+            calls.append(key)
+            return resolve(key * 2)
+
+        self.assertEqual(lookup(1).result(0), 2)
+        self.assertEqual(lookup(1).result(0), 2)
+        self.assertEqual(lookup(2).result(0), 4)
+        self.assertEqual(calls, [1, 2])
+
+        info = lookup.cache_info()
+        self.assertEqual((info.hits, info.misses, info.coalesced, info.currsize), (1, 2, 0, 2))
+
+    def test_coalesce(self):
+        calls = []
+        pending = SlimFuture()
+
+        @cached()
+        def lookup(key):
+            calls.append(key)
+            return pending
+
+        callers = [lookup(1) for _ in range(5)]
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(any(c.done() for c in callers))
+
+        pending.set_result("value")
+        self.assertEqual([c.result(0) for c in callers], ["value"] * 5)
+        self.assertEqual(lookup.cache_info().coalesced, 4)
+
+    def test_cancel_one_caller(self):
+        pending = SlimFuture()
+
+        @cached()
+        def lookup(key):
+            return pending
+
+        first = lookup(1)
+        second = lookup(1)
+        first.cancel()
+        self.assertFalse(pending.cancelled())
+
+        pending.set_result(1)
+        self.assertTrue(first.cancelled())
+        self.assertEqual(second.result(0), 1)
+
+    def test_cancel_all_callers(self):
+        pending = SlimFuture()
+        calls = []
+
+        @cached()
+        def lookup(key):
+            calls.append(key)
+            return pending if len(calls) == 1 else resolve(key)
+
+        first = lookup(1)
+        second = lookup(1)
+        first.cancel()
+        second.cancel()
+        self.assertTrue(pending.cancelled())
+
+        # Nothing has been cached, the next call starts over.
+        self.assertEqual(lookup(1).result(0), 1)
+        self.assertEqual(len(calls), 2)
+
+    def test_exceptions_not_cached(self):
+        calls = []
+
+        @cached()
+        def lookup(key):
+            calls.append(key)
+            raise KeyError(key)
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                lookup(1).result(0)
+        self.assertEqual(len(calls), 2)
+
+    def test_exceptions_cached(self):
+        calls = []
+
+        @cached(cache_exceptions=True)
+        @futurize
+        async def lookup(key):
+            calls.append(key)
+            raise KeyError(key)
+
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                lookup(1).result(1)
+        self.assertEqual(len(calls), 1)
+
+    def test_lru(self):
+        calls = []
+
+        @cached(maxsize=2)
+        def lookup(key):
+            calls.append(key)
+            return resolve(key)
+
+        for key in (1, 2, 1, 3, 1, 2):
+            lookup(key).result(0)
+        # 2 has been evicted by 3, as 1 was used more recently.
+        self.assertEqual(calls, [1, 2, 3, 2])
+        self.assertEqual(lookup.cache_info().currsize, 2)
+
+    def test_ttl(self):
+        calls = []
+
+        @cached(ttl=0.05)
+        def lookup(key):
+            calls.append(key)
+            return resolve(key)
+
+        lookup(1).result(0)
+        lookup(1).result(0)
+        self.assertEqual(len(calls), 1)
+        time.sleep(0.1)
+        lookup(1).result(0)
+        self.assertEqual(len(calls), 2)
+
+    def test_futurize(self):
+        calls = []
+
+        @cached()
+        @futurize
+        async def lookup(key):
+            calls.append(key)
+            await sleep(0.01)
+            return key
+
+        callers = [lookup(1) for _ in range(3)]
+        self.assertEqual([c.result(1) for c in callers], [1, 1, 1])
+        self.assertEqual(lookup(1).result(0), 1)
+        self.assertEqual(calls, [1])
+
+    def test_cache_clear(self):
+        calls = []
+
+        @cached()
+        def lookup(key):
+            calls.append(key)
+            return resolve(key)
+
+        lookup(1).result(0)
+        lookup.cache_clear()
+        lookup(1).result(0)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(lookup.cache_info().misses, 1)
+
+
+
+def make_lookup(backend, calls, ttl=None):
+    # Every call returns a fresh function, like a restarted process would.
+    @cached(backend=backend, ttl=ttl)
+    @futurize
+    async def lookup(key, scale=1):
+        calls.append(key)
+        return key * scale
+    return lookup
+
+
+class BackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_persists(self, backend):
+        calls = []
+        self.assertEqual(make_lookup(backend, calls)(2, scale=3).result(1), 6)
+        self.assertEqual(calls, [2])
+
+        # Writes happen in the background.
+        deadline = time.monotonic() + 1
+        restarted = make_lookup(backend, calls)
+        while time.monotonic() < deadline:
+            restarted.cache_clear()
+            fut = restarted(2, scale=3)
+            self.assertEqual(fut.result(1), 6)
+            if restarted.cache_info().loaded:
+                break
+            time.sleep(0.01)
+        self.assertEqual(restarted.cache_info().loaded, 1)
+        self.assertEqual(calls[1:], [2] * (len(calls) - 1))
+
+        backend.clear()
+        self.assertIsNone(backend.load("missing"))
+
+    def test_sqlite(self):
+        backend = SqliteBackend(os.path.join(self.tmp.name, "cache.db"))
+        try:
+            self.check_persists(backend)
+        finally:
+            backend.close()
+
+    def test_directory(self):
+        self.check_persists(DirectoryBackend(self.tmp.name))
+
+    def test_directory_max_size(self):
+        backend = DirectoryBackend(self.tmp.name, max_size=250)
+        for i in range(5):
+            backend.store("key%d" % i, b"x" * 100)
+            # Keep the modification times apart.
+            os.utime(backend._file("key%d" % i), (i, i))
+        self.assertEqual(backend.load("key0"), None)
+        self.assertEqual(backend.load("key2"), None)
+        self.assertEqual(backend.load("key4"), b"x" * 100)
+
+    def test_directory_scans_on_overflow(self):
+        backend = DirectoryBackend(self.tmp.name, max_size=250)
+        scans = []
+        scan = backend._scan
+        backend._scan = lambda: scans.append(None) or scan()
+
+        # Only the first store scans the directory, to learn its size.
+        backend.store("key0", b"x" * 100)
+        backend.store("key0", b"x" * 100)
+        backend.store("key1", b"x" * 100)
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(backend._size, 200)
+
+        backend.store("key2", b"x" * 100)
+        self.assertEqual(len(scans), 2)
+        self.assertEqual(backend._size, 200)
+
+    def test_abstract_backend(self):
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+    def test_sqlite_table_name(self):
+        with self.assertRaises(ValueError):
+            SqliteBackend(os.path.join(self.tmp.name, "cache.db"), table='x"; DROP TABLE y; --')
+
+    def test_expired(self):
+        backend = DirectoryBackend(self.tmp.name)
+        calls = []
+        lookup = make_lookup(backend, calls, ttl=0.2)
+        lookup(1).result(1)
+        time.sleep(0.3)
+        make_lookup(backend, calls, ttl=0.2)(1).result(1)
+        self.assertEqual(calls, [1, 1])
+        # Wait for the fresh result to be written before the directory is removed.
+        deadline = time.monotonic() + 1
+        while not _read(backend, _digest(lookup.__wrapped__, (1,), {}))[0]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_unpicklable_arguments(self):
+        calls = []
+        with self.assertRaises(Exception):
+            make_lookup(DirectoryBackend(self.tmp.name), calls)(lambda: None).result(1)
+        self.assertEqual(calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
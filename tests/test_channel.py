@@ -0,0 +1,151 @@
+import unittest
+import threading
+from concurrent.futures import TimeoutError
+
+from yakusoku.coroutines import run_coroutine
+from yakusoku.channel import Channel, ChannelClosed
+
+from helpers import run_in_new_loop
+
+
+class ChannelTest(unittest.TestCase):
+
+    def test_put_get(self):
+        ch = Channel()
+        self.assertTrue(ch.put(1).done())
+        self.assertEqual(ch.qsize(), 1)
+        self.assertEqual(ch.get().result(0), 1)
+        self.assertTrue(ch.empty())
+
+    def test_waiting_getter(self):
+        ch = Channel()
+        getter = ch.get()
+        self.assertFalse(getter.done())
+        ch.put(1)
+        self.assertEqual(getter.result(0), 1)
+        self.assertTrue(ch.empty())
+
+    def test_fifo_getters(self):
+        ch = Channel()
+        getters = [ch.get() for _ in range(3)]
+        for i in range(3):
+            ch.put(i)
+        self.assertEqual([g.result(0) for g in getters], [0, 1, 2])
+
+    def test_backpressure(self):
+        ch = Channel(2)
+        ch.put(1)
+        ch.put(2)
+        self.assertTrue(ch.full())
+        putter = ch.put(3)
+        self.assertFalse(putter.done())
+
+        self.assertEqual(ch.get().result(0), 1)
+        self.assertTrue(putter.done())
+        self.assertEqual([ch.get().result(0) for _ in range(2)], [2, 3])
+
+    def test_cancelled_putter(self):
+        ch = Channel(1)
+        ch.put(1)
+        putter = ch.put(2)
+        putter.cancel()
+        ch.put(3)
+        self.assertEqual(ch.get().result(0), 1)
+        self.assertEqual(ch.get().result(0), 3)
+
+    def test_cancelled_getter(self):
+        ch = Channel()
+        getter = ch.get()
+        getter.cancel()
+        ch.put(1)
+        self.assertEqual(ch.get().result(0), 1)
+
+    def test_many(self):
+        ch = Channel(3)
+        putter = ch.put_many(range(5))
+        self.assertFalse(putter.done())
+        self.assertEqual(ch.get_many(10).result(0), [0, 1, 2])
+        self.assertTrue(putter.done())
+        self.assertEqual(ch.get_many(10).result(0), [3, 4])
+
+        getter = ch.get_many(10)
+        ch.put(5)
+        self.assertEqual(getter.result(0), [5])
+
+    def test_close(self):
+        ch = Channel(1)
+        ch.put(1)
+        putter = ch.put(2)
+        ch.close()
+        self.assertIsInstance(putter.exception(0), ChannelClosed)
+        self.assertIsInstance(ch.put(3).exception(0), ChannelClosed)
+        self.assertEqual(ch.get().result(0), 1)
+        self.assertIsInstance(ch.get().exception(0), ChannelClosed)
+
+    def test_close_wakes_getters(self):
+        ch = Channel()
+        getter = ch.get()
+        ch.close()
+        self.assertIsInstance(getter.exception(0), ChannelClosed)
+
+    def test_sync(self):
+        ch = Channel(1)
+        ch.put_sync(1)
+        with self.assertRaises(TimeoutError):
+            ch.put_sync(2, timeout=0.01)
+        self.assertEqual(ch.get_sync(), 1)
+
+    def test_put_sync_timeout_drops_item(self):
+        ch = Channel(1)
+        ch.put_sync(1)
+        with self.assertRaises(TimeoutError):
+            ch.put_sync(2, timeout=0.01)
+        self.assertEqual(ch.get_sync(), 1)
+        self.assertEqual(ch.qsize(), 0)
+        with self.assertRaises(TimeoutError):
+            ch.get_sync(timeout=0.01)
+
+    def test_get_sync_timeout_keeps_item(self):
+        ch = Channel()
+        with self.assertRaises(TimeoutError):
+            ch.get_sync(timeout=0.01)
+        ch.put_sync(1)
+        self.assertEqual(ch.qsize(), 1)
+        self.assertEqual(ch.get_sync(timeout=0.01), 1)
+
+    def test_threads(self):
+        ch = Channel(4)
+
+        def _produce():
+            for i in range(1000):
+                ch.put_sync(i)
+            ch.close()
+
+        threading.Thread(target=_produce).start()
+        self.assertEqual(list(ch), list(range(1000)))
+
+    def test_task_async_for(self):
+        ch = Channel(4)
+
+        async def _consume():
+            return [item async for item in ch]
+
+        consumer = run_coroutine(_consume())
+        for i in range(100):
+            ch.put_sync(i)
+        ch.close()
+        self.assertEqual(consumer.result(1), list(range(100)))
+
+    def test_thread_to_asyncio(self):
+        ch = Channel(16)
+
+        def _produce():
+            for i in range(500):
+                ch.put_sync(i)
+            ch.close()
+
+        async def _consume():
+            threading.Thread(target=_produce).start()
+            return [item async for item in ch]
+
+        self.assertEqual(run_in_new_loop(_consume()), list(range(500)))
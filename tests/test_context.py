@@ -2,7 +2,17 @@ import unittest
 
 import time
 from threading import Thread
-from yakusoku.context import in_run_coro, set_run_coro
+from asyncio import ensure_future, run_coroutine_threadsafe, sleep as asleep
+from concurrent.futures import Future
+
+from yakusoku.context import ContextVar, in_run_coro, set_run_coro
+from yakusoku.coroutines import run_coroutine
+from yakusoku.loop import get_background_loop
+from yakusoku.operations import futurize, sleep
+
+# Context variables only exist since Python 3.7.
+var = ContextVar('var', default=None) if ContextVar is not None else None
+needs_contextvars = unittest.skipIf(ContextVar is None, "contextvars is not available")
 
 
 class ContextTest(unittest.TestCase):
@@ -55,3 +65,76 @@ class ContextTest(unittest.TestCase):
                 self.assertTrue(in_run_coro())
             self.assertTrue(in_run_coro())
         self.assertFalse(in_run_coro())
+
+
+class TaskContextTest(unittest.TestCase):
+
+    def test_in_task(self):
+        async def _func():
+            return in_run_coro()
+        self.assertTrue(run_coroutine(_func()).result())
+        self.assertFalse(in_run_coro())
+
+    @needs_contextvars
+    def test_context_follows_task(self):
+        fut = Future()
+        seen = []
+
+        async def _func():
+            seen.append(var.get())
+            await fut
+            seen.append(var.get())
+            seen.append(in_run_coro())
+
+        token = var.set(1)
+        try:
+            task = run_coroutine(_func())
+        finally:
+            var.reset(token)
+
+        Thread(target=fut.set_result, args=(None,)).start()
+        task.result(1)
+        self.assertEqual(seen, [1, 1, True])
+
+    @needs_contextvars
+    def test_context_copied(self):
+        async def _func():
+            var.set(2)
+        run_coroutine(_func()).result()
+        self.assertIsNone(var.get())
+
+    @needs_contextvars
+    def test_child_shares_context(self):
+        async def _child():
+            var.set(3)
+
+        async def _func():
+            await _child()
+            return var.get()
+        self.assertEqual(run_coroutine(_func()).result(), 3)
+
+    def test_not_inherited_by_aio_tasks(self):
+        loop = get_background_loop()
+
+        async def _aio():
+            await sleep(0.01)
+            return in_run_coro()
+
+        @futurize
+        async def _func():
+            return await run_coroutine_threadsafe(_aio(), loop)
+
+        self.assertFalse(_func().result(1))
+
+    def test_not_inherited_on_loop(self):
+        loop = get_background_loop()
+
+        async def _aio():
+            await asleep(0)
+            await sleep(0.01)
+            return in_run_coro()
+
+        async def _func():
+            return await ensure_future(_aio())
+
+        self.assertFalse(run_coroutine(_func(), loop=loop).result(1))
@@ -1,8 +1,9 @@
 import time
+import inspect
 import unittest
 
-from threading import Thread
-from concurrent.futures import CancelledError, Future
+from threading import Thread, current_thread
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 
 from yakusoku.coroutines import run_coroutine
 from yakusoku.operations import resolve, reject, sleep
@@ -95,4 +96,84 @@ class CoroutineTest(unittest.TestCase):
         time.sleep(.5)
         fut.cancel()
         self.assertTrue(timeout.cancelled())
-        self.assertIsInstance(err, GeneratorExit)
\ No newline at end of file
+        self.assertIsInstance(err, GeneratorExit)
+
+    def test_await_many_ready_futures(self):
+        async def _func():
+            total = 0
+            for i in range(10000):
+                total += await resolve(i)
+            return total
+        fut = run_coroutine(_func())
+        self.assertEqual(fut.result(), sum(range(10000)))
+
+    def test_await_many_ready_coroutines(self):
+        async def _child(i):
+            return await resolve(i)
+
+        async def _func():
+            total = 0
+            for i in range(10000):
+                total += await _child(i)
+            return total
+        fut = run_coroutine(_func())
+        self.assertEqual(fut.result(), sum(range(10000)))
+
+    def test_done_releases_coroutine(self):
+        async def _func():
+            return await resolve(obj)
+        fut = run_coroutine(_func())
+        self.assertIs(fut.result(), obj)
+        self.assertIsNone(fut.coro)
+        self.assertIsNone(fut.current_future)
+
+
+class ExecutorTaskTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(2, thread_name_prefix="task-pool")
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_resumes_on_executor(self):
+        names = []
+
+        def _complete_later():
+            fut = Future()
+            Thread(target=lambda: (time.sleep(.1), fut.set_result(obj))).start()
+            return fut
+
+        async def _child():
+            names.append(current_thread().name)
+            r = await _complete_later()
+            names.append(current_thread().name)
+            return r
+
+        async def _func():
+            names.append(current_thread().name)
+            r = await _complete_later()
+            names.append(current_thread().name)
+            return (await _child()) is r
+
+        fut = run_coroutine(_func(), executor=self.pool)
+        self.assertTrue(fut.result())
+        self.assertEqual(len(names), 4)
+        self.assertTrue(all(n.startswith("task-pool") for n in names))
+
+    def test_error_on_executor(self):
+        async def _func():
+            await reject(err)
+        fut = run_coroutine(_func(), executor=self.pool)
+        self.assertIs(fut.exception(), err)
+
+    def test_shutdown_executor(self):
+        self.pool.shutdown()
+
+        async def _func():
+            pass
+        coro = _func()
+        fut = run_coroutine(coro, executor=self.pool)
+        self.assertIsInstance(fut.exception(), RuntimeError)
+        # Closed, so it does not warn about never being awaited.
+        self.assertEqual(inspect.getcoroutinestate(coro), inspect.CORO_CLOSED)
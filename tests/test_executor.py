@@ -0,0 +1,64 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from yakusoku import executor, operations
+
+
+obj = object()
+
+
+class ExecutorTest(unittest.TestCase):
+
+    def tearDown(self):
+        executor.set_executor(None)
+        executor.set_max_workers(None)
+
+    def test_default_pool(self):
+        self.assertIsInstance(executor.get_executor(), ThreadPoolExecutor)
+        self.assertIs(executor.get_executor(), executor.get_executor())
+
+    def test_custom_executor(self):
+        pool = ThreadPoolExecutor(1, thread_name_prefix="custom")
+        executor.set_executor(pool)
+        try:
+            names = []
+            done = threading.Event()
+
+            def _cb(_):
+                names.append(threading.current_thread().name)
+                done.set()
+
+            operations.sleep(0, obj).add_done_callback(_cb)
+            self.assertTrue(done.wait(2))
+            self.assertTrue(names[0].startswith("custom"))
+        finally:
+            executor.set_executor(None)
+            pool.shutdown()
+
+    def test_max_workers(self):
+        executor.set_max_workers(2)
+        idents = set()
+        lock = threading.Lock()
+
+        @operations.futurize
+        async def _func():
+            with lock:
+                idents.add(threading.get_ident())
+
+        futs = [_func() for _ in range(100)]
+        for f in futs:
+            f.result()
+        self.assertLessEqual(len(idents), 2)
+
+    def test_callback_exception_logged(self):
+        done = threading.Event()
+
+        def _raise(_):
+            done.set()
+            raise Exception()
+
+        with self.assertLogs("yakusoku"):
+            operations.sleep(0).add_done_callback(_raise)
+            self.assertTrue(done.wait(2))
+            operations.sleep(0.1).result()
@@ -1,8 +1,10 @@
 import unittest
-from asyncio import Future as AIOFuture
-from concurrent.futures import Future
+import threading
+from asyncio import Future as AIOFuture, new_event_loop, wrap_future as aio_wrap_future
+from concurrent.futures import Future, CancelledError, TimeoutError
+from concurrent.futures import wait, as_completed, FIRST_COMPLETED
 
-from yakusoku.future import copy, wrap_future
+from yakusoku.future import copy, wrap_future, SlimFuture
 from yakusoku.coroutines import Task
 from yakusoku.context import set_run_coro
 
@@ -34,6 +36,19 @@ class WrapTest(unittest.TestCase):
             pass
         self.assertIsInstance(wrap_future(coro()), Task)
 
+    def test_wrap_subclass_unscathed(self):
+        class _Sub(Future):
+            pass
+        fut = _Sub()
+        self.assertIs(wrap_future(fut), fut)
+        self.assertIs(wrap_future(fut), fut)
+
+    def test_wrap_slim_subclass_unscathed(self):
+        class _Sub(SlimFuture):
+            pass
+        fut = _Sub()
+        self.assertIs(wrap_future(fut), fut)
+
     def test_wrap_aio(self):
         fut = AIOFuture()
         self.assertIsInstance(wrap_future(fut), Future)
@@ -135,4 +150,122 @@ class CopyTest(unittest.TestCase):
         source.cancel()
 
         self.assertFalse(target.cancelled())
-        self.assertFalse(target.done())
\ No newline at end of file
+        self.assertFalse(target.done())
+
+
+class SlimFutureTest(unittest.TestCase):
+
+    def test_result(self):
+        fut = SlimFuture()
+        self.assertFalse(fut.done())
+        fut.set_result(obj)
+        self.assertTrue(fut.done())
+        self.assertIsNone(fut.exception())
+        self.assertIs(fut.result(), obj)
+
+    def test_exception(self):
+        fut = SlimFuture()
+        fut.set_exception(exc)
+        self.assertIs(fut.exception(), exc)
+        with self.assertRaises(Exception):
+            fut.result()
+
+    def test_cancel(self):
+        fut = SlimFuture()
+        self.assertTrue(fut.cancel())
+        self.assertTrue(fut.cancelled())
+        self.assertTrue(fut.cancel())
+        with self.assertRaises(CancelledError):
+            fut.result()
+
+    def test_cancel_finished(self):
+        fut = SlimFuture()
+        fut.set_result(obj)
+        self.assertFalse(fut.cancel())
+        self.assertFalse(fut.cancelled())
+
+    def test_set_twice(self):
+        fut = SlimFuture()
+        fut.set_result(obj)
+        with self.assertRaises(Exception):
+            fut.set_result(obj)
+
+    def test_callbacks(self):
+        called = []
+        fut = SlimFuture()
+        fut.add_done_callback(called.append)
+        fut.add_done_callback(called.append)
+        fut.set_result(obj)
+        fut.add_done_callback(called.append)
+        self.assertEqual(called, [fut, fut, fut])
+
+    def test_lazy_allocation(self):
+        fut = SlimFuture()
+        fut.set_result(obj)
+        fut.result()
+        self.assertIsNone(fut._cond)
+        self.assertIsNone(fut._waiter_list)
+        self.assertIsNone(fut._callbacks)
+        # Everything lives in slots, the inherited instance dict stays empty.
+        self.assertEqual(fut.__dict__, {})
+
+    def test_is_concurrent_future(self):
+        fut = SlimFuture()
+        fut.set_result(obj)
+        self.assertIsInstance(fut, Future)
+
+        loop = new_event_loop()
+        try:
+            self.assertIs(loop.run_until_complete(aio_wrap_future(fut, loop=loop)), obj)
+        finally:
+            loop.close()
+
+    def test_blocking_result(self):
+        fut = SlimFuture()
+        threading.Timer(0.1, fut.set_result, (obj,)).start()
+        self.assertIs(fut.result(1), obj)
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            SlimFuture().result(0.05)
+
+    def test_concurrent_wait(self):
+        f1, f2 = SlimFuture(), Future()
+        threading.Timer(0.1, f1.set_result, (obj,)).start()
+        done, not_done = wait([f1, f2], timeout=1, return_when=FIRST_COMPLETED)
+        self.assertEqual(done, {f1})
+        self.assertEqual(not_done, {f2})
+
+    def test_concurrent_wait_cancelled(self):
+        fut = SlimFuture()
+        threading.Timer(0.1, fut.cancel).start()
+        done, _ = wait([fut], timeout=1)
+        self.assertEqual(done, {fut})
+
+    def test_as_completed(self):
+        futs = [SlimFuture() for _ in range(3)]
+        for i, f in enumerate(reversed(futs)):
+            threading.Timer(0.05 * (i + 1), f.set_result, (i,)).start()
+        self.assertEqual([f.result() for f in as_completed(futs, timeout=1)], [0, 1, 2])
+
+    def test_resolve_self(self):
+        fut = SlimFuture()
+        with set_run_coro():
+            self.assertIs(next(iter(fut)), fut)
+
+    def test_aio_await(self):
+        loop = new_event_loop()
+        try:
+            fut = SlimFuture()
+
+            async def _await():
+                return await fut
+
+            threading.Timer(0.1, fut.set_result, (obj,)).start()
+            self.assertIs(loop.run_until_complete(_await()), obj)
+        finally:
+            loop.close()
+
+    def test_wrap_unscathed(self):
+        fut = SlimFuture()
+        self.assertIs(wrap_future(fut), fut)
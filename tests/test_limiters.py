@@ -0,0 +1,173 @@
+import time
+import asyncio
+import unittest
+import threading
+
+from yakusoku.coroutines import run_coroutine
+from yakusoku.operations import futurize, gather, sleep
+from yakusoku.limiters import RateLimiter, ConcurrencyLimiter
+
+from helpers import run_in_new_loop
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_burst(self):
+        limiter = RateLimiter(10, burst=3)
+        self.assertTrue(all(limiter.acquire().done() for _ in range(3)))
+        self.assertFalse(limiter.acquire().done())
+
+    def test_rate(self):
+        limiter = RateLimiter(50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire().result(1)
+        # The first token is there right away, the others take 20ms each.
+        self.assertGreater(time.monotonic() - start, 0.09)
+
+    def test_fifo_weighted(self):
+        limiter = RateLimiter(100, burst=5)
+        limiter.acquire(5)
+        order = []
+        heavy = limiter.acquire(5)
+        light = limiter.acquire(1)
+        heavy.add_done_callback(lambda _: order.append("heavy"))
+        light.add_done_callback(lambda _: order.append("light"))
+        light.result(1)
+        # The light waiter does not overtake the heavy one.
+        self.assertEqual(order, ["heavy", "light"])
+
+    def test_cancelled_waiter(self):
+        limiter = RateLimiter(20, burst=5)
+        limiter.acquire(5)
+        heavy = limiter.acquire(5)
+        light = limiter.acquire(1)
+        heavy.cancel()
+        start = time.monotonic()
+        light.result(1)
+        # Only one token had to be waited for.
+        self.assertLess(time.monotonic() - start, 0.2)
+
+    def test_too_heavy(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(10, burst=2).acquire(3)
+
+    def test_decorator(self):
+        limiter = RateLimiter(100, burst=2)
+        calls = []
+
+        @limiter(weight=2)
+        @futurize
+        async def call(i):
+            calls.append(time.monotonic())
+            return i
+
+        self.assertEqual(gather(*(call(i) for i in range(3))).result(1), [0, 1, 2])
+        self.assertGreater(calls[-1] - calls[0], 0.03)
+
+    def test_threads_and_asyncio(self):
+        limiter = RateLimiter(200, burst=1)
+        results = []
+
+        def thread():
+            limiter.acquire().result(2)
+            results.append("thread")
+
+        async def coro():
+            await limiter.acquire()
+            results.append("asyncio")
+
+        threads = [threading.Thread(target=thread) for _ in range(5)]
+        for t in threads:
+            t.start()
+        async def main():
+            await asyncio.gather(*(coro() for _ in range(5)))
+
+        run_in_new_loop(main())
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(results), ["asyncio"] * 5 + ["thread"] * 5)
+
+
+class ConcurrencyLimiterTest(unittest.TestCase):
+
+    def test_acquire_release(self):
+        limiter = ConcurrencyLimiter(3)
+        self.assertTrue(limiter.acquire(2).done())
+        waiter = limiter.acquire(2)
+        self.assertFalse(waiter.done())
+        limiter.release(2)
+        self.assertTrue(waiter.result(0))
+
+    def test_release_too_many(self):
+        with self.assertRaises(ValueError):
+            ConcurrencyLimiter(1).release()
+
+    def test_fifo_weighted(self):
+        limiter = ConcurrencyLimiter(3)
+        limiter.acquire(3)
+        heavy = limiter.acquire(3)
+        light = limiter.acquire(1)
+        limiter.release(1)
+        # Enough for the light waiter, but it waits behind the heavy one.
+        self.assertFalse(light.done())
+        limiter.release(2)
+        self.assertTrue(heavy.done())
+        self.assertFalse(light.done())
+        limiter.release(3)
+        self.assertTrue(light.done())
+
+    def test_cancelled_head(self):
+        limiter = ConcurrencyLimiter(3)
+        limiter.acquire(2)
+        heavy = limiter.acquire(3)
+        light = limiter.acquire(1)
+        heavy.cancel()
+        self.assertTrue(light.done())
+
+    def test_decorator(self):
+        limiter = ConcurrencyLimiter(2)
+        running = [0]
+        peak = [0]
+
+        @limiter
+        @futurize
+        async def call(i):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await sleep(0.01)
+            running[0] -= 1
+            return i
+
+        self.assertEqual(gather(*(call(i) for i in range(6))).result(1), list(range(6)))
+        self.assertLessEqual(peak[0], 2)
+        self.assertEqual(limiter._value, 2)
+
+    def test_decorator_cancel(self):
+        limiter = ConcurrencyLimiter(1)
+
+        @limiter
+        def call():
+            return sleep(10)
+
+        first = call()
+        second = call()
+        second.cancel()
+        first.cancel()
+        self.assertEqual(limiter._value, 1)
+
+    def test_context_manager(self):
+        limiter = ConcurrencyLimiter(1)
+
+        async def work():
+            async with limiter:
+                self.assertEqual(limiter._value, 0)
+
+        run_coroutine(work()).result(1)
+        with limiter:
+            self.assertEqual(limiter._value, 0)
+        self.assertEqual(limiter._value, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
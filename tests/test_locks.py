@@ -0,0 +1,280 @@
+import asyncio
+import unittest
+import threading
+from concurrent.futures import CancelledError
+
+from yakusoku.operations import sleep, gather
+from yakusoku.coroutines import run_coroutine
+from yakusoku.locks import Lock, Event, Condition, Semaphore, BoundedSemaphore
+
+from helpers import run_in_new_loop
+
+
+class LockTest(unittest.TestCase):
+
+    def test_acquire_release(self):
+        lock = Lock()
+        self.assertTrue(lock.acquire().result())
+        self.assertTrue(lock.locked())
+        lock.release()
+        self.assertFalse(lock.locked())
+
+    def test_release_unlocked(self):
+        with self.assertRaises(RuntimeError):
+            Lock().release()
+
+    def test_fifo(self):
+        lock = Lock()
+        lock.acquire()
+        waiters = [lock.acquire() for _ in range(3)]
+        order = []
+        for i, w in enumerate(waiters):
+            w.add_done_callback(lambda _, i=i: order.append(i))
+
+        for _ in range(3):
+            lock.release()
+        self.assertEqual(order, [0, 1, 2])
+        self.assertTrue(lock.locked())
+
+    def test_cancelled_waiter_skipped(self):
+        lock = Lock()
+        lock.acquire()
+        w1, w2 = lock.acquire(), lock.acquire()
+        w1.cancel()
+        lock.release()
+        self.assertTrue(w2.done())
+        lock.release()
+        self.assertFalse(lock.locked())
+
+    def test_tasks(self):
+        lock = Lock()
+        inside = [0, 0]
+
+        async def _work():
+            async with lock:
+                inside[0] += 1
+                inside[1] = max(inside)
+                await sleep(0.001)
+                inside[0] -= 1
+
+        gather(*[_work() for _ in range(50)]).result(5)
+        self.assertEqual(inside[1], 1)
+        self.assertFalse(lock.locked())
+
+    def test_threads(self):
+        lock = Lock()
+        counter = [0]
+
+        def _work():
+            for _ in range(100):
+                with lock:
+                    value = counter[0]
+                    counter[0] = value + 1
+
+        threads = [threading.Thread(target=_work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(counter[0], 400)
+
+    def test_asyncio(self):
+        lock = Lock()
+
+        async def _main():
+            async with lock:
+                self.assertTrue(lock.locked())
+            waiter_task = None
+            async with lock:
+                waiter_task = asyncio.ensure_future(lock.__aenter__())
+                await asyncio.sleep(0.01)
+                self.assertFalse(waiter_task.done())
+            await waiter_task
+            lock.release()
+
+        run_in_new_loop(_main())
+        self.assertFalse(lock.locked())
+
+
+class SemaphoreTest(unittest.TestCase):
+
+    def test_counter(self):
+        sem = Semaphore(2)
+        sem.acquire()
+        sem.acquire()
+        self.assertTrue(sem.locked())
+        waiter = sem.acquire()
+        self.assertFalse(waiter.done())
+        sem.release()
+        self.assertTrue(waiter.result(0))
+
+    def test_negative(self):
+        with self.assertRaises(ValueError):
+            Semaphore(-1)
+
+    def test_bounded(self):
+        sem = BoundedSemaphore(1)
+        sem.acquire()
+        sem.release()
+        with self.assertRaises(ValueError):
+            sem.release()
+
+    def test_many_waiters(self):
+        sem = Semaphore(0)
+
+        async def _wait(i):
+            await sem.acquire()
+            return i
+
+        tasks = [run_coroutine(_wait(i)) for i in range(1000)]
+        for _ in range(1000):
+            sem.release()
+        self.assertEqual([t.result(1) for t in tasks], list(range(1000)))
+
+
+class EventTest(unittest.TestCase):
+
+    def test_set(self):
+        event = Event()
+        waiters = [event.wait() for _ in range(3)]
+        self.assertFalse(any(w.done() for w in waiters))
+        event.set()
+        self.assertTrue(all(w.result(0) for w in waiters))
+        self.assertTrue(event.wait().done())
+
+    def test_clear(self):
+        event = Event()
+        event.set()
+        event.clear()
+        self.assertFalse(event.is_set())
+        self.assertFalse(event.wait().done())
+
+    def test_task(self):
+        event = Event()
+
+        async def _wait():
+            return await event.wait()
+
+        task = run_coroutine(_wait())
+        threading.Timer(0.01, event.set).start()
+        self.assertTrue(task.result(1))
+
+
+class ConditionTest(unittest.TestCase):
+
+    def test_notify(self):
+        cond = Condition()
+        items = []
+
+        async def _consumer():
+            async with cond:
+                await cond.wait_for(lambda: items)
+                return items.pop()
+
+        async def _producer():
+            async with cond:
+                items.append(1)
+                cond.notify()
+
+        consumer = run_coroutine(_consumer())
+        run_coroutine(_producer()).result(1)
+        self.assertEqual(consumer.result(1), 1)
+        self.assertFalse(cond.locked())
+
+    def test_notify_all(self):
+        cond = Condition()
+        woken = []
+
+        async def _wait(i):
+            async with cond:
+                await cond.wait()
+                woken.append(i)
+
+        tasks = [run_coroutine(_wait(i)) for i in range(5)]
+        with cond:
+            cond.notify_all()
+        for t in tasks:
+            t.result(1)
+        self.assertEqual(woken, list(range(5)))
+
+    def test_unlocked(self):
+        cond = Condition()
+        with self.assertRaises(RuntimeError):
+            cond.wait()
+        with self.assertRaises(RuntimeError):
+            cond.notify()
+
+    def test_cancel_while_waiting(self):
+        cond = Condition()
+
+        async def _wait():
+            async with cond:
+                await cond.wait()
+
+        task = run_coroutine(_wait())
+        task.cancel()
+        with self.assertRaises(CancelledError):
+            task.result()
+
+        # The lock has been released by the cancelled task.
+        self.assertTrue(cond.acquire().done())
+        cond.release()
+        self.assertFalse(cond.locked())
+
+    def test_cancel_reacquires(self):
+        cond = Condition()
+        cond.acquire()
+        fut = cond.wait()
+        # Someone else takes the lock while we wait.
+        self.assertTrue(cond.acquire().done())
+
+        self.assertTrue(fut.cancel())
+        self.assertFalse(fut.done())
+        cond.release()
+
+        # The lock went to the cancelled wait, which now owns it.
+        self.assertTrue(fut.cancelled())
+        self.assertTrue(cond.locked())
+        cond.release()
+        self.assertFalse(cond.locked())
+
+    def test_cancel_task_while_locked(self):
+        cond = Condition()
+        started = threading.Event()
+
+        async def _wait():
+            async with cond:
+                started.set()
+                await cond.wait()
+
+        task = run_coroutine(_wait())
+        self.assertTrue(started.wait(1))
+        self.assertTrue(cond.acquire().done())
+        task.cancel()
+
+        # The task cannot leave its block before we release the lock.
+        self.assertTrue(cond.locked())
+        cond.release()
+        self.assertFalse(cond.locked())
+
+    def test_cancel_asyncio_while_locked(self):
+        cond = Condition()
+
+        async def _wait():
+            async with cond:
+                await cond.wait()
+
+        async def _main():
+            task = asyncio.ensure_future(_wait())
+            await asyncio.sleep(0.01)
+            await cond.acquire()
+            task.cancel()
+            await asyncio.sleep(0.01)
+            waiting = not task.done()
+            cond.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return waiting
+
+        self.assertTrue(run_in_new_loop(_main()))
+        self.assertFalse(cond.locked())
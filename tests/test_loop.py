@@ -0,0 +1,164 @@
+import asyncio
+import unittest
+import threading
+from asyncio import new_event_loop
+
+from yakusoku.context import ContextVar
+from yakusoku.loop import LoopBridge, get_loop_bridge
+from yakusoku.loop import get_background_loop, run_in_background
+from yakusoku.operations import futurize, sleep
+
+
+class LoopBridgeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = new_event_loop()
+        self.wakeups = 0
+
+        call_soon_threadsafe = self.loop.call_soon_threadsafe
+
+        def _counting(*args, **kwargs):
+            self.wakeups += 1
+            return call_soon_threadsafe(*args, **kwargs)
+        self.loop.call_soon_threadsafe = _counting
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_shared(self):
+        self.assertIs(get_loop_bridge(self.loop), get_loop_bridge(self.loop))
+
+    def test_coalesced(self):
+        bridge = LoopBridge(self.loop)
+        results = []
+
+        def _produce():
+            for i in range(1000):
+                bridge.call_soon_threadsafe(results.append, i)
+            bridge.call_soon_threadsafe(self.loop.stop)
+
+        t = threading.Thread(target=_produce)
+        t.start()
+        t.join()
+        self.loop.run_forever()
+
+        self.assertEqual(results, list(range(1000)))
+        self.assertEqual(self.wakeups, 1)
+
+    def test_batches(self):
+        bridge = LoopBridge(self.loop, batch_size=10)
+        results = []
+
+        for i in range(25):
+            bridge.call_soon_threadsafe(results.append, i)
+        bridge.call_soon_threadsafe(self.loop.stop)
+        self.loop.run_forever()
+
+        self.assertEqual(results, list(range(25)))
+
+    def test_exception_does_not_stop_batch(self):
+        bridge = LoopBridge(self.loop)
+        errors = []
+        results = []
+        self.loop.set_exception_handler(lambda loop, ctx: errors.append(ctx['exception']))
+
+        def _raise():
+            raise ValueError()
+
+        bridge.call_soon_threadsafe(_raise)
+        bridge.call_soon_threadsafe(results.append, 1)
+        bridge.call_soon_threadsafe(self.loop.stop)
+        self.loop.run_forever()
+
+        self.assertEqual(results, [1])
+        self.assertIsInstance(errors[0], ValueError)
+
+    @unittest.skipIf(ContextVar is None, "contextvars is not available")
+    def test_context(self):
+        bridge = LoopBridge(self.loop)
+        var = ContextVar('var', default=None)
+        results = []
+
+        def _produce(value):
+            var.set(value)
+            bridge.call_soon_threadsafe(lambda: results.append(var.get()))
+
+        for i in range(3):
+            t = threading.Thread(target=_produce, args=(i,))
+            t.start()
+            t.join()
+        bridge.call_soon_threadsafe(self.loop.stop)
+        self.loop.run_forever()
+
+        self.assertEqual(results, [0, 1, 2])
+        self.assertIsNone(var.get())
+
+    def test_closed(self):
+        bridge = LoopBridge(self.loop)
+        self.loop.close()
+        with self.assertRaises(RuntimeError):
+            bridge.call_soon_threadsafe(print)
+
+
+class BackgroundLoopTest(unittest.TestCase):
+
+    def test_shared(self):
+        self.assertIs(get_background_loop(), get_background_loop())
+
+    def test_run(self):
+        async def _func():
+            await asyncio.sleep(0.01)
+            return threading.current_thread().name
+
+        self.assertEqual(run_in_background(_func()).result(1), "yakusoku-loop")
+
+    def test_exception(self):
+        async def _func():
+            raise ValueError()
+
+        self.assertIsInstance(run_in_background(_func()).exception(1), ValueError)
+
+    def test_from_task(self):
+        @futurize
+        async def _func():
+            return await run_in_background(asyncio.sleep(0.01, 5))
+
+        self.assertEqual(_func().result(1), 5)
+
+    def test_futurize_on_background_loop(self):
+        # The alternative the docstring of run_in_background recommends.
+        @futurize(loop=get_background_loop())
+        async def _func():
+            await asyncio.sleep(0)
+            await sleep(0.01)
+            return threading.current_thread().name
+
+        self.assertEqual(_func().result(1), "yakusoku-loop")
+
+    def test_from_task_awaiting_future(self):
+        async def _aio():
+            await asyncio.sleep(0)
+            return await sleep(0.01, 5)
+
+        @futurize
+        async def _func():
+            return await run_in_background(_aio())
+
+        self.assertEqual(_func().result(1), 5)
+
+    def test_cancel(self):
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        async def _func():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        fut = run_in_background(_func())
+        self.assertTrue(started.wait(1))
+        fut.cancel()
+        self.assertTrue(cancelled.wait(1))
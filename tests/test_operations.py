@@ -1,6 +1,9 @@
 import time
+import operator
 import unittest
-from concurrent.futures import Future, TimeoutError, CancelledError
+import tracemalloc
+from threading import current_thread
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError, CancelledError
 from concurrent.futures import FIRST_COMPLETED, FIRST_EXCEPTION
 
 from yakusoku import operations
@@ -36,7 +39,7 @@ class FutureCreatorTest(unittest.TestCase):
         fut, t = operations.sleep(2, obj, also_return_timer=True)
         time.sleep(1)
         fut.cancel()
-        self.assertTrue(t.finished.is_set())
+        self.assertTrue(t.cancelled())
 
     def test_sleep_0(self):
         fut, t = operations.sleep(0, obj, also_return_timer=True)
@@ -66,6 +69,25 @@ class DecoratorTest(unittest.TestCase):
         self.assertIsInstance(fut, Future)
         self.assertIs(exc, fut.exception())
 
+    def test_futurize_spawn(self):
+        @operations.futurize
+        async def _func():
+            return current_thread()
+        self.assertIsNot(_func().result(), current_thread())
+
+    def test_futurize_executor(self):
+        pool = ThreadPoolExecutor(1, thread_name_prefix="futurize-pool")
+
+        @operations.futurize(executor=pool)
+        async def _func():
+            await operations.sleep(0.1)
+            return current_thread().name
+
+        try:
+            self.assertTrue(_func().result().startswith("futurize-pool"))
+        finally:
+            pool.shutdown()
+
     def test_synchronize(self):
         @operations.synchronize
         async def _func(a, *, c):
@@ -271,6 +293,23 @@ class WaitTest(unittest.TestCase):
 
         self.assertTrue(any(isinstance(d.exception(), CancelledError) for d in done))
 
+    def test_wait_empty(self):
+        done, not_done = operations.wait([]).result(1)
+        self.assertEqual(len(done), 0)
+        self.assertEqual(len(not_done), 0)
+
+    def test_wait_many(self):
+        futs = [Future() for _ in range(10000)]
+        w = operations.wait(futs, return_when=FIRST_EXCEPTION)
+        for f in futs[:5000]:
+            f.set_result(obj)
+        futs[5000].set_exception(exc)
+
+        done, not_done = w.result(1)
+        self.assertEqual(len(done), 5001)
+        self.assertEqual(len(not_done), 4999)
+        self.assertIs(not_done[0], futs[5001])
+
     def test_wait_timeout_completed(self):
         s1 = operations.sleep(0.25, obj)
         s2 = operations.sleep(0.5, obj2)
@@ -302,6 +341,16 @@ class GatherTest(unittest.TestCase):
         self.assertIs(r2, obj2)
         self.assertIs(r3, obj3)
 
+    def test_gather_empty(self):
+        self.assertEqual(operations.gather().result(1), [])
+
+    def test_gather_many(self):
+        futs = [Future() for _ in range(10000)]
+        g = operations.gather(*futs)
+        for i, f in reversed(list(enumerate(futs))):
+            f.set_result(i)
+        self.assertEqual(g.result(1), list(range(10000)))
+
     def test_gather_error(self):
         s1 = operations.sleep(0.25, obj)
         @operations.futurize
@@ -430,4 +479,169 @@ class GatherTest(unittest.TestCase):
         r1, r2, r3 = g.result()
         self.assertIs(r1, obj)
         self.assertIsInstance(r2, CancelledError)
-        self.assertIs(r3, obj3)
\ No newline at end of file
+        self.assertIs(r3, obj3)
+
+
+class ReduceTest(unittest.TestCase):
+
+    def _peak(self, func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_gather_reduce_order(self):
+        s1 = operations.sleep(0.06, 1)
+        s2 = operations.sleep(0.02, 2)
+        s3 = operations.resolve(3)
+
+        g = operations.gather_reduce(lambda acc, x: acc + [x], [], s1, s2, s3)
+        self.assertEqual(g.result(), [1, 2, 3])
+
+    def test_gather_reduce_empty(self):
+        self.assertIs(operations.gather_reduce(operator.add, obj).result(), obj)
+
+    def test_gather_reduce_error(self):
+        s1 = operations.sleep(0.05, 1)
+        g = operations.gather_reduce(operator.add, 0, s1, operations.reject(exc))
+        self.assertIs(g.exception(), exc)
+
+    def test_gather_reduce_reducer_error(self):
+        def _fail(acc, x):
+            raise exc
+
+        g = operations.gather_reduce(_fail, 0, operations.resolve(1))
+        self.assertIs(g.exception(), exc)
+
+    def test_gather_reduce_cancel(self):
+        s1 = operations.sleep(10, 1)
+        g = operations.gather_reduce(operator.add, 0, operations.resolve(1), s1)
+        g.cancel()
+        self.assertTrue(s1.cancelled())
+
+    def test_gather_reduce_releases_results(self):
+        def _run(n):
+            futs = [Future() for _ in range(n)]
+            g = operations.gather_reduce(lambda acc, x: acc + len(x), 0, *futs)
+            for i, f in enumerate(futs):
+                f.set_result(bytes(100000))
+                futs[i] = None
+            self.assertEqual(g.result(), n * 100000)
+
+        # Folded results are released right away, so they do not add up.
+        self.assertLess(self._peak(lambda: _run(200)), 200 * 100000 // 4)
+
+    def test_reduce_completed(self):
+        async def _value(x):
+            await operations.sleep(0.001 * (x % 3))
+            return x
+
+        r = operations.reduce_completed(operator.add, 0, (_value(i) for i in range(100)), concurrency=8)
+        self.assertEqual(r.result(1), sum(range(100)))
+
+    def test_reduce_completed_error(self):
+        pending = Future()
+        r = operations.reduce_completed(operator.add, 0, [operations.reject(exc), pending])
+        self.assertIs(r.exception(1), exc)
+        self.assertTrue(pending.cancelled())
+
+    def test_reduce_completed_memory(self):
+        async def _value(x):
+            return x
+
+        def _run(n):
+            r = operations.reduce_completed(operator.add, 0, (_value(i) for i in range(n)), concurrency=16)
+            self.assertEqual(r.result(5), sum(range(n)))
+
+        small = self._peak(lambda: _run(1000))
+        large = self._peak(lambda: _run(20000))
+        self.assertLess(large, small * 2)
+
+
+class RaceTest(unittest.TestCase):
+
+    def test_race_first_success(self):
+        slow = Future()
+        fast = operations.sleep(0.01, obj)
+        r = operations.race(slow, fast)
+        self.assertIs(r.result(1), obj)
+        self.assertTrue(slow.cancelled())
+
+    def test_race_skips_failures(self):
+        slow = operations.sleep(0.02, obj)
+        r = operations.race(operations.reject(exc), slow)
+        self.assertIs(r.result(1), obj)
+
+    def test_race_all_fail(self):
+        exc2 = Exception()
+        r = operations.race(operations.reject(exc), operations.reject(exc2))
+        self.assertIs(r.exception(1), exc)
+
+    def test_race_cancel(self):
+        f1, f2 = Future(), Future()
+        r = operations.race(f1, f2)
+        r.cancel()
+        self.assertTrue(f1.cancelled())
+        self.assertTrue(f2.cancelled())
+
+    def test_race_empty(self):
+        with self.assertRaises(ValueError):
+            operations.race()
+
+
+class HedgeTest(unittest.TestCase):
+
+    def test_hedge_fast(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return operations.resolve(obj)
+
+        self.assertIs(operations.hedge(factory, 0.05).result(1), obj)
+        time.sleep(0.1)
+        self.assertEqual(len(calls), 1)
+
+    def test_hedge_duplicate(self):
+        attempts = []
+
+        def factory():
+            # The first attempt hangs, the second one answers.
+            fut = Future() if not attempts else operations.sleep(0.01, len(attempts))
+            attempts.append(fut)
+            return fut
+
+        start = time.monotonic()
+        self.assertEqual(operations.hedge(factory, 0.02, max_attempts=3).result(1), 1)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(attempts), 2)
+        self.assertTrue(attempts[0].cancelled())
+
+    def test_hedge_failure_starts_next(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            return operations.reject(exc) if len(attempts) == 1 else operations.resolve(obj)
+
+        self.assertIs(operations.hedge(factory, 10).result(1), obj)
+        self.assertEqual(len(attempts), 2)
+
+    def test_hedge_all_fail(self):
+        attempts = []
+
+        def factory():
+            attempts.append(Exception())
+            return operations.reject(attempts[-1])
+
+        h = operations.hedge(factory, 10, max_attempts=3)
+        self.assertIs(h.exception(1), attempts[0])
+        self.assertEqual(len(attempts), 3)
+
+    def test_hedge_cancel(self):
+        pending = Future()
+        h = operations.hedge(lambda: pending, 0.01, max_attempts=1)
+        h.cancel()
+        self.assertTrue(pending.cancelled())
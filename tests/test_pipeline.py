@@ -0,0 +1,123 @@
+import unittest
+import threading
+from concurrent.futures import CancelledError, Future
+
+from yakusoku.operations import sleep, futurize
+from yakusoku.pipeline import Pipeline
+
+from helpers import run_in_new_loop
+
+
+async def double(x):
+    return x * 2
+
+
+async def increment(x):
+    await sleep(0.001)
+    return x + 1
+
+
+class PipelineTest(unittest.TestCase):
+
+    def test_stages(self):
+        run = Pipeline().stage(double, concurrency=2).stage(increment, concurrency=4).run(range(50))
+        self.assertEqual(sorted(run), [x * 2 + 1 for x in range(50)])
+        self.assertIsNone(run.done.result(1))
+
+    def test_futurized_stage(self):
+        @futurize
+        async def _square(x):
+            return x * x
+
+        run = Pipeline().stage(_square, concurrency=3).run(range(10))
+        self.assertEqual(sorted(run), [x * x for x in range(10)])
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        async def _work(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            await sleep(0.002)
+            with lock:
+                running[0] -= 1
+            return x
+
+        run = Pipeline().stage(_work, concurrency=3).run(range(30))
+        self.assertEqual(len(list(run)), 30)
+        self.assertLessEqual(running[1], 3)
+
+    def test_backpressure(self):
+        pulled = []
+
+        def _source():
+            for i in range(1000):
+                pulled.append(i)
+                yield i
+
+        run = Pipeline(buffer=4).stage(double, concurrency=2).run(_source())
+        # Nobody consumes the output, so the buffers fill up and the source stops.
+        sleep(0.05).result()
+        self.assertLess(len(pulled), 20)
+        run.cancel()
+
+    def test_error(self):
+        async def _fail(x):
+            if x == 5:
+                raise ValueError()
+            return x
+
+        run = Pipeline().stage(_fail, concurrency=2).run(range(100))
+        with self.assertRaises(ValueError):
+            list(run)
+        self.assertIsInstance(run.done.exception(1), ValueError)
+        self.assertEqual(run.stats()[0].failed, 1)
+
+    def test_cancel(self):
+        async def _slow(x):
+            await sleep(10)
+            return x
+
+        run = Pipeline().stage(_slow, concurrency=2).run(range(10))
+        run.cancel()
+        with self.assertRaises(CancelledError):
+            list(run)
+
+    def test_stats(self):
+        run = Pipeline().stage(double, name="double").stage(increment, concurrency=2).run(range(20))
+        list(run)
+        first, second = run.stats()
+        self.assertEqual(first.name, "double")
+        self.assertEqual(second.name, "increment")
+        self.assertEqual(first.processed, 20)
+        self.assertEqual(second.processed, 20)
+        self.assertEqual(second.in_flight, 0)
+        self.assertEqual(second.queue_depth, 0)
+        self.assertGreater(second.throughput, 0)
+
+    def test_async_for(self):
+        async def _consume():
+            return [x async for x in Pipeline().stage(double, concurrency=2).run(range(10))]
+
+        self.assertEqual(sorted(run_in_new_loop(_consume())), [x * 2 for x in range(10)])
+
+    def test_cancel_next(self):
+        gate = Future()
+
+        async def _gated(x):
+            await gate
+            return x
+
+        run = Pipeline().stage(_gated).run([1])
+        getter = run.__anext__()
+        self.assertTrue(getter.cancel())
+        gate.set_result(None)
+
+        # The item is not lost to the cancelled getter.
+        self.assertEqual(list(run), [1])
+
+    def test_no_stage(self):
+        with self.assertRaises(ValueError):
+            Pipeline().run([])
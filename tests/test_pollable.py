@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+import selectors
+import threading
+from concurrent.futures import Future, CancelledError
+
+from yakusoku.pollable import PollableFuture, pollable
+from yakusoku.coroutines import run_coroutine
+
+from helpers import run_in_new_loop
+
+
+class PollableFutureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.selector = selectors.DefaultSelector()
+
+    def tearDown(self):
+        self.selector.close()
+
+    def test_select(self):
+        futs = [PollableFuture() for _ in range(3)]
+        for fut in futs:
+            self.selector.register(fut, selectors.EVENT_READ)
+
+        self.assertEqual(self.selector.select(0), [])
+        threading.Thread(target=futs[1].set_result, args=(1,)).start()
+
+        ready = self.selector.select(1)
+        self.assertEqual([key.fileobj for key, _ in ready], [futs[1]])
+        for fut in futs:
+            fut.close()
+
+    def test_done_before_fileno(self):
+        fut = PollableFuture()
+        fut.cancel()
+        self.selector.register(fut, selectors.EVENT_READ)
+        self.assertEqual(len(self.selector.select(0)), 1)
+        fut.close()
+
+    def test_asyncio_await(self):
+        fut = PollableFuture()
+
+        async def _main():
+            threading.Timer(0.01, fut.set_result, (5,)).start()
+            return await asyncio.gather(fut, fut)
+
+        self.assertEqual(run_in_new_loop(_main()), [5, 5])
+
+    def test_asyncio_exception(self):
+        fut = PollableFuture()
+
+        async def _main():
+            threading.Timer(0.01, fut.set_exception, (ValueError(),)).start()
+            await fut
+
+        with self.assertRaises(ValueError):
+            run_in_new_loop(_main())
+
+    def test_asyncio_cancel_waiter(self):
+        fut = PollableFuture()
+
+        async def _wait():
+            await fut
+
+        async def _main():
+            task = asyncio.ensure_future(_wait())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0)
+
+        run_in_new_loop(_main())
+        self.assertTrue(fut.cancelled())
+
+    def test_task_await(self):
+        fut = PollableFuture()
+
+        async def _func():
+            return await fut
+
+        task = run_coroutine(_func())
+        fut.set_result(3)
+        self.assertEqual(task.result(1), 3)
+
+    def test_pollable(self):
+        source = Future()
+        fut = pollable(source)
+        self.assertIs(pollable(fut), fut)
+
+        source.cancel()
+        self.assertTrue(fut.cancelled())
+        with self.assertRaises(CancelledError):
+            fut.result()
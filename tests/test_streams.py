@@ -0,0 +1,181 @@
+import unittest
+import itertools
+import threading
+from concurrent.futures import Future, CancelledError
+
+from yakusoku.operations import sleep, resolve, reject
+from yakusoku.coroutines import run_coroutine
+from yakusoku.streams import as_completed, map_concurrent
+
+from helpers import run_in_new_loop
+
+
+class AsCompletedTest(unittest.TestCase):
+
+    def test_completion_order(self):
+        futs = [sleep(0.06, 1), sleep(0.02, 2), sleep(0.04, 3)]
+        self.assertEqual([f.result() for f in as_completed(futs)], [2, 3, 1])
+
+    def test_empty(self):
+        self.assertEqual(list(as_completed([])), [])
+
+    def test_exception(self):
+        exc = ValueError()
+        futs = list(as_completed([reject(exc), resolve(1)]))
+        self.assertEqual(len(futs), 2)
+        self.assertIs(futs[0].exception(), exc)
+
+    def test_ordered(self):
+        futs = [sleep(0.06, 1), sleep(0.02, 2), sleep(0.04, 3)]
+        self.assertEqual([f.result() for f in as_completed(futs, ordered=True)], [1, 2, 3])
+
+    def test_window_is_lazy(self):
+        started = []
+
+        def _inputs():
+            for i in range(10):
+                started.append(i)
+                yield sleep(0.001, i)
+
+        stream = as_completed(_inputs(), ordered=True, window=3)
+        self.assertEqual(len(started), 3)
+        self.assertEqual(next(stream).result(), 0)
+        self.assertLessEqual(len(started), 4)
+        self.assertEqual([f.result() for f in stream], list(range(1, 10)))
+
+    def test_failing_iterable(self):
+        def _inputs():
+            yield resolve(1)
+            raise ValueError()
+
+        futs = list(as_completed(_inputs(), window=2))
+        self.assertEqual(futs[0].result(), 1)
+        self.assertIsInstance(futs[1].exception(), ValueError)
+
+    def test_close(self):
+        pending = Future()
+        with as_completed([resolve(1), pending]) as stream:
+            self.assertEqual(next(stream).result(), 1)
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(list(stream), [])
+
+    def test_async_with(self):
+        pending = Future()
+
+        async def _func():
+            async with as_completed([resolve(1), pending]) as stream:
+                return (await stream.__anext__()).result()
+
+        self.assertEqual(run_coroutine(_func()).result(1), 1)
+        self.assertTrue(pending.cancelled())
+
+    def test_window_required(self):
+        with self.assertRaises(ValueError):
+            as_completed(iter([resolve(1)]))
+
+    def test_async_for(self):
+        async def _func():
+            results = []
+            async for fut in as_completed([sleep(0.04, 1), sleep(0.02, 2)]):
+                results.append(fut.result())
+            return results
+
+        self.assertEqual(run_coroutine(_func()).result(1), [2, 1])
+
+    def test_asyncio_async_for(self):
+        async def _func():
+            return [fut.result() async for fut in as_completed([sleep(0.04, 1), sleep(0.02, 2)])]
+
+        self.assertEqual(run_in_new_loop(_func()), [2, 1])
+
+    def test_cancelled_getter(self):
+        pending = Future()
+        stream = as_completed([pending, resolve(2)], ordered=True)
+        getter = stream.__anext__()
+        getter.cancel()
+        pending.set_result(1)
+        self.assertEqual([f.result() for f in stream], [1, 2])
+        with self.assertRaises(CancelledError):
+            getter.result()
+
+
+class MapTest(unittest.TestCase):
+
+    def test_ordered(self):
+        async def _double(x):
+            await sleep(0.001 * (x % 3))
+            return x * 2
+
+        results = list(map_concurrent(_double, range(20), concurrency=4, ordered=True))
+        self.assertEqual(results, [x * 2 for x in range(20)])
+
+    def test_unordered(self):
+        async def _double(x):
+            return x * 2
+
+        results = list(map_concurrent(_double, range(20), concurrency=4))
+        self.assertEqual(sorted(results), [x * 2 for x in range(20)])
+
+    def test_concurrency(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        async def _work(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            await sleep(0.002)
+            with lock:
+                running[0] -= 1
+            return x
+
+        self.assertEqual(len(list(map_concurrent(_work, range(30), concurrency=5))), 30)
+        self.assertLessEqual(running[1], 5)
+
+    def test_infinite(self):
+        async def _identity(x):
+            return x
+
+        stream = map_concurrent(_identity, itertools.count(), concurrency=8, ordered=True)
+        self.assertEqual([next(stream) for _ in range(100)], list(range(100)))
+        stream.close()
+
+    def test_concurrency_required(self):
+        async def _identity(x):
+            return x
+
+        with self.assertRaises(ValueError):
+            map_concurrent(_identity, itertools.count())
+        self.assertEqual(sorted(map_concurrent(_identity, range(5))), list(range(5)))
+
+    def test_exception(self):
+        async def _fail(x):
+            if x == 1:
+                raise ValueError()
+            return x
+
+        stream = map_concurrent(_fail, range(3), concurrency=1, ordered=True)
+        self.assertEqual(next(stream), 0)
+        with self.assertRaises(ValueError):
+            next(stream)
+        self.assertEqual(next(stream), 2)
+
+    def test_close_cancels(self):
+        pending = [Future() for _ in range(3)]
+        stream = map_concurrent(lambda f: f, pending, concurrency=2)
+        stream.close()
+        self.assertTrue(pending[0].cancelled())
+        self.assertTrue(pending[1].cancelled())
+        self.assertFalse(pending[2].cancelled())
+
+    def test_async_for(self):
+        async def _double(x):
+            return x * 2
+
+        async def _func():
+            results = []
+            async for result in map_concurrent(_double, range(5), concurrency=2, ordered=True):
+                results.append(result)
+            return results
+
+        self.assertEqual(run_coroutine(_func()).result(1), [0, 2, 4, 6, 8])
@@ -0,0 +1,55 @@
+import time
+import unittest
+from threading import Event
+
+from yakusoku.timer import TimerService, get_timer_service
+
+
+class TimerServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = TimerService()
+
+    def test_fires_in_order(self):
+        fired = []
+        done = Event()
+
+        self.service.call_later(0.3, lambda: (fired.append(3), done.set()))
+        self.service.call_later(0.1, fired.append, 1)
+        self.service.call_later(0.2, fired.append, 2)
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired, [1, 2, 3])
+
+    def test_delay(self):
+        done = Event()
+        start = time.monotonic()
+        self.service.call_later(0.25, done.set)
+        self.assertTrue(done.wait(2))
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_cancel(self):
+        fired = []
+        handle = self.service.call_later(0.1, fired.append, 1)
+        handle.cancel()
+        self.assertTrue(handle.cancelled())
+        time.sleep(0.25)
+        self.assertEqual(fired, [])
+        self.assertEqual(len(self.service), 0)
+
+    def test_cancel_after_fire(self):
+        done = Event()
+        handle = self.service.call_later(0, done.set)
+        self.assertTrue(done.wait(2))
+        handle.cancel()
+        self.assertFalse(handle.cancelled())
+
+    def test_compaction(self):
+        handles = [self.service.call_later(60, lambda: None) for _ in range(1000)]
+        for handle in handles:
+            handle.cancel()
+        self.assertEqual(len(self.service), 0)
+        self.assertLess(len(self.service._heap), 1000)
+
+    def test_shared(self):
+        self.assertIs(get_timer_service(), get_timer_service())
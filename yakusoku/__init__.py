@@ -21,12 +21,33 @@ from yakusoku.operations import resolve, reject, sleep
 from yakusoku.operations import futurize, synchronize
 from yakusoku.operations import wait_for, shield
 from yakusoku.operations import wait, gather
+from yakusoku.operations import gather_reduce, reduce_completed
+from yakusoku.operations import race, hedge
 from yakusoku.coroutines import run_coroutine
+from yakusoku.loop import run_in_background
+from yakusoku.streams import as_completed, map_concurrent
+from yakusoku.locks import Lock, Event, Condition, Semaphore, BoundedSemaphore
+from yakusoku.channel import Channel, ChannelClosed
+from yakusoku.pipeline import Pipeline
+from yakusoku.cache import cached
+from yakusoku.backends import SqliteBackend, DirectoryBackend
+from yakusoku.batching import batched
+from yakusoku.limiters import RateLimiter, ConcurrencyLimiter
 
 
 __all__ = [
     "resolve", "reject", "sleep",
     "futurize", "synchronize",
     "wait_for", "shield",
-    "run_coroutine"
+    "wait", "gather",
+    "run_coroutine", "run_in_background",
+    "as_completed", "map_concurrent",
+    "gather_reduce", "reduce_completed",
+    "race", "hedge",
+    "Lock", "Event", "Condition", "Semaphore", "BoundedSemaphore",
+    "Channel", "ChannelClosed",
+    "Pipeline",
+    "cached", "SqliteBackend", "DirectoryBackend",
+    "batched",
+    "RateLimiter", "ConcurrencyLimiter"
 ]
@@ -0,0 +1,226 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import sqlite3
+import tempfile
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import List, Optional, Tuple
+
+__all__ = [
+    "CacheBackend", "SqliteBackend", "DirectoryBackend"
+]
+
+
+class CacheBackend(ABC):
+    """
+    Stores pickled results of :func:`yakusoku.cached` functions beyond the lifetime of the process.
+
+    Keys are hex digests, values are bytes. The methods block and are
+    only called on the threads of the yakusoku executor, never on the
+    thread of a caller.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[bytes]:
+        """
+        :param key: The digest of the function and its arguments.
+        :return: The stored value, or None if there is none.
+        """
+
+    @abstractmethod
+    def store(self, key: str, value: bytes) -> None:
+        """
+        :param key:   The digest of the function and its arguments.
+        :param value: The value to store.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Removes all stored values.
+        """
+
+
+class SqliteBackend(CacheBackend):
+    """
+    Stores results in a table of a sqlite database.
+    """
+
+    def __init__(self, path: str, table: str = "yakusoku_cache"):
+        """
+        :param path:  The path of the database file. It is created if needed.
+        :param table: The name of the table to use. It has to be a valid identifier.
+        :raises ValueError: If the table name is not a valid identifier.
+        """
+        # The name is formatted into the statements, as tables cannot be parameters.
+        if not table.isidentifier():
+            raise ValueError("table must be a valid identifier, not %r" % (table,))
+
+        self.path = path
+        self.table = table
+        self._lock = Lock()
+        # Executor threads take turns on the connection.
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS "%s" (key TEXT PRIMARY KEY, value BLOB NOT NULL)' % table
+        )
+
+    def __repr__(self):
+        return '<%s %r>' % (type(self).__name__, self.path)
+
+    def load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection.execute('SELECT value FROM "%s" WHERE key = ?' % self.table, (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def store(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO "%s" (key, value) VALUES (?, ?)' % self.table, (key, sqlite3.Binary(value))
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM "%s"' % self.table)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class DirectoryBackend(CacheBackend):
+    """
+    Stores every result in its own file inside a directory.
+
+    If a maximal size is given, the least recently used files are removed
+    whenever the files together grow larger than that, until they take up
+    at most `LOW_WATER` of it. The size is tracked as files are stored, so
+    the directory is only scanned when files have to be removed. Files
+    written by other processes are only noticed by that scan.
+    """
+
+    SUFFIX = ".cache"
+    # Evicting below the maximal size leaves room for the next files.
+    LOW_WATER = 0.9
+
+    def __init__(self, path: str, max_size: Optional[int] = None):
+        """
+        :param path:     The directory to use. It is created if needed.
+        :param max_size: The maximal number of bytes of all files together. None does not limit them.
+        """
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = Lock()
+        # The size of all files together. None until the directory has been scanned.
+        self._size: Optional[int] = None
+
+    def __repr__(self):
+        return '<%s %r max_size=%r>' % (type(self).__name__, self.path, self.max_size)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key + self.SUFFIX)
+
+    def load(self, key: str) -> Optional[bytes]:
+        path = self._file(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read()
+        except FileNotFoundError:
+            return None
+
+        if self.max_size is not None:
+            # The modification time orders the files for eviction.
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+        return value
+
+    def store(self, key: str, value: bytes) -> None:
+        path = self._file(key)
+        replaced = 0
+        if self.max_size is not None:
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                pass
+
+        # Write to a temporary file first, so readers never see half a file.
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        if self.max_size is None:
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(value) - replaced
+
+            if self._size > self.max_size:
+                self._evict()
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        files = []
+        total = 0
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return files, total
+
+    def _evict(self) -> None:
+        # Called with the lock held.
+        files, total = self._scan()
+        limit = self.max_size * self.LOW_WATER
+
+        files.sort()
+        for _, size, path in files:
+            if total <= limit:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+        with self._lock:
+            self._size = None
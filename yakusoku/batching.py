@@ -0,0 +1,153 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+from threading import Lock
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from yakusoku.executor import submit
+from yakusoku.future import SlimFuture, wrap_future
+from yakusoku.timer import TimerHandle, call_later
+from yakusoku.typings import AbstractFuture, FutureOrCoroutine, T
+
+__all__ = [
+    "batched"
+]
+
+
+def _fan_out(batch: List[Tuple[Any, AbstractFuture[Any]]], fut: AbstractFuture[Sequence[Any]]) -> None:
+    if fut.cancelled():
+        for _, caller in batch:
+            caller.cancel()
+        return
+
+    exc = fut.exception()
+    results = None
+    if exc is None:
+        results = list(fut.result())
+        if len(results) != len(batch):
+            exc = ValueError("The batch function returned %d results for %d keys." % (len(results), len(batch)))
+
+    for index, (_, caller) in enumerate(batch):
+        if exc is not None:
+            caller.set_exception(exc)
+        elif isinstance(results[index], BaseException):
+            caller.set_exception(results[index])
+        else:
+            caller.set_result(results[index])
+
+
+class _Batcher(object):
+
+    def __init__(self, func: Callable[[List[Any]], FutureOrCoroutine[Sequence[Any]]], max_batch: int, max_delay: float):
+        self.func = func
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._lock = Lock()
+        self._pending: List[Tuple[Any, AbstractFuture[Any]]] = []
+        self._timer: Optional[TimerHandle] = None
+        functools.update_wrapper(self, func)
+
+    def __call__(self, key: Any) -> AbstractFuture[Any]:
+        fut: AbstractFuture[Any] = SlimFuture()
+        with self._lock:
+            self._pending.append((key, fut))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            else:
+                if self._timer is None:
+                    self._timer = call_later(self.max_delay, self._expire)
+                return fut
+
+        self._dispatch(batch)
+        return fut
+
+    def flush(self) -> None:
+        """
+        Dispatches the calls collected so far without waiting for the window to close.
+        """
+        with self._lock:
+            batch = self._take()
+        self._dispatch(batch)
+
+    def _take(self) -> List[Tuple[Any, AbstractFuture[Any]]]:
+        # Must be called with the lock held.
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _expire(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            # Do not run the batch function on the timer thread.
+            submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[Any, AbstractFuture[Any]]]) -> None:
+        # Callers that have cancelled are left out, the others cannot cancel anymore.
+        batch = [(key, fut) for key, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            result = wrap_future(self.func([key for key, _ in batch]))
+        except Exception as e:
+            result = SlimFuture()
+            result.set_exception(e)
+        result.add_done_callback(functools.partial(_fan_out, batch))
+
+
+def batched(
+        max_batch: int = 100,
+        max_delay: float = 0.005
+) -> Callable[[Callable[[List[Any]], FutureOrCoroutine[Sequence[T]]]], Callable[[Any], AbstractFuture[T]]]:
+    """
+    Turns a function that works on a list of keys into a function that works on a single key.
+
+    Calls made within max_delay seconds of the first one, from any thread
+    or task, are collected and passed to a single call of the decorated
+    function. A batch is dispatched early once it holds max_batch keys::
+
+        @batched(max_batch=500, max_delay=0.002)
+        @futurize
+        async def get_users(ids):
+            return await db.fetch_users(ids)
+
+        user = await get_users(42)
+
+    The decorated function returns a future or a coroutine resolving with
+    one result per key, in order. If a result is an exception instance,
+    only the call for that key fails with it; if the whole call fails,
+    every call of the batch does. Calls can be cancelled until their batch
+    has been dispatched.
+
+    The returned function has a ``flush()`` method that dispatches the
+    collected calls right away.
+
+    :param max_batch: The maximal number of keys per batch.
+    :param max_delay: The maximal number of seconds a call waits for others to join its batch.
+    :return: The decorator.
+    """
+    if max_batch < 1:
+        raise ValueError("max_batch must be at least 1")
+    if max_delay < 0:
+        raise ValueError("max_delay must not be negative")
+
+    def _decorator(func: Callable[[List[Any]], FutureOrCoroutine[Sequence[T]]]) -> Callable[[Any], AbstractFuture[T]]:
+        return _Batcher(func, max_batch, max_delay)
+
+    return _decorator
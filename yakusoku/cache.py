@@ -0,0 +1,279 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+import pickle
+import hashlib
+import functools
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from yakusoku.backends import CacheBackend
+from yakusoku.executor import LOGGER, get_executor
+from yakusoku.future import InvalidStateError, SlimFuture, wrap_future
+from yakusoku.typings import AbstractFuture, FutureOrCoroutine, T
+
+__all__ = [
+    "cached", "CacheInfo"
+]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # Calls that joined a call with the same arguments that was still running.
+    coalesced: int
+    maxsize: Optional[int]
+    currsize: int
+    # Results read from the persistent backend instead of being computed.
+    loaded: int
+
+
+class _Flight(object):
+    """
+    A call that is still running, shared by all callers with the same arguments.
+    """
+    __slots__ = ('future', 'source', 'callers')
+
+    def __init__(self):
+        self.future: AbstractFuture[Any] = SlimFuture()
+        self.source: Optional[AbstractFuture[Any]] = None
+        self.callers = 1
+
+
+def _digest(func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+    # Keyword arguments are sorted, so the order they were passed in does not matter.
+    data = pickle.dumps(
+        (func.__module__, func.__qualname__, args, sorted(kwargs.items())),
+        protocol=4
+    )
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read(backend: CacheBackend, key: str) -> Tuple[bool, Any]:
+    data = backend.load(key)
+    if data is None:
+        return False, None
+
+    expiry, value = pickle.loads(data)
+    if expiry is not None and expiry <= time.time():
+        return False, None
+    return True, value
+
+
+def _write(backend: CacheBackend, key: str, expiry: Optional[float], value: Any) -> None:
+    try:
+        backend.store(key, pickle.dumps((expiry, value), protocol=4))
+    except Exception:
+        LOGGER.exception("could not store result in %r", backend)
+
+
+def _copy_outcome(source: AbstractFuture[T], target: AbstractFuture[T]) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def cached(
+        maxsize: Optional[int] = 128, *,
+        ttl: Optional[float] = None,
+        cache_exceptions: bool = False,
+        typed: bool = False,
+        backend: Optional[CacheBackend] = None
+) -> Callable[[Callable[..., FutureOrCoroutine[T]]], Callable[..., AbstractFuture[T]]]:
+    """
+    Memoizes a function that returns a future or a coroutine.
+
+    Concurrent calls with the same arguments share a single call. Every
+    caller gets its own future, so cancelling it does not cancel the call
+    for the others; only when all callers have cancelled, the call itself
+    is cancelled. Finished results are kept in an LRU cache.
+
+    It can be stacked with :func:`yakusoku.futurize`::
+
+        @cached(maxsize=1024, ttl=60)
+        @futurize
+        async def lookup(key):
+            ...
+
+    The decorated function has ``cache_info()`` and ``cache_clear()``,
+    like functions decorated with :func:`functools.lru_cache`.
+
+    If a backend is given, results that are not in memory are looked up
+    there before the function is called, and new results are written to
+    it. Both happen on the yakusoku executor, so a lookup does not block
+    the caller. Entries are keyed by a SHA-256 digest of the qualified
+    name of the function and its pickled arguments, so arguments and
+    results must be picklable. Failures are never written to the backend.
+
+    :param maxsize:          The maximal number of cached results. None does not limit the cache.
+    :param ttl:              The number of seconds a result stays valid. None keeps it until evicted.
+    :param cache_exceptions: If true, failed calls are cached as well.
+    :param typed:            If true, arguments of different types are cached separately.
+    :param backend:          A persistent store to consult on misses, like :class:`yakusoku.SqliteBackend`.
+    :return: The decorator.
+    """
+    def _decorator(func: Callable[..., FutureOrCoroutine[T]]) -> Callable[..., AbstractFuture[T]]:
+        lock = Lock()
+        # key -> (finished future, expiry)
+        cache: 'OrderedDict[Any, Tuple[AbstractFuture[T], Optional[float]]]' = OrderedDict()
+        flights: Dict[Any, _Flight] = {}
+        hits = misses = coalesced = loaded = 0
+
+        def _store(key: Any, flight: _Flight, _):
+            fut = flight.future
+            with lock:
+                if flights.get(key) is flight:
+                    del flights[key]
+
+                if maxsize == 0 or fut.cancelled():
+                    return
+                if fut.exception() is not None and not cache_exceptions:
+                    return
+
+                cache[key] = (fut, None if ttl is None else time.monotonic() + ttl)
+                cache.move_to_end(key)
+                if maxsize is not None:
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+
+        def _caller_done(key: Any, flight: _Flight, fut: AbstractFuture[T]):
+            if not fut.cancelled():
+                return
+
+            with lock:
+                flight.callers -= 1
+                if flight.callers:
+                    return
+                # Nobody waits for the call anymore.
+                if flights.get(key) is flight:
+                    del flights[key]
+            if flight.source is not None:
+                flight.source.cancel()
+            flight.future.cancel()
+
+        def _caller(key: Any, flight: _Flight) -> AbstractFuture[T]:
+            fut: AbstractFuture[T] = SlimFuture()
+            flight.future.add_done_callback(functools.partial(_copy_outcome, target=fut))
+            fut.add_done_callback(functools.partial(_caller_done, key, flight))
+            return fut
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs) -> AbstractFuture[T]:
+            nonlocal hits, misses, coalesced
+            key = functools._make_key(args, kwargs, typed)
+
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    fut, expiry = entry
+                    if expiry is None or expiry > time.monotonic():
+                        cache.move_to_end(key)
+                        hits += 1
+                        # A finished future cannot be cancelled, so all callers can share it.
+                        return fut
+                    del cache[key]
+
+                flight = flights.get(key)
+                if flight is not None:
+                    coalesced += 1
+                    flight.callers += 1
+                    return _caller(key, flight)
+
+                misses += 1
+                flight = flights[key] = _Flight()
+
+            flight.future.add_done_callback(functools.partial(_store, key, flight))
+            caller = _caller(key, flight)
+            if backend is None:
+                _call(flight, args, kwargs)
+            else:
+                _load(flight, args, kwargs)
+            return caller
+
+        def _call(flight: _Flight, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+            try:
+                source = wrap_future(func(*args, **kwargs))
+            except Exception as e:
+                flight.future.set_exception(e)
+                return
+
+            flight.source = source
+            source.add_done_callback(functools.partial(_copy_outcome, target=flight.future))
+            if flight.future.cancelled():
+                # All callers have given up while the call was started.
+                source.cancel()
+
+        def _load(flight: _Flight, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+            try:
+                digest = _digest(func, args, kwargs)
+            except Exception as e:
+                flight.future.set_exception(e)
+                return
+
+            def _persist(fut: AbstractFuture[T]):
+                if fut.cancelled() or fut.exception() is not None:
+                    return
+                expiry = None if ttl is None else time.time() + ttl
+                get_executor().submit(_write, backend, digest, expiry, fut.result())
+
+            def _loaded(fut):
+                nonlocal loaded
+                if flight.future.done():
+                    # All callers have given up in the meantime.
+                    return
+
+                if fut.exception() is not None:
+                    LOGGER.error("could not load result from %r", backend, exc_info=fut.exception())
+                    found, value = False, None
+                else:
+                    found, value = fut.result()
+
+                if not found:
+                    flight.future.add_done_callback(_persist)
+                    _call(flight, args, kwargs)
+                    return
+
+                with lock:
+                    loaded += 1
+                try:
+                    flight.future.set_result(value)
+                except InvalidStateError:
+                    pass
+
+            get_executor().submit(_read, backend, digest).add_done_callback(_loaded)
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(hits, misses, coalesced, maxsize, len(cache), loaded)
+
+        def cache_clear() -> None:
+            # The backend is kept, use its own clear method to empty it.
+            nonlocal hits, misses, coalesced, loaded
+            with lock:
+                cache.clear()
+                hits = misses = coalesced = loaded = 0
+
+        _wrapper.cache_info = cache_info
+        _wrapper.cache_clear = cache_clear
+        return _wrapper
+
+    return _decorator
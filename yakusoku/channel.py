@@ -0,0 +1,290 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from collections import deque
+from concurrent.futures import TimeoutError
+from typing import Any, Callable, Deque, Generic, Iterable, Iterator, List, Optional, Tuple
+
+from yakusoku.future import SlimFuture
+from yakusoku.locks import _wake
+from yakusoku.operations import resolve, reject
+from yakusoku.typings import AbstractFuture, T
+
+__all__ = [
+    "Channel", "ChannelClosed"
+]
+
+
+class ChannelClosed(Exception):
+    """
+    Raised when putting into a closed channel, or getting from a closed and drained one.
+    """
+
+
+# Handed out for every put that does not have to wait.
+_PUT = resolve(None)
+
+
+class _Putter(object):
+    __slots__ = ('future', 'items', 'claimed')
+
+    def __init__(self, items: Deque[Any]):
+        self.future: AbstractFuture[None] = SlimFuture()
+        self.items = items
+        self.claimed = False
+
+
+class Channel(Generic[T]):
+    """
+    A bounded multi-producer, multi-consumer channel.
+
+    :meth:`put` and :meth:`get` return futures, so they can be awaited in
+    yakusoku tasks and asyncio coroutines, or waited for in threads. Parked
+    getters and putters are served in FIFO order.
+
+    Once closed, puts fail with :class:`ChannelClosed`. Gets return the
+    items that are still buffered and then fail with :class:`ChannelClosed`.
+    Iterating the channel, with ``for`` or ``async for``, stops at that point.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        """
+        :param maxsize: The maximal number of buffered items. Zero or less means unbounded.
+        """
+        self.maxsize = maxsize
+        self._mutex = threading.Lock()
+        self._items: Deque[T] = deque()
+        # (future, many, closed): many getters resolve with a list, and
+        # closing the channel rejects a getter with what closed() returns.
+        self._getters: Deque[Tuple[AbstractFuture[Any], bool, Callable[[], BaseException]]] = deque()
+        self._putters: Deque[_Putter] = deque()
+        self._closed = False
+
+    def __repr__(self):
+        return '<%s at %#x size=%d maxsize=%d%s>' % (
+            type(self).__name__, id(self), len(self._items), self.maxsize, ' closed' if self._closed else '')
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        """
+        :return: The number of buffered items.
+        """
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self._items)
+
+    def put(self, item: T) -> AbstractFuture[None]:
+        """
+        Puts an item into the channel.
+
+        :param item: The item to put.
+        :return: A future that resolves once the item has been accepted. It rejects with :class:`ChannelClosed`.
+        """
+        return self.put_many((item,))
+
+    def put_many(self, items: Iterable[T]) -> AbstractFuture[None]:
+        """
+        Puts multiple items into the channel, taking the lock only once.
+
+        :param items: The items to put, in order.
+        :return: A future that resolves once all items have been accepted. It rejects with :class:`ChannelClosed`.
+        """
+        items = deque(items)
+        with self._mutex:
+            if self._closed:
+                return reject(ChannelClosed())
+
+            count = len(items)
+            handouts = self._feed(items)
+            if items:
+                putter = _Putter(items)
+                if len(items) < count:
+                    # Partly accepted already, so it cannot be cancelled anymore.
+                    putter.future.set_running_or_notify_cancel()
+                    putter.claimed = True
+                self._putters.append(putter)
+                fut = putter.future
+            else:
+                fut = _PUT
+
+        self._hand_out(handouts)
+        return fut
+
+    def get(self) -> AbstractFuture[T]:
+        """
+        Takes the next item from the channel.
+
+        :return: A future resolving with the item. It rejects with :class:`ChannelClosed` once the channel is closed and drained.
+        """
+        return self._get(1, ChannelClosed)
+
+    def get_many(self, max_items: int) -> AbstractFuture[List[T]]:
+        """
+        Takes up to max_items buffered items, taking the lock only once.
+
+        If no item is buffered, it waits for the next one.
+
+        :param max_items: The maximal number of items to take.
+        :return: A future resolving with a non-empty list of items. It rejects with :class:`ChannelClosed` once the channel is closed and drained.
+        """
+        if max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        return self._get(max_items, ChannelClosed)
+
+    def put_sync(self, item: T, timeout: Optional[float] = None) -> None:
+        """
+        Puts an item, blocking the current thread while the channel is full.
+
+        :param item:    The item to put.
+        :param timeout: The maximal number of seconds to wait. None waits forever.
+        :raises ChannelClosed: If the channel has been closed.
+        :raises TimeoutError: If the item has not been accepted in time. It is not put then.
+        """
+        fut = self.put(item)
+        try:
+            fut.result(timeout)
+        except TimeoutError:
+            if fut.cancel():
+                raise
+            # The item has been accepted in the meantime.
+            fut.result()
+
+    def get_sync(self, timeout: Optional[float] = None) -> T:
+        """
+        Takes the next item, blocking the current thread while the channel is empty.
+
+        :param timeout: The maximal number of seconds to wait. None waits forever.
+        :raises ChannelClosed: If the channel has been closed and drained.
+        :raises TimeoutError: If no item arrived in time.
+        """
+        fut = self.get()
+        try:
+            return fut.result(timeout)
+        except TimeoutError:
+            if fut.cancel():
+                raise
+            # An item has been handed to us in the meantime.
+            return fut.result()
+
+    def close(self) -> None:
+        """
+        Closes the channel. Waiting getters and putters fail with :class:`ChannelClosed`.
+        """
+        with self._mutex:
+            if self._closed:
+                return
+            self._closed = True
+            getters, self._getters = self._getters, deque()
+            putters, self._putters = self._putters, deque()
+
+        for fut, _, closed in getters:
+            if fut.set_running_or_notify_cancel():
+                fut.set_exception(closed())
+        for putter in putters:
+            if putter.claimed or putter.future.set_running_or_notify_cancel():
+                putter.future.set_exception(ChannelClosed())
+
+    def __iter__(self) -> Iterator[T]:
+        while True:
+            try:
+                yield self.get_sync()
+            except ChannelClosed:
+                return
+
+    def __aiter__(self) -> 'Channel[T]':
+        return self
+
+    def __anext__(self) -> AbstractFuture[T]:
+        return self._get(1, StopAsyncIteration)
+
+    def _get(self, max_items: int, closed: Callable[[], BaseException]) -> AbstractFuture[Any]:
+        many = max_items > 1
+        with self._mutex:
+            items = self._items
+            if items:
+                if many:
+                    value = [items.popleft() for _ in range(min(max_items, len(items)))]
+                else:
+                    value = items.popleft()
+                handouts = self._refill()
+            elif self._closed:
+                return reject(closed())
+            else:
+                fut = SlimFuture()
+                self._getters.append((fut, many, closed))
+                return fut
+
+        self._hand_out(handouts)
+        return resolve(value)
+
+    def _claim_getter(self) -> Optional[Tuple[AbstractFuture[Any], bool, Callable[[], BaseException]]]:
+        # Claimed futures are running and cannot be cancelled anymore.
+        getters = self._getters
+        while getters:
+            getter = getters.popleft()
+            if getter[0].set_running_or_notify_cancel():
+                return getter
+        return None
+
+    def _feed(self, items: Deque[T]) -> List[Tuple[AbstractFuture[Any], Any]]:
+        """
+        Hands items to waiting getters and buffers the rest while there is room.
+        Must be called with the lock held.
+        """
+        handouts = []
+        while items:
+            getter = self._claim_getter() if self._getters else None
+            if getter is not None:
+                fut, many, _ = getter
+                item = items.popleft()
+                handouts.append((fut, [item] if many else item))
+            elif self.maxsize <= 0 or len(self._items) < self.maxsize:
+                self._items.append(items.popleft())
+            else:
+                break
+        return handouts
+
+    def _refill(self) -> List[Tuple[AbstractFuture[Any], Any]]:
+        """
+        Moves items of waiting putters into the buffer. Must be called with the lock held.
+        """
+        handouts = []
+        putters = self._putters
+        while putters:
+            putter = putters[0]
+            if not putter.claimed:
+                if not putter.future.set_running_or_notify_cancel():
+                    putters.popleft()
+                    continue
+                putter.claimed = True
+
+            handouts.extend(self._feed(putter.items))
+            if putter.items:
+                break
+            putters.popleft()
+            handouts.append((putter.future, None))
+        return handouts
+
+    def _hand_out(self, handouts: List[Tuple[AbstractFuture[Any], Any]]) -> None:
+        for fut, value in handouts:
+            _wake(fut, result=value)
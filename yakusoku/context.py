@@ -14,7 +14,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from threading import local
-_current_state = local()
+
+try:
+    from contextvars import ContextVar, Context, copy_context
+except ImportError:
+    ContextVar = None
+
+
+class _TaskState(local):
+    # Only true while a step of a Task runs on this thread. This is not a
+    # context variable, as asyncio tasks and callbacks that are created
+    # during a step would inherit it and then run outside of any Task.
+    running = False
+
+
+_state = _TaskState()
+
+
+def _is_running() -> bool:
+    """
+    Fast version of :func:`in_run_coro` for hot paths.
+    """
+    return _state.running
 
 
 class set_run_coro(object):
@@ -25,13 +46,47 @@ class set_run_coro(object):
 
     This context-manager is reentrant.
     """
+    __slots__ = ('before',)
 
     def __enter__(self):
-        self.before = in_run_coro()
-        _current_state.in_run_coro = True
+        self.before = _state.running
+        _state.running = True
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        _current_state.in_run_coro = self.before
+        _state.running = self.before
+
+
+if ContextVar is not None:
+    def task_context() -> Context:
+        """
+        Creates the context a :class:`yakusoku.coroutines.Task` runs its steps in.
+
+        It is a copy of the current context, so the task sees the values of all
+        context variables at the time it was created, just like asyncio tasks do.
+
+        :return: A copy of the current context.
+        """
+        return copy_context()
+
+else:
+    class _ThreadContext(object):
+        """
+        Stand-in for :class:`contextvars.Context` on Python versions without it.
+        """
+        __slots__ = ()
+
+        def run(self, func, *args):
+            return func(*args)
+
+    _thread_context = _ThreadContext()
+
+    def task_context() -> _ThreadContext:
+        """
+        Creates the context a :class:`yakusoku.coroutines.Task` runs its steps in.
+
+        :return: A context that runs functions as they are.
+        """
+        return _thread_context
 
 
 def in_run_coro():
@@ -40,4 +95,4 @@ def in_run_coro():
 
     :return: True if the current code runs inside a :class:`yakusoku.coroutines.Task`
     """
-    return getattr(_current_state, 'in_run_coro', False)
+    return _is_running()
@@ -13,11 +13,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from concurrent.futures import Future, CancelledError
-from typing import Any, Callable, NamedTuple, Optional
+from types import CoroutineType
+from concurrent.futures import Executor, Future, CancelledError
+from concurrent.futures._base import CANCELLED, CANCELLED_AND_NOTIFIED, FINISHED
+from typing import Any, Callable, Dict, NamedTuple, Optional
 
 from yakusoku.future import wrap_future
-from yakusoku.context import set_run_coro
+from yakusoku.loop import call_soon_threadsafe
+from yakusoku.context import _state, task_context
 from yakusoku.typings import PromiseCoroutine, AbstractFuture, T
 from yakusoku.typings import FutureOrCoroutine
 
@@ -32,83 +35,250 @@ class Task(Future, AbstractFuture[T]):
     A Task wraps a coroutine and runs it.
 
     During awaits, the coroutine may switch to another thread.
+    If an executor is given, every step of the coroutine is
+    run on that executor instead.
+
+    If an asyncio event loop is given, every step runs as a callback
+    of that loop instead. Futures of that loop are then awaited
+    natively, and only other futures are bridged into the loop.
+
+    Every step runs inside the context the task was created in,
+    so context variables follow the coroutine across threads.
     """
 
     coro: PromiseCoroutine[T]
 
-    def __init__(self, coro: PromiseCoroutine[T]):
+    def __init__(
+            self,
+            coro: PromiseCoroutine[T], *,
+            executor: Optional[Executor] = None,
+            loop=None,
+            context=None
+    ):
+        if executor is not None and loop is not None:
+            raise ValueError("A task cannot run on both an executor and an event loop.")
+
         super(Task, self).__init__()
         self.coro = coro
+        self.executor = executor
+        self.loop = loop
+        self._context = context if context is not None else task_context()
         self.current_future: AbstractFuture[Any] = None
-        self.add_done_callback(self._handle_cancel)
+        # A plain function instead of a bound method, so the callback list
+        # does not form a cycle and finished tasks are freed right away.
+        self.add_done_callback(Task._handle_cancel)
 
     def start(self):
         """
         Actually start running the coroutine.
         """
-        self._send(None)
-
-    def _handle_cancel(self, _):
-        if self.current_future is None:
-            return
-        if not self.cancelled():
+        if self.loop is not None:
+            # Like asyncio tasks, start with the next iteration of the loop.
+            self._post(self._advance, self.coro.send, None)
             return
+        self._send(None)
 
-        self.current_future.cancel()
-        self.coro.close()
+    def _handle_cancel(self):
+        current, coro = self.current_future, self.coro
+        if current is not None and self.cancelled():
+            if self.loop is not None and _is_aiofuture(current):
+                # Futures of the loop may only be touched on the loop.
+                self._post(current.cancel)
+                coro.close()
+            elif current.cancel() and not current.done():
+                # The future cleans up before it settles, like a cancelled
+                # Condition.wait that takes its lock back first. The finally
+                # blocks of the coroutine may rely on that, so they run after.
+                current.add_done_callback(lambda _: coro.close())
+            else:
+                coro.close()
 
-    def _handle_child_cancel(self, fut: AbstractFuture[Any]) -> None:
-        if self.done():
-            return
-
-        if fut.cancelled():
-            self._error(CancelledError())
+        # A finished task does not need its coroutine and child anymore.
+        self.coro = None
+        self.current_future = None
 
     def _error(self, err):
-        self._advance(self.coro.throw, err)
+        coro = self.coro
+        if coro is not None:
+            self._schedule(coro.throw, err)
 
     def _send(self, data):
-        self._advance(self.coro.send, data)
+        coro = self.coro
+        if coro is not None:
+            self._schedule(coro.send, data)
+
+    def _post(self, callback: Callable[..., Any], *args: Any):
+        from asyncio import _get_running_loop
+        try:
+            if _get_running_loop() is self.loop:
+                self.loop.call_soon(callback, *args)
+            else:
+                call_soon_threadsafe(self.loop, callback, *args)
+        except RuntimeError as e:
+            # The loop has been closed.
+            self._fail(e)
+
+    def _schedule(self, func: Callable[[Any], FutureOrCoroutine[Any]], data: Any):
+        if self.loop is not None:
+            from asyncio import _get_running_loop
+            if _get_running_loop() is self.loop:
+                return self._advance(func, data)
+            return self._post(self._advance, func, data)
+
+        if self.executor is None:
+            return self._advance(func, data)
+
+        try:
+            self.executor.submit(self._advance, func, data)
+        except RuntimeError as e:
+            # The executor has been shut down.
+            self._fail(e)
+
+    def _fail(self, error: BaseException):
+        # The coroutine cannot run anymore, so close it to run its finally blocks.
+        coro = self.coro
+        if coro is not None:
+            coro.close()
+        if not self.done():
+            self.set_exception(error)
 
     def _advance(self, func: Callable[[Any], FutureOrCoroutine[Any]], data: Any):
+        # Futures that are already done are resumed in this loop instead
+        # of through their done-callbacks, so awaiting them does not grow
+        # the stack.
+        run = self._context.run
+        # Marks the thread as running inside a task for the steps only, so
+        # the callbacks that finish the task below run outside of it again.
+        state = _state
+        running = state.running
+        state.running = True
         try:
-            with set_run_coro():
-                next_future = func(data)
-        except StopIteration as e:
-            result = ResultData(e.value, None)
-        except BaseException as e:
-            result = ResultData(None, e)
-        else:
-            return self._register_handlers(next_future)
+            while True:
+                try:
+                    next_future = run(func, data)
+                except StopIteration as e:
+                    result = ResultData(e.value, None)
+                    break
+                except BaseException as e:
+                    result = ResultData(None, e)
+                    break
+
+                if next_future is None and self.loop is not None:
+                    # A bare yield, like the one of asyncio.sleep(0), lets the
+                    # other callbacks of the loop run first, as in asyncio tasks.
+                    self.current_future = None
+                    self.loop.call_soon(self._send, None)
+                    return
+
+                try:
+                    fut = self._register_handlers(next_future)
+                    error = None
+                except BaseException as e:
+                    # The coroutine yielded something that cannot be awaited.
+                    fut, error = None, e
+
+                coro = self.coro
+                # Reading the state directly spares us the lock of done().
+                if coro is None or self._state in _DONE_STATES:
+                    return
+                if error is not None:
+                    func, data = coro.throw, error
+                    continue
+                if fut is None:
+                    return
+
+                func, data = _resume_with(coro, fut)
+        finally:
+            state.running = running
 
         if result.error:
             self.set_exception(result.error)
         else:
             self.set_result(result.result)
 
-    def _receive_call_completed(self, fut: AbstractFuture[Any]):
-        if self.done():
+    def _wakeup(self, fut: AbstractFuture[Any]):
+        coro = self.coro
+        if coro is None or self._state in _DONE_STATES:
             return
 
-        if fut.exception():
-            self._error(fut.exception())
+        self._schedule(*_resume_with(coro, fut))
+
+    def _register_handlers(self, future_or_coro: FutureOrCoroutine[Any]) -> Optional[AbstractFuture[Any]]:
+        """
+        Waits for the future the coroutine yielded.
+
+        :return: The future if it is already done and the coroutine should be resumed right away.
+        """
+        if type(future_or_coro) is CoroutineType:
+            # Awaited coroutines share our context, executor and loop, just
+            # like a coroutine awaited inside an asyncio task. We are already
+            # running on the executor or the loop, so start it right away.
+            fut = Task(future_or_coro, executor=self.executor, loop=self.loop, context=self._context)
+            fut._advance(future_or_coro.send, None)
+        elif self.loop is not None and _is_aiofuture(future_or_coro) and future_or_coro._loop is self.loop:
+            # Futures of our own loop are awaited natively.
+            fut = future_or_coro
+            fut._asyncio_future_blocking = False
         else:
-            self._send(fut.result())
+            fut = wrap_future(future_or_coro)
+        self.current_future = fut
+
+        if fut.done():
+            tp = type(fut)
+            resume_inline = _resume_inline.get(tp)
+            if resume_inline is None:
+                resume_inline = _resume_inline[tp] = getattr(tp, '_resume_inline', True)
+            if resume_inline:
+                return fut
+
+        fut.add_done_callback(self._wakeup)
+        return None
+
 
-    def _register_handlers(self, future_or_coro: FutureOrCoroutine[Any]):
-        self.current_future = wrap_future(future_or_coro)
-        self.current_future.add_done_callback(self._handle_child_cancel)
-        self.current_future.add_done_callback(self._receive_call_completed)
+_DONE_STATES = frozenset((CANCELLED, CANCELLED_AND_NOTIFIED, FINISHED))
 
+# Caches whether a type of future allows resuming inline once it is done.
+_resume_inline: Dict[type, bool] = {}
 
-def run_coroutine(coro: PromiseCoroutine[T]) -> AbstractFuture[T]:
+
+def _is_aiofuture(obj: Any) -> bool:
+    from asyncio import isfuture
+    return isfuture(obj)
+
+
+def _resume_with(coro: PromiseCoroutine[Any], fut: AbstractFuture[Any]):
+    """
+    Returns the coroutine-method and the value to resume the coroutine with.
+    """
+    if isinstance(fut, Future):
+        # SlimFuture keeps its state in the same attributes as Future. Reading
+        # them directly avoids taking the lock of a future that is done.
+        if fut._state != FINISHED:
+            return coro.throw, CancelledError()
+        if fut._exception is not None:
+            return coro.throw, fut._exception
+        return coro.send, fut._result
+
+    if fut.cancelled():
+        return coro.throw, CancelledError()
+    if fut.exception() is not None:
+        return coro.throw, fut.exception()
+    return coro.send, fut.result()
+
+
+def run_coroutine(
+        coro: PromiseCoroutine[T], *,
+        executor: Optional[Executor] = None,
+        loop=None
+) -> AbstractFuture[T]:
     """
     Runs the coroutine in the current thread.
 
-    :param coro: The coroutine to run.
+    :param coro:     The coroutine to run.
+    :param executor: If given, every step of the coroutine runs on this executor instead.
+    :param loop:     If given, every step of the coroutine runs on this asyncio event loop instead.
     :return: A future that will return once the coroutine finishes.
     """
-    task = Task(coro)
+    task = Task(coro, executor=executor, loop=loop)
     task.start()
     return task
-
@@ -0,0 +1,110 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+from threading import Lock
+from typing import Any, Callable, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+__all__ = [
+    "get_executor", "set_executor", "set_max_workers",
+    "submit"
+]
+
+LOGGER = logging.getLogger("yakusoku")
+
+_executor: Optional[Executor] = None
+_owned: bool = False
+_max_workers: Optional[int] = None
+_lock = Lock()
+
+
+def get_executor() -> Executor:
+    """
+    Returns the executor Yakusoku uses to switch threads.
+
+    Unless another executor has been installed, this is a bounded
+    :class:`concurrent.futures.ThreadPoolExecutor` that is created
+    on first use. Code that blocks a worker on another future keeps
+    that worker busy, so size the pool for the blocking calls you make.
+
+    :return: The current executor.
+    """
+    global _executor, _owned
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(_max_workers, thread_name_prefix="yakusoku")
+                _owned = True
+    return _executor
+
+
+def set_executor(executor: Optional[Executor]) -> None:
+    """
+    Installs the executor Yakusoku uses to switch threads.
+
+    The previous executor is shut down if Yakusoku created it. Executors
+    passed by the caller are never shut down by Yakusoku.
+
+    :param executor: The executor to use. Pass None to go back to the default pool.
+    """
+    global _executor, _owned
+    with _lock:
+        previous, owned = _executor, _owned
+        _executor, _owned = executor, False
+
+    if owned:
+        previous.shutdown(wait=False)
+
+
+def set_max_workers(max_workers: Optional[int]) -> None:
+    """
+    Sets the size of the default worker pool.
+
+    This replaces the default pool, but not an executor installed
+    with :func:`set_executor`.
+
+    :param max_workers: The maximal number of worker threads. None uses the default of the thread pool.
+    """
+    global _max_workers
+    with _lock:
+        _max_workers = max_workers
+        replace = _owned
+
+    if replace:
+        set_executor(None)
+
+
+def _run_callback(fn: Callable[[Any], Any], arg: Any) -> None:
+    try:
+        fn(arg)
+    except Exception:
+        LOGGER.exception("exception calling callback for %r", arg)
+
+
+def submit(fn: Callable[[Any], Any], arg: Any, executor: Optional[Executor] = None) -> None:
+    """
+    Runs a done-callback on a worker thread.
+
+    Exceptions raised by the callback are logged, just like
+    :class:`concurrent.futures.Future` does for its callbacks.
+
+    :param fn:       The callback to run.
+    :param arg:      The argument to pass to the callback.
+    :param executor: The executor to run the callback on. Defaults to :func:`get_executor`.
+    """
+    if executor is None:
+        executor = get_executor()
+    executor.submit(_run_callback, fn, arg)
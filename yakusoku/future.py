@@ -14,22 +14,104 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import sys
+import functools
+from weakref import WeakKeyDictionary
+from threading import Condition, Lock
 from types import CoroutineType
-from concurrent.futures import Future
-from typing import Generator
+from concurrent.futures import Future, CancelledError, TimeoutError
+from concurrent.futures._base import Error, LOGGER
+from concurrent.futures._base import PENDING, RUNNING, CANCELLED, CANCELLED_AND_NOTIFIED, FINISHED
+from typing import Any, Callable, Dict, Generator, List, Optional
 
-from yakusoku.context import in_run_coro
+from yakusoku.loop import call_soon_threadsafe
+from yakusoku.context import _is_running
 from yakusoku.typings import FutureOrCoroutine, AbstractFuture, T
 
 PY36: bool = sys.version_info >= (3, 6)
 
+try:
+    from concurrent.futures._base import InvalidStateError
+except ImportError:
+    # Only defined since Python 3.8. Before that, Future.set_result does not
+    # raise on finished futures, so only SlimFuture raises this error there.
+    class InvalidStateError(Error):
+        """The operation is not allowed in this state."""
+
 
 def _await_(self: AbstractFuture[T]) -> Generator[T, AbstractFuture[T], T]:
-    if in_run_coro():
+    if _is_running():
         return (yield self)
 
-    from asyncio import wrap_future
-    return (yield from wrap_future(self))
+    if self.done():
+        return self.result()
+
+    return (yield from _to_aiofuture(self))
+
+
+# Maps a concurrent future to the asyncio futures that follow it, one per
+# event loop, so all awaiters on a loop share a single cross-thread wakeup.
+_aio_bridges: 'WeakKeyDictionary[AbstractFuture[Any], Dict[Any, Any]]' = WeakKeyDictionary()
+_aio_bridges_lock = Lock()
+
+
+def _copy_to_aiofuture(source, target) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _schedule_aio_copy(loop, target, source: AbstractFuture[T]) -> None:
+    with _aio_bridges_lock:
+        _aio_bridges.pop(source, None)
+
+    try:
+        call_soon_threadsafe(loop, _copy_to_aiofuture, source, target)
+    except RuntimeError:
+        # The loop has been closed in the meantime.
+        pass
+
+
+def _forward_aio_cancel(source: AbstractFuture[T], waiter) -> None:
+    if waiter.cancelled():
+        source.cancel()
+
+
+def _to_aiofuture(fut: AbstractFuture[T]):
+    """
+    Creates an asyncio future on the current event loop that follows the given future.
+
+    Unlike :func:`asyncio.wrap_future` this works with any future that
+    implements the :class:`concurrent.futures.Future` interface.
+
+    The cross-thread part of the bridge is shared by all awaiters of the
+    future on the same loop. Every awaiter gets its own asyncio future, so
+    cancelling one awaiter only cancels the source future, just like
+    :func:`asyncio.wrap_future` does.
+    """
+    from asyncio import get_event_loop
+    loop = get_event_loop()
+
+    with _aio_bridges_lock:
+        bridges = _aio_bridges.get(fut)
+        if bridges is None:
+            bridges = _aio_bridges[fut] = {}
+        shared = bridges.get(loop)
+        created = shared is None
+        if created:
+            shared = bridges[loop] = loop.create_future()
+
+    if created:
+        fut.add_done_callback(functools.partial(_schedule_aio_copy, loop, shared))
+
+    waiter = loop.create_future()
+    shared.add_done_callback(functools.partial(_copy_to_aiofuture, target=waiter))
+    waiter.add_done_callback(functools.partial(_forward_aio_cancel, fut))
+    return waiter
 
 
 def monkeypatch_future():
@@ -39,6 +121,157 @@ def monkeypatch_future():
         Future.__await__ = _await_
 
 
+class SlimFuture(Future):
+    """
+    A compact :class:`concurrent.futures.Future`.
+
+    It uses ``__slots__`` and only allocates its condition variable, its
+    waiter list and its callback list once they are needed. It overrides
+    every method of :class:`concurrent.futures.Future` and never calls its
+    constructor, but still is one, so it can be awaited, passed to
+    :func:`asyncio.wrap_future`, :func:`concurrent.futures.wait` and
+    :func:`concurrent.futures.as_completed`.
+
+    Unlike :class:`concurrent.futures.Future`, a cancelled SlimFuture is
+    reported as done to :func:`concurrent.futures.wait` right away, as
+    there is no executor that would do so later.
+    """
+    __slots__ = ('_state', '_result', '_exception', '_lock', '_cond', '_waiter_list', '_callbacks')
+
+    def __init__(self):
+        self._state = PENDING
+        self._result = None
+        self._exception = None
+        self._lock = Lock()
+        self._cond: Optional[Condition] = None
+        self._waiter_list: Optional[List[Any]] = None
+        self._callbacks: Optional[List[Callable[['SlimFuture'], None]]] = None
+
+    __await__ = _await_
+    __iter__ = _await_
+
+    def __repr__(self):
+        if self._state == FINISHED:
+            if self._exception is not None:
+                return '<%s at %#x state=finished raised %s>' % (
+                    type(self).__name__, id(self), type(self._exception).__name__)
+            return '<%s at %#x state=finished returned %s>' % (
+                type(self).__name__, id(self), type(self._result).__name__)
+        return '<%s at %#x state=%s>' % (type(self).__name__, id(self), self._state.lower())
+
+    @property
+    def _condition(self) -> Condition:
+        # Used by concurrent.futures.wait and as_completed.
+        if self._cond is None:
+            with self._lock:
+                if self._cond is None:
+                    self._cond = Condition(self._lock)
+        return self._cond
+
+    @property
+    def _waiters(self) -> List[Any]:
+        # Only accessed while holding the condition.
+        if self._waiter_list is None:
+            self._waiter_list = []
+        return self._waiter_list
+
+    def _finish(self, state: str, result: Any, exception: Optional[BaseException]) -> bool:
+        with self._lock:
+            if self._state != PENDING and (self._state != RUNNING or state != FINISHED):
+                return False
+            self._state = state
+            self._result = result
+            self._exception = exception
+
+            if self._waiter_list:
+                for waiter in self._waiter_list:
+                    if state != FINISHED:
+                        waiter.add_cancelled(self)
+                    elif exception is not None:
+                        waiter.add_exception(self)
+                    else:
+                        waiter.add_result(self)
+            if self._cond is not None:
+                self._cond.notify_all()
+
+            callbacks, self._callbacks = self._callbacks, None
+
+        if callbacks:
+            for callback in callbacks:
+                self._invoke(callback)
+        return True
+
+    def _invoke(self, callback: Callable[['SlimFuture'], None]) -> None:
+        try:
+            callback(self)
+        except Exception:
+            LOGGER.exception('exception calling callback for %r', self)
+
+    def cancel(self) -> bool:
+        if self._state in (CANCELLED, CANCELLED_AND_NOTIFIED):
+            return True
+        return self._finish(CANCELLED_AND_NOTIFIED, None, None)
+
+    def cancelled(self) -> bool:
+        return self._state in (CANCELLED, CANCELLED_AND_NOTIFIED)
+
+    def running(self) -> bool:
+        return self._state == RUNNING
+
+    def done(self) -> bool:
+        return self._state in (CANCELLED, CANCELLED_AND_NOTIFIED, FINISHED)
+
+    def set_running_or_notify_cancel(self) -> bool:
+        with self._lock:
+            if self._state in (CANCELLED, CANCELLED_AND_NOTIFIED):
+                return False
+            if self._state == PENDING:
+                self._state = RUNNING
+                return True
+        raise RuntimeError('Future in unexpected state')
+
+    def set_result(self, result: T) -> None:
+        if not self._finish(FINISHED, result, None):
+            raise InvalidStateError('%s: %r' % (self._state, self))
+
+    def set_exception(self, exception: BaseException) -> None:
+        if not self._finish(FINISHED, None, exception):
+            raise InvalidStateError('%s: %r' % (self._state, self))
+
+    def add_done_callback(self, fn: Callable[['SlimFuture'], None]) -> None:
+        with self._lock:
+            if self._state in (PENDING, RUNNING):
+                if self._callbacks is None:
+                    self._callbacks = [fn]
+                else:
+                    self._callbacks.append(fn)
+                return
+        self._invoke(fn)
+
+    def _wait(self, timeout: Optional[float]) -> None:
+        if self.done():
+            return
+
+        cond = self._condition
+        with cond:
+            if not cond.wait_for(self.done, timeout):
+                raise TimeoutError()
+
+    def result(self, timeout: Optional[float] = None) -> T:
+        self._wait(timeout)
+        if self._state != FINISHED:
+            raise CancelledError()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        self._wait(timeout)
+        if self._state != FINISHED:
+            raise CancelledError()
+        return self._exception
+
+
 def copy(source: AbstractFuture[T], target: AbstractFuture[T], *, copy_cancel=True, copy_result=True) -> None:
     """
     Link the state from the source future to the target future.
@@ -65,34 +298,67 @@ def copy(source: AbstractFuture[T], target: AbstractFuture[T], *, copy_cancel=Tr
 
 
 def _copy_aiofuture(loop, *args, **kwargs):
-    loop.call_soon_threadsafe(lambda: copy(*args, **kwargs))
+    call_soon_threadsafe(loop, lambda: copy(*args, **kwargs))
+
+
+def _wrap_identity(fut: AbstractFuture[T]) -> AbstractFuture[T]:
+    return fut
+
+
+def _wrap_coroutine(coro: FutureOrCoroutine[T]) -> AbstractFuture[T]:
+    from yakusoku.coroutines import run_coroutine
+    return run_coroutine(coro)
+
+
+def _wrap_aiofuture(fut: FutureOrCoroutine[T]) -> AbstractFuture[T]:
+    if not hasattr(fut, '_loop') and not hasattr(fut, 'get_loop'):
+        raise AttributeError("Cannot fetch loop of future.")
+
+    target: AbstractFuture[T] = Future()
+    loop = getattr(fut, 'get_loop', lambda: fut._loop)()
+    _copy_aiofuture(loop, fut, target)
+    return target
+
+
+def _wrap_other(fut: FutureOrCoroutine[T]) -> AbstractFuture[T]:
+    target: AbstractFuture[T] = Future()
+    copy(fut, target)
+    return target
+
+
+def _find_wrapper(tp: type) -> Callable[[FutureOrCoroutine[Any]], AbstractFuture[Any]]:
+    if issubclass(tp, CoroutineType):
+        return _wrap_coroutine
+
+    if issubclass(tp, Future):
+        return _wrap_identity
+
+    from asyncio import Future as AIOFuture
+    if issubclass(tp, AIOFuture):
+        return _wrap_aiofuture
+
+    return _wrap_other
+
+
+# Maps the type of an awaited object to the function that turns it into a
+# concurrent future, so the isinstance-chain only runs once per type.
+_wrappers: Dict[type, Callable[[FutureOrCoroutine[Any]], AbstractFuture[Any]]] = {
+    CoroutineType: _wrap_coroutine,
+    Future: _wrap_identity,
+    SlimFuture: _wrap_identity,
+}
 
 
 def wrap_future(fut: FutureOrCoroutine[T]) -> AbstractFuture[T]:
     """
     Wraps a :class:`asyncio.futures.Future` or any Coroutine into a Future. It will do
-    nothing to the :class:`concurrent.futures.Future`
+    nothing to the :class:`concurrent.futures.Future` and :class:`SlimFuture`
 
     :param fut: The future to wrap.
     :return: A new future.
     """
-    if isinstance(fut, CoroutineType):
-        from yakusoku.coroutines import run_coroutine
-        return run_coroutine(fut)
-
-    if not isinstance(fut, Future):
-        target: AbstractFuture[T] = Future()
-
-        from asyncio import Future as AIOFuture
-        if isinstance(fut, AIOFuture):
-            if not hasattr(fut, '_loop') and not hasattr(fut, 'get_loop'):
-                raise AttributeError("Cannot fetch loop of future.")
-
-            loop = getattr(fut, 'get_loop', lambda: fut._loop)()
-            _copy_aiofuture(loop, fut, target)
-        else:
-            copy(fut, target)
-        return target
-
-    fut: AbstractFuture[T]  # Tell this thing that this is still an AbstractFuture[T]
-    return fut
+    tp = type(fut)
+    wrapper = _wrappers.get(tp)
+    if wrapper is None:
+        wrapper = _wrappers[tp] = _find_wrapper(tp)
+    return wrapper(fut)
@@ -0,0 +1,289 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+import threading
+from abc import ABC, abstractmethod
+from time import monotonic
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from yakusoku.future import SlimFuture
+from yakusoku.executor import submit
+from yakusoku.timer import TimerHandle, call_later
+from yakusoku.coroutines import run_coroutine
+from yakusoku.locks import _ACQUIRED, _ContextManagerMixin, _wake
+from yakusoku.typings import AbstractFuture, FutureOrCoroutine, T
+
+__all__ = [
+    "RateLimiter", "ConcurrencyLimiter"
+]
+
+
+class _Limiter(ABC):
+    """
+    The FIFO queue of weighted waiters shared by all limiters.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        # Waiters are served strictly in order, so a heavy waiter is not
+        # starved by lighter ones that arrive after it.
+        self._waiters: Deque[Tuple[AbstractFuture[bool], int]] = deque()
+
+    def __call__(self, func: Callable[..., FutureOrCoroutine[T]] = None, *, weight: int = 1):
+        """
+        Limits every call of a function that returns a future or a coroutine.
+
+        Use it as ``@limiter`` or ``@limiter(weight=3)``.
+
+        :param func:   The function to limit.
+        :param weight: The number of permits every call takes.
+        :return: A function that returns a future.
+        """
+        if func is None:
+            return functools.partial(self.__call__, weight=weight)
+        self._check_weight(weight)
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs) -> AbstractFuture[T]:
+            return run_coroutine(self._run(weight, func, args, kwargs))
+
+        return _wrapper
+
+    def acquire(self, weight: int = 1) -> AbstractFuture[bool]:
+        """
+        Takes permits from the limiter.
+
+        Waiters are served in the order they called this method, across
+        threads, yakusoku tasks and asyncio coroutines. Cancelling the
+        future gives up the place in the queue.
+
+        :param weight: The number of permits to take.
+        :return: A future that resolves with True once the permits have been taken.
+        """
+        self._check_weight(weight)
+        with self._mutex:
+            self._refill()
+            if not self._waiters and self._available() >= weight:
+                self._take(weight)
+                return _ACQUIRED
+
+            waiter: AbstractFuture[bool] = SlimFuture()
+            self._waiters.append((waiter, weight))
+            if len(self._waiters) == 1:
+                self._waiting()
+        waiter.add_done_callback(self._waiter_done)
+        return waiter
+
+    def _waiter_done(self, waiter: AbstractFuture[bool]) -> None:
+        if waiter.cancelled():
+            # The waiters behind a cancelled one may fit now.
+            self._dispatch()
+
+    def _dispatch(self, _=None) -> None:
+        granted = []
+        with self._mutex:
+            self._refill()
+            waiters = self._waiters
+            while waiters:
+                waiter, weight = waiters[0]
+                if waiter.done():
+                    waiters.popleft()
+                    continue
+                if self._available() < weight:
+                    break
+                waiters.popleft()
+                self._take(weight)
+                granted.append((waiter, weight))
+            self._waiting()
+
+        for waiter, weight in granted:
+            _wake(waiter, functools.partial(self._give_back, weight))
+
+    @abstractmethod
+    def _give_back(self, weight: int) -> None:
+        """
+        Returns permits that were granted to a waiter that has been cancelled in the meantime.
+        """
+
+    @abstractmethod
+    def _check_weight(self, weight: int) -> None:
+        """
+        :raises ValueError: If a single call can never take that many permits.
+        """
+
+    def _refill(self) -> None:
+        """
+        Called with the lock held before the available permits are checked.
+        """
+
+    @abstractmethod
+    def _available(self) -> float:
+        """
+        Called with the lock held.
+
+        :return: The number of permits that can be taken right now.
+        """
+
+    @abstractmethod
+    def _take(self, weight: int) -> None:
+        """
+        Takes permits. Called with the lock held.
+        """
+
+    def _waiting(self) -> None:
+        """
+        Called with the lock held whenever the first waiter may have changed.
+        """
+
+    @abstractmethod
+    async def _run(self, weight: int, func: Callable[..., FutureOrCoroutine[T]], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> T:
+        """
+        Runs a call of a decorated function with the given weight.
+        """
+
+
+class RateLimiter(_Limiter):
+    """
+    A token bucket whose waiters are parked as futures instead of threads.
+
+    The bucket holds up to burst tokens and refills at rate tokens per
+    second. Waiting for tokens does not block a thread; the first waiter
+    is woken on a worker thread once enough tokens have accumulated.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        :param rate:  The number of tokens added per second.
+        :param burst: The maximal number of tokens in the bucket. Defaults to the rate, but at least one.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst is None:
+            burst = max(1, int(rate))
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        super(RateLimiter, self).__init__()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._timer: Optional[TimerHandle] = None
+
+    def __repr__(self):
+        return '<%s at %#x rate=%r burst=%d waiters=%d>' % (
+            type(self).__name__, id(self), self.rate, self.burst, len(self._waiters))
+
+    def _check_weight(self, weight: int) -> None:
+        if not 0 < weight <= self.burst:
+            raise ValueError("weight must be between 1 and the burst size")
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _available(self) -> float:
+        return self._tokens
+
+    def _take(self, weight: int) -> None:
+        self._tokens -= weight
+
+    def _give_back(self, weight: int) -> None:
+        with self._mutex:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + weight)
+        self._dispatch()
+
+    def _waiting(self) -> None:
+        # Keeps a single timer armed for the first waiter.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters and self._waiters[0][0].done():
+            self._waiters.popleft()
+        if not self._waiters:
+            return
+
+        missing = self._waiters[0][1] - self._tokens
+        # Waiters are woken on a worker thread, not on the timer thread.
+        self._timer = call_later(max(missing, 0) / self.rate, submit, self._dispatch, None)
+
+    async def _run(self, weight, func, args, kwargs):
+        await self.acquire(weight)
+        return await func(*args, **kwargs)
+
+
+class ConcurrencyLimiter(_ContextManagerMixin, _Limiter):
+    """
+    A weighted semaphore whose waiters are parked as futures instead of threads.
+
+    At most n permits are held at any time. ``async with`` and ``with``
+    take a single permit.
+    """
+
+    def __init__(self, n: int):
+        """
+        :param n: The number of permits.
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        super(ConcurrencyLimiter, self).__init__()
+        self.n = n
+        self._value = n
+
+    def __repr__(self):
+        return '<%s at %#x value=%d/%d waiters=%d>' % (
+            type(self).__name__, id(self), self._value, self.n, len(self._waiters))
+
+    def release(self, weight: int = 1) -> None:
+        """
+        Returns permits and hands them to the waiters that fit, in order.
+
+        :param weight: The number of permits to return.
+        :raises ValueError: If more permits are returned than have been taken.
+        """
+        with self._mutex:
+            if self._value + weight > self.n:
+                raise ValueError("ConcurrencyLimiter released too many permits")
+            self._value += weight
+        self._dispatch()
+
+    def _check_weight(self, weight: int) -> None:
+        if not 0 < weight <= self.n:
+            raise ValueError("weight must be between 1 and the number of permits")
+
+    def _available(self) -> float:
+        return self._value
+
+    def _take(self, weight: int) -> None:
+        self._value -= weight
+
+    def _give_back(self, weight: int) -> None:
+        self.release(weight)
+
+    async def _run(self, weight, func, args, kwargs):
+        acquired = self.acquire(weight)
+        try:
+            await acquired
+            return await func(*args, **kwargs)
+        finally:
+            # If the task is cancelled after the permits were handed over,
+            # they still have to be returned.
+            if not acquired.cancelled():
+                self.release(weight)
@@ -0,0 +1,428 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+from collections import deque
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Deque, List, Optional
+
+from yakusoku.context import _is_running
+from yakusoku.future import InvalidStateError, SlimFuture, _await_, _to_aiofuture
+from yakusoku.coroutines import run_coroutine
+from yakusoku.operations import resolve
+from yakusoku.typings import AbstractFuture
+
+__all__ = [
+    "Lock", "Event", "Condition", "Semaphore", "BoundedSemaphore"
+]
+
+
+# Handed out for every acquisition that does not have to wait.
+_ACQUIRED = resolve(True)
+
+
+_wakeups = threading.local()
+
+
+def _wake(waiter: AbstractFuture[Any], on_cancelled: Optional[Callable[[], None]] = None, result: Any = True) -> None:
+    """
+    Resolves a waiter that has been taken from a queue.
+
+    Waking a waiter may resume its task right away, which may wake the
+    next waiter and so on. Wakeups that happen while another one runs on
+    the same thread are queued and run one after another instead, so a
+    long chain of waiters does not grow the stack.
+
+    :param waiter:       The waiter to resolve.
+    :param on_cancelled: Called if the waiter has been cancelled in the meantime.
+    :param result:       The value to resolve the waiter with.
+    """
+    queue = getattr(_wakeups, 'queue', None)
+    if queue is not None:
+        queue.append((waiter, on_cancelled, result))
+        return
+
+    queue = _wakeups.queue = deque([(waiter, on_cancelled, result)])
+    try:
+        while queue:
+            waiter, on_cancelled, result = queue.popleft()
+            try:
+                waiter.set_result(result)
+            except InvalidStateError:
+                if on_cancelled is not None:
+                    on_cancelled()
+    finally:
+        _wakeups.queue = None
+
+
+class _ContextManagerMixin(object):
+    """
+    Allows ``async with`` inside coroutines and ``with`` in threads.
+
+    The ``with`` form blocks the current thread until the primitive is acquired.
+    """
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        # A coroutine that does not await, so releasing works even while
+        # the task of the caller is being closed.
+        self.release()
+
+    def __enter__(self) -> None:
+        self.acquire().result()
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class _FifoSemaphore(_ContextManagerMixin):
+    """
+    The counter and the FIFO queue of waiters shared by all semaphores.
+    """
+
+    def __init__(self, value: int):
+        self._mutex = threading.Lock()
+        self._value = value
+        # Waiters are only queued while the counter is zero.
+        self._waiters: Deque[AbstractFuture[bool]] = deque()
+
+    def __repr__(self):
+        return '<%s at %#x value=%d waiters=%d>' % (type(self).__name__, id(self), self._value, len(self._waiters))
+
+    def acquire(self) -> AbstractFuture[bool]:
+        """
+        Acquires the primitive.
+
+        The returned future resolves with True once it has been acquired.
+        Waiters are served in the order they called this method. Cancelling
+        the future gives up the place in the queue.
+
+        :return: A future that resolves once the primitive has been acquired.
+        """
+        with self._mutex:
+            if self._value > 0:
+                self._value -= 1
+                return _ACQUIRED
+
+            waiter: AbstractFuture[bool] = SlimFuture()
+            self._waiters.append(waiter)
+        return waiter
+
+    def release(self) -> None:
+        """
+        Releases the primitive and hands it to the first waiter, if any.
+        """
+        self._hand_over()
+
+    def _hand_over(self) -> None:
+        with self._mutex:
+            waiter = None
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    break
+                waiter = None
+
+            if waiter is None:
+                self._check_release()
+                self._value += 1
+                return
+
+        # The counter stays at zero, the waiter takes over directly.
+        _wake(waiter, self._hand_over)
+
+    def _check_release(self) -> None:
+        pass
+
+
+class Semaphore(_FifoSemaphore):
+    """
+    A semaphore whose waiters are parked as futures instead of threads.
+
+    It can be used from threads, yakusoku tasks and asyncio coroutines.
+    """
+
+    def __init__(self, value: int = 1):
+        """
+        :param value: The initial value of the counter.
+        """
+        if value < 0:
+            raise ValueError("Semaphore initial value must be >= 0")
+        super(Semaphore, self).__init__(value)
+
+    def locked(self) -> bool:
+        """
+        :return: True if the semaphore cannot be acquired right away.
+        """
+        return self._value == 0
+
+
+class BoundedSemaphore(Semaphore):
+    """
+    A semaphore that raises a :class:`ValueError` if it is released more often than acquired.
+    """
+
+    def __init__(self, value: int = 1):
+        """
+        :param value: The initial and maximal value of the counter.
+        """
+        super(BoundedSemaphore, self).__init__(value)
+        self._bound = value
+
+    def _check_release(self) -> None:
+        if self._value >= self._bound:
+            raise ValueError("BoundedSemaphore released too many times")
+
+
+class Lock(_FifoSemaphore):
+    """
+    A mutual exclusion lock whose waiters are parked as futures instead of threads.
+
+    It can be used from threads, yakusoku tasks and asyncio coroutines.
+    Unlike :class:`threading.Lock` it is not bound to a thread, so a task
+    may release it on another thread than it acquired it on.
+    """
+
+    def __init__(self):
+        super(Lock, self).__init__(1)
+
+    def locked(self) -> bool:
+        """
+        :return: True if the lock is held.
+        """
+        return self._value == 0
+
+    def release(self) -> None:
+        """
+        Releases the lock and hands it to the first waiter, if any.
+
+        :raises RuntimeError: If the lock is not held.
+        """
+        self._hand_over()
+
+    def _check_release(self) -> None:
+        if self._value >= 1:
+            raise RuntimeError("Lock is not acquired.")
+
+
+class Event(object):
+    """
+    An event whose waiters are parked as futures instead of threads.
+
+    It can be used from threads, yakusoku tasks and asyncio coroutines.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._flag = False
+        self._waiters: List[AbstractFuture[bool]] = []
+
+    def __repr__(self):
+        return '<%s at %#x %s>' % (type(self).__name__, id(self), 'set' if self._flag else 'unset')
+
+    def is_set(self) -> bool:
+        return self._flag
+
+    def set(self) -> None:
+        """
+        Sets the flag and wakes up all waiters.
+        """
+        with self._mutex:
+            self._flag = True
+            waiters, self._waiters = self._waiters, []
+
+        for waiter in waiters:
+            _wake(waiter)
+
+    def clear(self) -> None:
+        """
+        Resets the flag.
+        """
+        self._flag = False
+
+    def wait(self) -> AbstractFuture[bool]:
+        """
+        :return: A future that resolves with True once the flag is set.
+        """
+        with self._mutex:
+            if self._flag:
+                return _ACQUIRED
+
+            waiter: AbstractFuture[bool] = SlimFuture()
+            self._waiters.append(waiter)
+        return waiter
+
+
+class _ConditionWait(SlimFuture):
+    """
+    The future returned by :meth:`Condition.wait`.
+
+    Cancelling it stops waiting for a notification, but it is only settled
+    once the lock has been acquired again, so the caller always owns the
+    lock when the future is done.
+    """
+    __slots__ = ('_cond_lock', '_waiter', '_cancelling', '_reacquired')
+
+    def __init__(self, lock: 'Lock', waiter: AbstractFuture[bool]):
+        super(_ConditionWait, self).__init__()
+        self._cond_lock = lock
+        self._waiter = waiter
+        self._cancelling = False
+        self._reacquired = False
+        waiter.add_done_callback(self._on_notified)
+
+    def _on_notified(self, waiter: AbstractFuture[bool]) -> None:
+        if not waiter.cancelled():
+            self._cond_lock.acquire().add_done_callback(self._on_reacquired)
+
+    def _on_reacquired(self, _) -> None:
+        with self._lock:
+            self._reacquired = True
+            cancelling = self._cancelling
+        if cancelling:
+            SlimFuture.cancel(self)
+        else:
+            _wake(self)
+
+    def cancel(self) -> bool:
+        with self._lock:
+            if self._reacquired:
+                return self.cancelled()
+            if self._cancelling:
+                return True
+            self._cancelling = True
+
+        if self._waiter.cancel():
+            # Not notified yet, so nobody acquires the lock for us.
+            self._cond_lock.acquire().add_done_callback(self._on_reacquired)
+        return True
+
+    def __await__(self):
+        if _is_running() or self.done():
+            return (yield from _await_(self))
+
+        from asyncio import CancelledError as AIOCancelledError
+        cancelled = (CancelledError, AIOCancelledError)
+        try:
+            return (yield from _to_aiofuture(self))
+        except cancelled as e:
+            # The asyncio task has been cancelled, which cancels this future as
+            # well. Like asyncio.Condition.wait, only give up once the lock is
+            # held again, so leaving the async with-block releases our lock.
+            while not self.done():
+                try:
+                    yield from _to_aiofuture(self)
+                except cancelled:
+                    pass
+            # Not a bare raise, as Python 3.6 forgets it across the yields.
+            raise e
+
+    __iter__ = __await__
+
+
+class Condition(_ContextManagerMixin):
+    """
+    A condition variable whose waiters are parked as futures instead of threads.
+
+    It can be used from threads, yakusoku tasks and asyncio coroutines.
+    """
+
+    def __init__(self, lock: Optional[Lock] = None):
+        """
+        :param lock: The lock to use. A new one is created if none is given.
+        """
+        if lock is None:
+            lock = Lock()
+        self._lock = lock
+        self._mutex = threading.Lock()
+        self._waiters: Deque[AbstractFuture[bool]] = deque()
+
+        self.acquire = lock.acquire
+        self.release = lock.release
+        self.locked = lock.locked
+
+    def __repr__(self):
+        return '<%s at %#x waiters=%d>' % (type(self).__name__, id(self), len(self._waiters))
+
+    def wait(self) -> AbstractFuture[bool]:
+        """
+        Releases the lock, waits until notified and acquires the lock again.
+
+        Cancelling the returned future stops waiting, but the future is only
+        settled as cancelled once the lock has been acquired again, just like
+        with :class:`asyncio.Condition`. So the caller owns the lock once the
+        future is done either way, and has to release it.
+
+        :return: A future that resolves with True once notified and the lock is held again.
+        :raises RuntimeError: If the lock is not held.
+        """
+        if not self._lock.locked():
+            raise RuntimeError("cannot wait on un-acquired lock")
+
+        waiter: AbstractFuture[bool] = SlimFuture()
+        result = _ConditionWait(self._lock, waiter)
+        with self._mutex:
+            self._waiters.append(waiter)
+
+        self._lock.release()
+        return result
+
+    def wait_for(self, predicate: Callable[[], bool]) -> AbstractFuture[bool]:
+        """
+        Waits until the predicate becomes true.
+
+        :param predicate: Checked with the lock held, first right away and then after every notification.
+        :return: A future that resolves with the last value of the predicate.
+        """
+        async def _wait_for():
+            result = predicate()
+            while not result:
+                await self.wait()
+                result = predicate()
+            return result
+        return run_coroutine(_wait_for())
+
+    def notify(self, n: int = 1) -> None:
+        """
+        Wakes up to n waiters.
+
+        :param n: The number of waiters to wake.
+        :raises RuntimeError: If the lock is not held.
+        """
+        if not self._lock.locked():
+            raise RuntimeError("cannot notify on un-acquired lock")
+
+        for _ in range(n):
+            if not self._notify_one():
+                return
+
+    def _notify_one(self) -> bool:
+        with self._mutex:
+            if not self._waiters:
+                return False
+            waiter = self._waiters.popleft()
+        # A cancelled waiter passes the notification on.
+        _wake(waiter, self._notify_one)
+        return True
+
+    def notify_all(self) -> None:
+        """
+        Wakes up all waiters.
+
+        :raises RuntimeError: If the lock is not held.
+        """
+        self.notify(len(self._waiters))
@@ -0,0 +1,235 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import deque
+from threading import Lock, Thread
+from weakref import WeakKeyDictionary, ref
+from typing import Any, Awaitable, Callable
+
+try:
+    from contextvars import copy_context
+except ImportError:
+    copy_context = None
+
+from yakusoku.typings import AbstractFuture, T
+
+__all__ = [
+    "LoopBridge", "get_loop_bridge", "call_soon_threadsafe",
+    "get_background_loop", "run_in_background"
+]
+
+
+class LoopBridge(object):
+    """
+    Coalesces callbacks sent to an asyncio event loop from other threads.
+
+    Callbacks are put into a deque. Only the first callback of a batch
+    wakes up the loop, which then runs the whole batch in a single loop
+    callback. This saves a write to the self-pipe of the loop for every
+    other callback of the batch.
+
+    Like :meth:`asyncio.AbstractEventLoop.call_soon_threadsafe`, every
+    callback runs in a copy of the context it was scheduled from.
+    """
+    __slots__ = ('_loop', '_queue', '_scheduled', 'batch_size', '__weakref__')
+
+    def __init__(self, loop, batch_size: int = 1024):
+        """
+        :param loop:       The asyncio event loop.
+        :param batch_size: The maximal number of callbacks to run before yielding to the loop.
+        """
+        self.batch_size = batch_size
+        self._loop = ref(loop)
+        self._queue = deque()
+        self._scheduled = False
+
+    @property
+    def loop(self):
+        return self._loop()
+
+    def call_soon_threadsafe(self, callback: Callable[..., Any], *args: Any) -> None:
+        """
+        Schedules a callback on the loop. Can be called from any thread.
+
+        :param callback: The callback to run on the loop.
+        :param args:     The arguments to pass to the callback.
+        :raises RuntimeError: If the loop has been closed.
+        """
+        context = copy_context() if copy_context is not None else None
+        self._queue.append((context, callback, args))
+
+        # Appending happens before checking the flag, and _drain resets the
+        # flag before it empties the queue. So either a pending drain will
+        # see the callback, or we schedule a new one.
+        if self._scheduled:
+            return
+
+        loop = self._loop()
+        if loop is None:
+            raise RuntimeError("Event loop is closed")
+
+        self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            self._scheduled = False
+            raise
+
+    def _drain(self):
+        self._scheduled = False
+        queue = self._queue
+        popleft = queue.popleft
+
+        for _ in range(min(len(queue), self.batch_size)):
+            context, callback, args = popleft()
+            try:
+                if context is None:
+                    callback(*args)
+                else:
+                    context.run(callback, *args)
+            except Exception as e:
+                self._loop().call_exception_handler({
+                    'message': 'Exception in callback %r' % (callback,),
+                    'exception': e,
+                })
+
+        if queue and not self._scheduled:
+            # Let other loop callbacks run before handling the rest.
+            self._scheduled = True
+            self._loop().call_soon(self._drain)
+
+
+_bridges: 'WeakKeyDictionary[Any, LoopBridge]' = WeakKeyDictionary()
+_bridges_lock = Lock()
+
+
+def get_loop_bridge(loop) -> LoopBridge:
+    """
+    Returns the :class:`LoopBridge` of the given event loop.
+
+    :param loop: The asyncio event loop.
+    :return: The bridge of this loop.
+    """
+    bridge = _bridges.get(loop)
+    if bridge is None:
+        with _bridges_lock:
+            bridge = _bridges.get(loop)
+            if bridge is None:
+                bridge = _bridges[loop] = LoopBridge(loop)
+    return bridge
+
+
+def call_soon_threadsafe(loop, callback: Callable[..., Any], *args: Any) -> None:
+    """
+    Schedules a callback on the given loop through its :class:`LoopBridge`.
+
+    :param loop:     The asyncio event loop.
+    :param callback: The callback to run on the loop.
+    :param args:     The arguments to pass to the callback.
+    :raises RuntimeError: If the loop has been closed.
+    """
+    get_loop_bridge(loop).call_soon_threadsafe(callback, *args)
+
+
+_background_loop = None
+_background_lock = Lock()
+
+
+def _run_forever(loop) -> None:
+    from asyncio import set_event_loop
+    set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_background_loop():
+    """
+    Returns the shared asyncio event loop that runs on a background thread.
+
+    The loop and its daemon thread are created on first use. Use it to run
+    asyncio-only libraries from threaded code instead of running an event
+    loop per thread.
+
+    :return: The running background loop.
+    """
+    global _background_loop
+    loop = _background_loop
+    if loop is None or loop.is_closed():
+        with _background_lock:
+            loop = _background_loop
+            if loop is None or loop.is_closed():
+                from asyncio import new_event_loop
+                loop = new_event_loop()
+                Thread(target=_run_forever, args=(loop,), name="yakusoku-loop", daemon=True).start()
+                _background_loop = loop
+    return loop
+
+
+def run_in_background(awaitable: Awaitable[T], loop=None) -> AbstractFuture[T]:
+    """
+    Runs an asyncio awaitable on the background loop.
+
+    Submissions from other threads are batched through the :class:`LoopBridge`
+    of the loop. The returned future can be awaited in yakusoku tasks and
+    waited for from any thread. Cancelling it cancels the asyncio task.
+
+    Tasks do not send asyncio awaitables here on their own: a coroutine
+    only shows whether it needs an event loop once it runs, and by then it
+    runs on the thread of the task. Wrap those awaitables in this function,
+    or run the whole task on the loop with ``futurize(loop=get_background_loop())``::
+
+        @futurize
+        async def lookup(key):
+            row = await run_in_background(db.fetch(key))
+            ...
+
+    :param awaitable: The coroutine or asyncio future to run.
+    :param loop:      The loop to run it on. Defaults to :func:`get_background_loop`.
+    :return: A future that resolves with the result of the awaitable.
+    """
+    from asyncio import ensure_future
+    from yakusoku.future import InvalidStateError, SlimFuture
+
+    if loop is None:
+        loop = get_background_loop()
+    result: AbstractFuture[T] = SlimFuture()
+
+    def _finish(task):
+        try:
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+        except InvalidStateError:
+            # The result has been cancelled in the meantime.
+            pass
+
+    def _start():
+        if result.cancelled():
+            if hasattr(awaitable, 'close'):
+                awaitable.close()
+            return
+
+        task = ensure_future(awaitable, loop=loop)
+        task.add_done_callback(_finish)
+
+        def _propagate_cancel(_):
+            if result.cancelled() and not task.done():
+                call_soon_threadsafe(loop, task.cancel)
+        result.add_done_callback(_propagate_cancel)
+
+    call_soon_threadsafe(loop, _start)
+    return result
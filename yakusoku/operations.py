@@ -13,26 +13,35 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import sys
 import functools
+from itertools import count
 from numbers import Real
 from types import coroutine
-from typing import Callable, Sequence
-from threading import Timer, Thread, Lock
-from concurrent.futures import Future, TimeoutError, CancelledError
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+from threading import Lock
+from concurrent.futures import Executor, Future, TimeoutError, CancelledError
 from concurrent.futures import ALL_COMPLETED, FIRST_EXCEPTION, FIRST_COMPLETED
 
 from yakusoku.typings import AbstractFuture, T
 from yakusoku.typings import PromiseCoroutineFunction, FutureOrCoroutine
 from yakusoku.typings import DoneAndNotDoneFutures
 
+from yakusoku.timer import call_later
+from yakusoku.loop import call_soon_threadsafe
+from yakusoku.executor import submit
 from yakusoku.coroutines import run_coroutine
-from yakusoku.future import wrap_future, copy
+from yakusoku.future import InvalidStateError, wrap_future, copy, SlimFuture
+from yakusoku.streams import CompletionStream
 
 __all__ = [
     "resolve", "reject",
     "futurize", "synchronize",
     "sleep",
-    "shield", "wait_for"
+    "shield", "wait_for",
+    "wait", "gather",
+    "gather_reduce", "reduce_completed",
+    "race", "hedge"
 ]
 
 
@@ -43,7 +52,7 @@ def resolve(data: T = None) -> AbstractFuture[T]:
     :param data: The value to assign
     :return: A future resulting in the data.
     """
-    fut: AbstractFuture[T] = Future()
+    fut: AbstractFuture[T] = SlimFuture()
     fut.set_result(data)
     return fut
 
@@ -55,20 +64,33 @@ def reject(exc: BaseException) -> AbstractFuture[None]:
     :param exc: The exception to throw.
     :return: A future that throws the given exception.
     """
-    fut: AbstractFuture[None] = Future()
+    fut: AbstractFuture[None] = SlimFuture()
     fut.set_exception(exc)
     return fut
 
 
-def futurize(func: PromiseCoroutineFunction[T], *, spawn=True) -> Callable[..., AbstractFuture[T]]:
+def futurize(
+        func: PromiseCoroutineFunction[T] = None, *,
+        spawn=True,
+        executor: Optional[Executor] = None,
+        loop=None
+) -> Callable[..., AbstractFuture[T]]:
     """
     Makes this coroutine a function that returns a Future instead of a
     coroutine-object.
 
-    :param func:  The function to convert.
-    :param spawn: If true, this function will spawn a new thread to execute the functions.
+    When called without a function, it returns a decorator, so it can be
+    used as ``@futurize(executor=pool)``.
+
+    :param func:     The function to convert.
+    :param spawn:    If true, this function will execute the function on the worker pool.
+    :param executor: If given, the coroutine starts and resumes on this executor.
+    :param loop:     If given, the coroutine runs as callbacks of this asyncio event loop.
     :return: The function that returns a future.
     """
+    if func is None:
+        return functools.partial(futurize, spawn=spawn, executor=executor, loop=loop)
+
     func = coroutine(func)
 
     async def wrapped(coro):
@@ -79,6 +101,9 @@ def futurize(func: PromiseCoroutineFunction[T], *, spawn=True) -> Callable[...,
     @functools.wraps(func)
     def _wrapper(*args, **kwargs) -> Callable[..., AbstractFuture[T]]:
         c = func(*args, **kwargs)
+        if executor is not None or loop is not None:
+            # The first step already runs on the executor or the loop.
+            return run_coroutine(c, executor=executor, loop=loop)
         return run_coroutine(wrapped(c))
 
     return _wrapper
@@ -101,10 +126,15 @@ def synchronize(func: PromiseCoroutineFunction[T]) -> Callable[..., T]:
 
 
 class _SleepForceThreadSwitch(Future):
+    """
+    A future whose callbacks run on the worker pool of :mod:`yakusoku.executor`.
+    """
+    # Tasks must not resume inline on this future, even if it is already done.
+    _resume_inline = False
 
     def add_done_callback(self, fn):
         def _fn(_):
-            Thread(target=fn, args=(self,)).start()
+            submit(fn, self)
         return super(_SleepForceThreadSwitch, self).add_done_callback(_fn)
 
 
@@ -112,7 +142,10 @@ def sleep(delay: Real, result: T = None, *, also_return_timer=False) -> Abstract
     """
     Returns a future that resolves after the given amount of time.
 
-    :param delay: The delay to wait. If zero, the future will just resolve in a new thread.
+    Non-zero delays are scheduled on the shared timer service,
+    so sleeping does not cost a thread.
+
+    :param delay: The delay to wait. If zero, the future will just resolve on a worker thread.
     :param result: The value that the future will resolve with.
     :param also_return_timer: Internal, do not use.
     :return: A future that resolves with the given result after a set amount of time.
@@ -121,15 +154,20 @@ def sleep(delay: Real, result: T = None, *, also_return_timer=False) -> Abstract
         if fut.cancelled():
             t.cancel()
 
+    def _fire():
+        # Claiming the future first keeps a concurrent cancel from being
+        # overwritten, which set_result does not guard against before 3.8.
+        if fut.set_running_or_notify_cancel():
+            fut.set_result(result)
+
     if delay == 0:
         fut: AbstractFuture[T] = _SleepForceThreadSwitch()
         fut.set_result(result)
         t = None
     else:
         fut: AbstractFuture[T] = Future()
+        t = call_later(float(delay), _fire)
         fut.add_done_callback(_expire)
-        t = Timer(float(delay), lambda: fut.set_result(result))
-        t.start()
 
     if also_return_timer:
         return fut, t
@@ -149,21 +187,25 @@ def wait_for(fut: FutureOrCoroutine[T], timeout: float) -> AbstractFuture[T]:
     :return: A new future that will be cancelled after the given timeout.
     """
 
-    def _expire(_):
+    def _expire():
         """Cancel future on expiry; fire a timeout exception."""
         if not fut.done():
             fut.cancel()
-            result.set_exception(TimeoutError())
+            try:
+                result.set_exception(TimeoutError())
+            except InvalidStateError:
+                # The result has been settled in the meantime.
+                pass
 
     def _complete(_):
         """Cancel the timeouter when future within the timeout."""
-        timeouter.cancel()
+        if timeouter is not None:
+            timeouter.cancel()
 
-    result: AbstractFuture[T] = Future()
-    timeouter = sleep(timeout) if timeout else Future()
+    result: AbstractFuture[T] = SlimFuture()
     fut = wrap_future(fut)
+    timeouter = call_later(float(timeout), _expire) if timeout else None
 
-    timeouter.add_done_callback(_expire)
     result.add_done_callback(_complete)
 
     copy(fut, result, copy_cancel=False)
@@ -187,12 +229,52 @@ def shield(fut: FutureOrCoroutine[T]) -> AbstractFuture[T]:
         if fut.cancelled():
             target.set_exception(CancelledError())
 
-    target: AbstractFuture[T] = Future()
+    target: AbstractFuture[T] = SlimFuture()
     copy(fut, wrap_future(target), copy_cancel=False)
     fut.add_done_callback(_bubble_child)
     return target
 
 
+def _running_loop_of(futs: Sequence[Any]):
+    """
+    Returns the running event loop if every future is an asyncio future of that loop.
+
+    Such futures can be combined with plain loop callbacks instead of being
+    bridged one by one.
+    """
+    if not futs or 'asyncio' not in sys.modules:
+        return None
+
+    from asyncio import _get_running_loop, isfuture
+    loop = _get_running_loop()
+    if loop is None:
+        return None
+
+    for fut in futs:
+        if not isfuture(fut) or getattr(fut, '_loop', None) is not loop:
+            return None
+    return loop
+
+
+def _call_on_loop(loop, callback: Callable[..., Any], *args: Any) -> None:
+    from asyncio import _get_running_loop
+    if _get_running_loop() is loop:
+        callback(*args)
+    else:
+        call_soon_threadsafe(loop, callback, *args)
+
+
+def _settled(fut: AbstractFuture[T]) -> AbstractFuture[T]:
+    """
+    Copies the outcome of a finished asyncio future into a future that can be used from any thread.
+    """
+    if fut.cancelled():
+        return reject(CancelledError())
+    if fut.exception() is not None:
+        return reject(fut.exception())
+    return resolve(fut.result())
+
+
 def wait(
         futs_or_coros: Sequence[FutureOrCoroutine[T]],
         timeout: Real = 0,
@@ -218,29 +300,41 @@ def wait(
     that have finished until the wait-future resolved and `not_done`
     with all futures that still run.
 
+    If called on an asyncio event loop with only futures of that loop,
+    they are waited for natively on the loop. The futures in the result
+    are then copies that can be used from any thread.
+
     :param futs_or_coros: The futures and/or coroutines to wait for.
     :param timeout:       The maximal time to wait for them.
     :param return_when:   When to return.
     :return: A future that will resolve-conditions have passed.
     """
-    cond = Future()
-    result = Future()
+    cond = SlimFuture()
+    result = SlimFuture()
+    futs = list(futs_or_coros)
+    loop = _running_loop_of(futs)
+    if loop is None:
+        futs = list(map(wrap_future, futs))
     finished = []
-    running = list(map(wrap_future, futs_or_coros))
+    # One slot per input, so a completion never has to search for its future.
+    completed = bytearray(len(futs))
     lock = Lock()
 
-    def _single_finishes(fut: AbstractFuture[T]):
+    def _single_finishes(index: int, fut: AbstractFuture[T]):
         if cond.done():
             return
 
         with lock:
-            running.remove(fut)
+            if cond.done():
+                return
+
+            completed[index] = 1
             if fut.cancelled():
                 fut = reject(CancelledError())
+            elif loop is not None:
+                fut = _settled(fut)
             finished.append(fut)
 
-            empty = not running
-
             if return_when == FIRST_COMPLETED:
                 cond.set_result(None)
                 return
@@ -249,31 +343,47 @@ def wait(
                 cond.set_result(None)
                 return
 
-            if empty:
+            if len(finished) == len(futs):
                 cond.set_result(None)
 
-    for f in running[:]:
-        f.add_done_callback(_single_finishes)
+    for i, f in enumerate(futs):
+        f.add_done_callback(functools.partial(_single_finishes, i))
 
-    def _timeout(_):
-        if result.done():
-            return
-        cond.set_result(None)
+    def _timeout():
+        with lock:
+            if cond.done():
+                return
+            cond.set_result(None)
 
     def _completes(_):
+        if timeouter is not None:
+            if loop is not None:
+                _call_on_loop(loop, timeouter.cancel)
+            else:
+                timeouter.cancel()
         if result.cancelled():
             return
+
+        # cond is only resolved under the lock, so the slots are final by now.
+        running = [f for f, c in zip(futs, completed) if not c]
+        if loop is not None:
+            running = list(map(wrap_future, running))
         result.set_result(DoneAndNotDoneFutures(done=finished, not_done=running))
 
-    timeouter = sleep(timeout, None) if timeout else Future()
-    timeouter.add_done_callback(_timeout)
-    copy(result, timeouter, copy_result=False)
+    if not futs:
+        cond.set_result(None)
+
+    if not timeout or cond.done():
+        timeouter = None
+    elif loop is not None:
+        timeouter = loop.call_later(float(timeout), _timeout)
+    else:
+        timeouter = call_later(float(timeout), _timeout)
 
     # Copy cancel state to cond.
     copy(result, cond, copy_result=False)
     cond.add_done_callback(_completes)
 
-
     return result
 
 
@@ -284,54 +394,337 @@ def gather(
     """
     Gathers the results of the exceptions.
 
+    If called on an asyncio event loop with only futures of that loop,
+    they are gathered natively on the loop and only the returned future
+    has to cross threads.
+
     :param futs_or_coros:      The futures whose results are to be gathered.
     :param return_exceptions:  If false, if a future rejects, the gather future will reject.
     :return: A future that gathers the results.
     """
-    if return_exceptions:
-        wait_mode = ALL_COMPLETED
-    else:
-        wait_mode = FIRST_EXCEPTION
+    futs = list(futs_or_coros)
+    loop = _running_loop_of(futs)
+    if loop is None:
+        futs = list(map(wrap_future, futs))
+    results = [None] * len(futs)
+    # next() on a count is atomic, so completions do not need a lock to count.
+    finished = count(1)
+    lock = Lock()
+
+    def _cancel_pending():
+        for fut in futs:
+            if fut.done():
+                continue
+            fut.cancel()
+
+    def _propagate_cancel(_):
+        if not result.cancelled():
+            return
+
+        if loop is not None:
+            # Futures of the loop may only be touched on the loop.
+            _call_on_loop(loop, _cancel_pending)
+        else:
+            _cancel_pending()
+
+    def _reject(exc: BaseException):
+        with lock:
+            if not result.done():
+                result.set_exception(exc)
+
+    def _single_finishes(index: int, fut: AbstractFuture[T]):
+        if result.done():
+            return
 
-    futs = list(map(wrap_future, futs_or_coros))
+        if fut.cancelled():
+            exc = CancelledError()
+        else:
+            exc = fut.exception()
+
+        if exc is None:
+            results[index] = fut.result()
+        elif return_exceptions:
+            results[index] = exc
+        else:
+            _reject(exc)
+            return
+
+        if next(finished) == len(futs):
+            with lock:
+                if not result.done():
+                    result.set_result(results)
+
+    result: AbstractFuture[Sequence[T]] = SlimFuture()
+    result.add_done_callback(_propagate_cancel)
+
+    if not futs:
+        result.set_result(results)
+
+    for i, f in enumerate(futs):
+        f.add_done_callback(functools.partial(_single_finishes, i))
+
+    return result
+
+
+def gather_reduce(
+        reducer: Callable[[Any, T], Any],
+        initial: Any,
+        *futs_or_coros: FutureOrCoroutine[T]
+) -> AbstractFuture[Any]:
+    """
+    Folds the results of the futures in their order, as soon as they arrive.
+
+    Unlike :func:`gather`, no result list is built. A result is only kept
+    until all results before it have been folded, and every future is
+    released once it finished.
+
+    The reducer runs on the thread that finishes a future, one call at
+    a time. If a future or the reducer fails, the returned future rejects.
+
+    :param reducer:       Called with the accumulator and a result. Returns the new accumulator.
+    :param initial:       The initial accumulator.
+    :param futs_or_coros: The futures whose results are to be folded.
+    :return: A future resolving with the final accumulator.
+    """
+    lock = Lock()
+    pending: Dict[int, AbstractFuture[T]] = {}
+    buffered: Dict[int, T] = {}
+    accumulator = initial
+    next_index = 0
+    # One extra count keeps the result pending until all inputs are registered.
+    remaining = 1
 
     def _propagate_cancel(_):
         if not result.cancelled():
             return
 
+        with lock:
+            futs = list(pending.values())
+            pending.clear()
         for fut in futs:
-            if fut.done():
-                continue
             fut.cancel()
 
-    def _gather_result(_):
-        result_list = []
-        for fut in futs:
-            if fut.cancelled():
-                if return_exceptions:
-                    result_list.append(CancelledError())
-                    continue
+    def _finish_one():
+        nonlocal remaining
+        remaining -= 1
+        if remaining == 0:
+            result.set_result(accumulator)
 
-                result.set_exception(CancelledError())
-                break
+    def _single_finishes(index: int, fut: AbstractFuture[T]):
+        nonlocal accumulator, next_index
+        with lock:
+            pending.pop(index, None)
+            if result.done():
+                return
 
-            if fut.exception() is None:
-                result_list.append(fut.result())
-                continue
+            if fut.cancelled():
+                result.set_exception(CancelledError())
+                return
+            if fut.exception() is not None:
+                result.set_exception(fut.exception())
+                return
 
-            if return_exceptions:
-                result_list.append(fut.exception())
-                continue
+            buffered[index] = fut.result()
+            try:
+                while next_index in buffered:
+                    accumulator = reducer(accumulator, buffered.pop(next_index))
+                    next_index += 1
+            except BaseException as e:
+                result.set_exception(e)
+                return
 
-            result.set_exception(fut.exception())
-            break
-        result.set_result(result_list)
+            _finish_one()
 
-    result: AbstractFuture[Sequence[T]] = Future()
+    result: AbstractFuture[Any] = SlimFuture()
     result.add_done_callback(_propagate_cancel)
 
-    waiter: AbstractFuture[DoneAndNotDoneFutures] = wait(futs, return_when=wait_mode)
-    waiter.add_done_callback(_gather_result)
+    for i, f in enumerate(futs_or_coros):
+        fut = wrap_future(f)
+        with lock:
+            remaining += 1
+            pending[i] = fut
+        fut.add_done_callback(functools.partial(_single_finishes, i))
+
+    with lock:
+        if not result.done():
+            _finish_one()
+
+    return result
+
+
+def reduce_completed(
+        reducer: Callable[[Any, T], Any],
+        initial: Any,
+        futs_or_coros: Iterable[FutureOrCoroutine[T]], *,
+        concurrency: Optional[int] = None
+) -> AbstractFuture[Any]:
+    """
+    Folds the results of the futures in the order they complete.
+
+    Inputs are pulled lazily. With a concurrency limit, at most that many
+    inputs are in flight, so memory does not grow with the number of inputs.
+
+    If a future or the reducer fails, or the returned future is cancelled,
+    the inputs still running are cancelled.
+
+    :param reducer:       Called with the accumulator and a result. Returns the new accumulator.
+    :param initial:       The initial accumulator.
+    :param futs_or_coros: The futures and/or coroutines whose results are to be folded.
+    :param concurrency:   The maximal number of inputs in flight. None only works for inputs with a length and does not limit them.
+    :return: A future resolving with the final accumulator.
+    """
+    async def _reduce():
+        accumulator = initial
+        with CompletionStream(futs_or_coros, window=concurrency, results=True) as stream:
+            async for value in stream:
+                accumulator = reducer(accumulator, value)
+        return accumulator
+
+    return run_coroutine(_reduce())
+
+
+def race(*futs_or_coros: FutureOrCoroutine[T]) -> AbstractFuture[T]:
+    """
+    Resolves with the result of the first future that succeeds.
+
+    Once the returned future is done, the other futures are cancelled.
+    Failed futures do not end the race; only if all of them fail, the
+    returned future rejects with the exception of the first failure.
+
+    :param futs_or_coros: The futures and/or coroutines to race.
+    :return: A future resolving with the first result.
+    """
+    futs = [wrap_future(f) for f in futs_or_coros]
+    if not futs:
+        raise ValueError("race() needs at least one future.")
+
+    failed = count(1)
+    errors = []
+
+    def _cancel_losers(_):
+        for fut in futs:
+            if not fut.done():
+                fut.cancel()
 
-    copy(result, waiter, copy_result=False)
+    def _single_finishes(fut: AbstractFuture[T]):
+        if result.done():
+            return
+
+        if not fut.cancelled() and fut.exception() is None:
+            try:
+                result.set_result(fut.result())
+            except InvalidStateError:
+                pass
+            return
+
+        errors.append(CancelledError() if fut.cancelled() else fut.exception())
+        if next(failed) == len(futs):
+            try:
+                result.set_exception(errors[0])
+            except InvalidStateError:
+                pass
+
+    result: AbstractFuture[T] = SlimFuture()
+    result.add_done_callback(_cancel_losers)
+    for f in futs:
+        f.add_done_callback(_single_finishes)
+    return result
+
+
+def hedge(
+        factory: Callable[[], FutureOrCoroutine[T]],
+        delay: float,
+        max_attempts: int = 2
+) -> AbstractFuture[T]:
+    """
+    Starts another attempt whenever the running ones take longer than the delay.
+
+    The first attempt starts right away. Every delay seconds without a
+    result, another one is started, up to max_attempts. The first result
+    wins and the other attempts are cancelled. A failed attempt starts the
+    next one right away; only if all attempts fail, the returned future
+    rejects with the exception of the first failure.
+
+    A good delay is a high percentile of the usual latency, like the 95th,
+    so only the slowest calls are duplicated.
+
+    :param factory:      Called without arguments to start an attempt. Returns a future or a coroutine.
+    :param delay:        The number of seconds to wait for a result before starting another attempt.
+    :param max_attempts: The maximal number of attempts.
+    :return: A future resolving with the result of the fastest attempt.
+    """
+    if max_attempts < 1:
+        raise ValueError("max_attempts must be at least 1")
+
+    lock = Lock()
+    attempts = []
+    errors = []
+    timer = None
+
+    def _cleanup(_):
+        with lock:
+            running = [fut for fut in attempts if fut is not None]
+            if timer is not None:
+                timer.cancel()
+        for fut in running:
+            if not fut.done():
+                fut.cancel()
+
+    def _start():
+        nonlocal timer
+        with lock:
+            if result.done() or len(attempts) >= max_attempts:
+                return
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            # Reserve the slot, so concurrent starts do not overshoot.
+            attempts.append(None)
+            index = len(attempts) - 1
+
+        try:
+            fut = wrap_future(factory())
+        except Exception as e:
+            fut = SlimFuture()
+            fut.set_exception(e)
+
+        with lock:
+            attempts[index] = fut
+            if len(attempts) < max_attempts and not result.done():
+                # User code should not run on the timer thread.
+                timer = call_later(delay, submit, _start_later, None)
+
+        if result.done():
+            fut.cancel()
+        fut.add_done_callback(_attempt_finishes)
+
+    def _start_later(_):
+        _start()
+
+    def _attempt_finishes(fut: AbstractFuture[T]):
+        if result.done():
+            return
+
+        if not fut.cancelled() and fut.exception() is None:
+            try:
+                result.set_result(fut.result())
+            except InvalidStateError:
+                pass
+            return
+
+        with lock:
+            errors.append(CancelledError() if fut.cancelled() else fut.exception())
+            exhausted = len(errors) == max_attempts
+
+        if exhausted:
+            try:
+                result.set_exception(errors[0])
+            except InvalidStateError:
+                pass
+        else:
+            _start()
+
+    result: AbstractFuture[T] = SlimFuture()
+    result.add_done_callback(_cleanup)
+    _start()
     return result
@@ -0,0 +1,275 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import time
+from threading import Lock
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from yakusoku.future import InvalidStateError, SlimFuture
+from yakusoku.channel import Channel
+from yakusoku.coroutines import run_coroutine
+from yakusoku.typings import AbstractFuture, FutureOrCoroutine
+
+__all__ = [
+    "Pipeline", "PipelineRun", "StageStats"
+]
+
+
+class StageStats(NamedTuple):
+    name: str
+    # Items the stage finished, and items whose function failed.
+    processed: int
+    failed: int
+    # Items the stage is working on right now.
+    in_flight: int
+    # Items waiting in front of the stage.
+    queue_depth: int
+    # Processed items per second since the run started, until the stage finished.
+    throughput: float
+
+
+class _Stage(object):
+
+    def __init__(self, func: Callable[[Any], FutureOrCoroutine[Any]], name: str, concurrency: int, buffer: int):
+        self.func = func
+        self.name = name
+        self.concurrency = concurrency
+        self.buffer = buffer
+
+
+class _StageRun(object):
+
+    def __init__(self, stage: _Stage, inbox: Channel, outbox: Channel):
+        self.stage = stage
+        self.inbox = inbox
+        self.outbox = outbox
+        self.lock = Lock()
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.finished: Optional[float] = None
+
+    async def work(self):
+        func = self.stage.func
+        async for item in self.inbox:
+            with self.lock:
+                self.in_flight += 1
+            try:
+                result = await func(item)
+            except BaseException:
+                with self.lock:
+                    self.in_flight -= 1
+                    self.failed += 1
+                raise
+
+            with self.lock:
+                self.in_flight -= 1
+                self.processed += 1
+            await self.outbox.put(result)
+
+    def stats(self, started: float) -> StageStats:
+        elapsed = (self.finished or time.monotonic()) - started
+        return StageStats(
+            name=self.stage.name,
+            processed=self.processed,
+            failed=self.failed,
+            in_flight=self.in_flight,
+            queue_depth=self.inbox.qsize(),
+            throughput=self.processed / elapsed if elapsed > 0 else 0.0
+        )
+
+
+class PipelineRun(object):
+    """
+    A running pipeline.
+
+    Iterate it, with ``for`` in threads or ``async for`` in coroutines, to
+    receive the outputs of the last stage as they arrive. If a stage fails,
+    the whole run is cancelled and the iteration raises its exception once
+    the outputs produced so far have been consumed.
+    """
+
+    def __init__(self, stages: List[_Stage], iterable: Iterable[Any], buffer: int):
+        self.started = time.monotonic()
+        self.done: AbstractFuture[None] = SlimFuture()
+        self._error: Optional[BaseException] = None
+        self._tasks: List[AbstractFuture[Any]] = []
+        self._channels: List[Channel] = [Channel(stage.buffer) for stage in stages]
+        self._output: Channel = Channel(buffer)
+        self._channels.append(self._output)
+
+        self._stages = [
+            _StageRun(stage, inbox, outbox)
+            for stage, inbox, outbox in zip(stages, self._channels, self._channels[1:])
+        ]
+        self._remaining = len(self._stages)
+        self._lock = Lock()
+
+        # Start from the end, so every stage finds its consumers running.
+        for stage_run in reversed(self._stages):
+            self._start_stage(stage_run)
+        self._start_feeder(iterable)
+
+    def _start_stage(self, stage_run: _StageRun) -> None:
+        workers = [run_coroutine(stage_run.work()) for _ in range(stage_run.stage.concurrency)]
+        self._tasks.extend(workers)
+        remaining = [len(workers)]
+
+        def _worker_done(fut: AbstractFuture[Any]):
+            if not fut.cancelled() and fut.exception() is not None:
+                self._fail(fut.exception())
+                return
+
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            stage_run.finished = time.monotonic()
+            stage_run.outbox.close()
+            self._stage_done()
+
+        for worker in workers:
+            worker.add_done_callback(_worker_done)
+
+    def _start_feeder(self, iterable: Iterable[Any]) -> None:
+        inbox = self._channels[0]
+
+        async def _feed():
+            for item in iterable:
+                await inbox.put(item)
+
+        def _feeder_done(fut: AbstractFuture[Any]):
+            if not fut.cancelled() and fut.exception() is not None:
+                self._fail(fut.exception())
+            else:
+                inbox.close()
+
+        feeder = run_coroutine(_feed())
+        self._tasks.append(feeder)
+        feeder.add_done_callback(_feeder_done)
+
+    def _stage_done(self) -> None:
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining:
+                return
+        try:
+            self.done.set_result(None)
+        except InvalidStateError:
+            pass
+
+    def _fail(self, exc: BaseException) -> None:
+        with self._lock:
+            if self._error is not None:
+                return
+            self._error = exc
+
+        for task in self._tasks:
+            task.cancel()
+        for channel in self._channels:
+            channel.close()
+        try:
+            self.done.set_exception(exc)
+        except InvalidStateError:
+            pass
+
+    def cancel(self) -> None:
+        """
+        Cancels all stages. Iterating the run raises a :class:`concurrent.futures.CancelledError`.
+        """
+        self._fail(CancelledError())
+
+    def stats(self) -> List[StageStats]:
+        """
+        :return: The current statistics of every stage, in order.
+        """
+        return [stage_run.stats(self.started) for stage_run in self._stages]
+
+    def __iter__(self) -> Iterator[Any]:
+        yield from self._output
+        if self._error is not None:
+            raise self._error
+
+    def __aiter__(self) -> 'PipelineRun':
+        return self
+
+    def __anext__(self) -> AbstractFuture[Any]:
+        # The future of the channel itself, so cancelling it gives up its
+        # place in the queue instead of dropping the item it would get.
+        return self._output._get(1, self._end_of_output)
+
+    def _end_of_output(self) -> BaseException:
+        return self._error if self._error is not None else StopAsyncIteration()
+
+
+class Pipeline(object):
+    """
+    Chains coroutine functions into stages that run concurrently.
+
+    Every stage has its own concurrency limit and a bounded buffer in front
+    of it, so a slow stage slows down the stages before it instead of
+    letting items pile up::
+
+        pipeline = Pipeline().stage(fetch, concurrency=16).stage(parse, concurrency=2)
+        for row in pipeline.run(urls):
+            ...
+
+    Stage functions are called with one item and return a future or a
+    coroutine, like functions decorated with :func:`yakusoku.futurize`.
+    """
+
+    def __init__(self, buffer: int = 64):
+        """
+        :param buffer: The default size of the buffers in front of each stage and of the output.
+        """
+        self.buffer = buffer
+        self._stages: List[_Stage] = []
+
+    def stage(
+            self,
+            func: Callable[[Any], FutureOrCoroutine[Any]], *,
+            concurrency: int = 1,
+            buffer: Optional[int] = None,
+            name: Optional[str] = None
+    ) -> 'Pipeline':
+        """
+        Appends a stage.
+
+        :param func:        Called with every item. Returns a future or a coroutine.
+        :param concurrency: The number of items the stage works on at the same time.
+        :param buffer:      The number of items that may wait in front of the stage.
+        :param name:        The name shown in the statistics. Defaults to the name of the function.
+        :return: The pipeline itself, for chaining.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if name is None:
+            name = getattr(func, '__name__', repr(func))
+        self._stages.append(_Stage(func, name, concurrency, self.buffer if buffer is None else buffer))
+        return self
+
+    def run(self, iterable: Iterable[Any]) -> PipelineRun:
+        """
+        Starts pushing the items through the stages.
+
+        Items are pulled from the iterable as the first stage makes room.
+
+        :param iterable: The inputs of the first stage.
+        :return: The running pipeline.
+        """
+        if not self._stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        return PipelineRun(self._stages, iterable, self.buffer)
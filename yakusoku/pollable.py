@@ -0,0 +1,120 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+from typing import Any, Optional, Tuple
+
+from yakusoku.future import SlimFuture, wrap_future, copy
+from yakusoku.typings import FutureOrCoroutine, T
+
+__all__ = [
+    "PollableFuture", "pollable"
+]
+
+
+def _open_notifier() -> Tuple[int, int]:
+    """
+    Returns the read and write end of a descriptor that can be signalled once.
+    """
+    if hasattr(os, 'eventfd'):
+        fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+        return fd, fd
+
+    rfd, wfd = os.pipe()
+    os.set_blocking(rfd, False)
+    os.set_blocking(wfd, False)
+    return rfd, wfd
+
+
+def _signal(rfd: int, wfd: int) -> None:
+    # Nobody ever reads the descriptor, so it stays readable once the future is done.
+    if rfd == wfd:
+        os.eventfd_write(wfd, 1)
+    else:
+        os.write(wfd, b'\0')
+
+
+def _close_notifier(rfd: int, wfd: int) -> None:
+    os.close(rfd)
+    if wfd != rfd:
+        os.close(wfd)
+
+
+class PollableFuture(SlimFuture):
+    """
+    A :class:`SlimFuture` that can be waited for by :mod:`selectors` and other reactors.
+
+    :meth:`fileno` returns a descriptor that becomes readable once the future
+    is done. It is backed by an eventfd where available and by a pipe
+    otherwise, and only created on first use.
+
+    Asyncio awaits still go through the bridge of the loop, which coalesces
+    wakeups from other threads into a single write to the self-pipe of the loop.
+    """
+    __slots__ = ('_rfd', '_wfd')
+
+    def __init__(self):
+        super(PollableFuture, self).__init__()
+        self._rfd: Optional[int] = None
+        self._wfd: Optional[int] = None
+
+    def __del__(self):
+        self.close()
+
+    def fileno(self) -> int:
+        """
+        :return: A descriptor that becomes readable once the future is done.
+        """
+        with self._lock:
+            if self._rfd is None:
+                self._rfd, self._wfd = _open_notifier()
+                if self.done():
+                    _signal(self._rfd, self._wfd)
+            return self._rfd
+
+    def close(self) -> None:
+        """
+        Closes the descriptor. A later call to :meth:`fileno` opens a new one.
+        """
+        with self._lock:
+            rfd, wfd = self._rfd, self._wfd
+            self._rfd = self._wfd = None
+
+        if rfd is not None:
+            _close_notifier(rfd, wfd)
+
+    def _finish(self, state: str, result: Any, exception: Optional[BaseException]) -> bool:
+        if not super(PollableFuture, self)._finish(state, result, exception):
+            return False
+
+        with self._lock:
+            if self._rfd is not None:
+                _signal(self._rfd, self._wfd)
+        return True
+
+
+def pollable(fut: FutureOrCoroutine[T]) -> 'PollableFuture':
+    """
+    Returns a :class:`PollableFuture` that follows the given future.
+
+    :param fut: The future or coroutine to follow.
+    :return: A pollable future with the same outcome.
+    """
+    if isinstance(fut, PollableFuture):
+        return fut
+
+    target = PollableFuture()
+    copy(wrap_future(fut), target)
+    return target
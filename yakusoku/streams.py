@@ -0,0 +1,321 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+from collections import deque
+from collections.abc import Sized
+from threading import Lock
+from concurrent.futures import CancelledError
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from yakusoku.future import InvalidStateError, SlimFuture, wrap_future
+from yakusoku.typings import AbstractFuture, FutureOrCoroutine, T
+
+__all__ = [
+    "CompletionStream", "as_completed", "map_concurrent"
+]
+
+
+class CompletionStream(object):
+    """
+    Yields futures as they complete.
+
+    It can be used as a plain iterator, which blocks the current thread,
+    and with ``async for`` inside yakusoku tasks and asyncio coroutines.
+
+    Inputs are pulled lazily from the iterable. If a window is given, at
+    most that many inputs are started but not yet yielded, so memory stays
+    bounded no matter how long the iterable is. Inputs without a length,
+    like generators, require a window, as they may never end. If ordered is true, the
+    futures are yielded in the order of the inputs; the window then bounds
+    the reorder buffer.
+
+    If results is true, the stream yields the results of the futures
+    instead, and raises their exceptions.
+    """
+
+    def __init__(
+            self,
+            futs_or_coros: Iterable[FutureOrCoroutine[T]], *,
+            ordered: bool = False,
+            window: Optional[int] = None,
+            results: bool = False
+    ):
+        """
+        :param futs_or_coros: The futures and/or coroutines to wait for.
+        :param ordered:       If true, yield the futures in the order of the inputs.
+        :param window:        The maximal number of inputs that are started but not yet yielded.
+        :param results:       If true, yield the results of the futures instead of the futures.
+        :raises ValueError: If the window is not positive, or missing for inputs without a length.
+        """
+        if window is None:
+            if not isinstance(futs_or_coros, Sized):
+                raise ValueError("window is required for inputs without a length")
+        elif window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.ordered = ordered
+        self.window = window
+        self.results = results
+
+        self._lock = Lock()
+        self._source = iter(futs_or_coros)
+        self._filling = False
+        self._started = 0
+        self._yielded = 0
+        self._next = 0
+
+        # Unordered streams queue finished futures; ordered streams keep
+        # them by index until all previous ones have been yielded.
+        self._ready: Deque[Tuple[int, AbstractFuture[T]]] = deque()
+        self._buffer: Dict[int, AbstractFuture[T]] = {}
+        self._running: Dict[int, AbstractFuture[T]] = {}
+        self._getters: Deque[SlimFuture] = deque()
+
+        self._fill()
+
+    def __iter__(self) -> 'CompletionStream':
+        return self
+
+    def __next__(self) -> AbstractFuture[T]:
+        try:
+            return self.__anext__().result()
+        except StopAsyncIteration:
+            raise StopIteration
+
+    def __aiter__(self) -> 'CompletionStream':
+        return self
+
+    def __anext__(self) -> AbstractFuture[AbstractFuture[T]]:
+        """
+        :return: A future resolving with the next finished future. It rejects with :class:`StopAsyncIteration` at the end.
+        """
+        getter = SlimFuture()
+        with self._lock:
+            self._getters.append(getter)
+            handouts = self._deliver()
+        self._hand_out(handouts)
+        return getter
+
+    def __enter__(self) -> 'CompletionStream':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self) -> 'CompletionStream':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops pulling inputs and cancels all inputs that are still running.
+        """
+        with self._lock:
+            self._source = None
+            running, self._running = list(self._running.values()), {}
+            # Finished futures that have not been yielded are dropped as well.
+            self._ready.clear()
+            self._buffer.clear()
+            self._started = self._yielded
+            handouts = self._deliver()
+
+        for fut in running:
+            fut.cancel()
+        self._hand_out(handouts)
+
+    def _fill(self) -> None:
+        # Only one thread pulls from the iterable at a time. The lock is not
+        # held while the inputs are created, as that may run user code.
+        with self._lock:
+            if self._filling:
+                return
+            self._filling = True
+
+        while True:
+            with self._lock:
+                source = self._source
+                if source is None or (self.window is not None and self._started - self._yielded >= self.window):
+                    self._filling = False
+                    handouts = self._deliver()
+                    break
+                index = self._started
+                self._started += 1
+
+            try:
+                fut = wrap_future(next(source))
+            except StopIteration:
+                with self._lock:
+                    self._source = None
+                    self._started -= 1
+                continue
+            except BaseException as e:
+                # The input fails, and the stream ends after it.
+                with self._lock:
+                    self._source = None
+                fut = SlimFuture()
+                fut.set_exception(e)
+
+            with self._lock:
+                self._running[index] = fut
+            fut.add_done_callback(functools.partial(self._on_done, index))
+
+        self._hand_out(handouts)
+
+    def _on_done(self, index: int, fut: AbstractFuture[T]) -> None:
+        with self._lock:
+            if self._running.pop(index, None) is None:
+                # The stream has been closed.
+                return
+
+            if self.ordered:
+                self._buffer[index] = fut
+            else:
+                self._ready.append((index, fut))
+            handouts = self._deliver()
+
+        self._hand_out(handouts)
+
+    def _deliver(self) -> List[Tuple[SlimFuture, int, Optional[AbstractFuture[T]]]]:
+        """
+        Pairs waiting getters with finished futures. Must be called with the lock held.
+
+        :return: The getters to resolve once the lock has been released.
+        """
+        getters = self._getters
+        handouts = []
+
+        while getters:
+            if getters[0].done():
+                # Cancelled by the consumer.
+                getters.popleft()
+                continue
+
+            if self._ready:
+                # Ordered streams only use this queue for requeued futures.
+                index, fut = self._ready.popleft()
+            elif self.ordered:
+                index = self._next
+                fut = self._buffer.pop(index, None)
+                if fut is not None:
+                    self._next += 1
+            else:
+                fut = None
+
+            if fut is not None:
+                self._yielded += 1
+                handouts.append((getters.popleft(), index, fut))
+            elif self._source is None and self._yielded == self._started:
+                handouts.append((getters.popleft(), -1, None))
+            else:
+                break
+
+        return handouts
+
+    def _hand_out(self, handouts: List[Tuple[SlimFuture, int, Optional[AbstractFuture[T]]]]) -> None:
+        made_room = False
+        requeued = False
+        for getter, index, fut in handouts:
+            try:
+                if fut is None:
+                    getter.set_exception(StopAsyncIteration())
+                elif not self.results:
+                    getter.set_result(fut)
+                    made_room = True
+                elif fut.cancelled():
+                    getter.set_exception(CancelledError())
+                    made_room = True
+                elif fut.exception() is not None:
+                    getter.set_exception(fut.exception())
+                    made_room = True
+                else:
+                    getter.set_result(fut.result())
+                    made_room = True
+            except InvalidStateError:
+                # The getter has been cancelled after it was paired.
+                if fut is not None:
+                    self._requeue(index, fut)
+                    requeued = True
+
+        if requeued:
+            with self._lock:
+                handouts = self._deliver()
+            self._hand_out(handouts)
+
+        if made_room:
+            # Yielding made room in the window.
+            self._fill()
+
+    def _requeue(self, index: int, fut: AbstractFuture[T]) -> None:
+        with self._lock:
+            self._yielded -= 1
+            self._ready.appendleft((index, fut))
+
+
+def as_completed(
+        futs_or_coros: Iterable[FutureOrCoroutine[T]], *,
+        ordered: bool = False,
+        window: Optional[int] = None
+) -> CompletionStream:
+    """
+    Iterates over futures as they complete.
+
+    Use it as ``for fut in as_completed(futs)`` in threaded code and as
+    ``async for fut in as_completed(futs)`` inside coroutines.
+
+    :param futs_or_coros: The futures and/or coroutines to wait for.
+    :param ordered:       If true, yield the futures in the order of the inputs.
+    :param window:        The maximal number of inputs that are started but not yet yielded. Required for inputs without a length.
+    :return: A stream of the finished futures.
+    """
+    return CompletionStream(futs_or_coros, ordered=ordered, window=window)
+
+
+def map_concurrent(
+        func: Callable[[Any], FutureOrCoroutine[T]],
+        iterable: Iterable[Any], *,
+        concurrency: Optional[int] = None,
+        ordered: bool = False
+) -> CompletionStream:
+    """
+    Calls a coroutine function for every item and streams the results.
+
+    Items are pulled lazily, so the iterable may be infinite. At most
+    `concurrency` calls are running or waiting to be consumed at any
+    time. Closing the stream cancels the calls that are still running.
+
+    Use it as ``for result in map_concurrent(func, items, concurrency=8)`` in threaded
+    code and with ``async for`` inside coroutines. Failed calls raise their
+    exception when their result is reached.
+
+    :param func:        The coroutine function, or any function returning a future.
+    :param iterable:    The arguments to call the function with.
+    :param concurrency: The maximal number of calls in flight. None only works for iterables with a length and does not limit them.
+    :param ordered:     If true, yield the results in the order of the items.
+    :return: A stream of the results.
+    :raises ValueError: If no concurrency is given for an iterable without a length.
+    """
+    if concurrency is None:
+        if not isinstance(iterable, Sized):
+            raise ValueError("concurrency is required for iterables without a length")
+        # Every call may run at once.
+        concurrency = max(len(iterable), 1)
+
+    return CompletionStream(
+        (func(item) for item in iterable),
+        ordered=ordered, window=concurrency, results=True
+    )
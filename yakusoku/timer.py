@@ -0,0 +1,189 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2018 StuxCrystal <stuxcrystal@encode.moe>
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import heapq
+import traceback
+from itertools import count
+from time import monotonic
+from typing import Any, Callable, List, Optional, Tuple
+from threading import Condition, Thread, Lock
+
+__all__ = [
+    "TimerHandle", "TimerService",
+    "get_timer_service", "call_later"
+]
+
+
+class TimerHandle(object):
+    """
+    A handle to a callback scheduled on a :class:`TimerService`.
+
+    Cancelling a handle is O(1): the entry stays in the heap and is
+    discarded once it reaches the top.
+    """
+    __slots__ = ('when', 'callback', 'args', '_service', '_cancelled')
+
+    def __init__(self, when: float, callback: Callable[..., None], args: Tuple[Any, ...], service: 'TimerService'):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self._service = service
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """
+        Prevents the callback from running if it has not run yet.
+        """
+        self._service._cancel(self)
+
+    def cancelled(self) -> bool:
+        """
+        :return: True if the handle has been cancelled.
+        """
+        return self._cancelled
+
+
+class TimerService(object):
+    """
+    Runs scheduled callbacks on a single daemon thread.
+
+    Timers are kept in a binary heap, so arming a timer costs O(log n)
+    and cancelling it costs O(1). The thread is started lazily when the
+    first timer is armed.
+
+    Callbacks run on the timer thread and should return quickly.
+    """
+
+    def __init__(self, name: str = "yakusoku-timer"):
+        self.name = name
+        self._heap: List[Tuple[float, int, TimerHandle]] = []
+        self._counter = count()
+        self._cancelled = 0
+        self._lock = Lock()
+        self._wakeup = Condition(self._lock)
+        self._thread: Optional[Thread] = None
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_later(self, delay: float, callback: Callable[..., None], *args: Any) -> TimerHandle:
+        """
+        Schedules the callback to be run after the given delay.
+
+        :param delay:    The delay in seconds.
+        :param callback: The callback to run.
+        :param args:     The arguments passed to the callback.
+        :return: A handle that can be used to cancel the timer.
+        """
+        return self.call_at(monotonic() + delay, callback, *args)
+
+    def call_at(self, when: float, callback: Callable[..., None], *args: Any) -> TimerHandle:
+        """
+        Schedules the callback to be run at the given :func:`time.monotonic` time.
+
+        :param when:     When should the callback be run.
+        :param callback: The callback to run.
+        :param args:     The arguments passed to the callback.
+        :return: A handle that can be used to cancel the timer.
+        """
+        handle = TimerHandle(when, callback, args, self)
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._counter), handle))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is handle:
+                self._wakeup.notify()
+        return handle
+
+    def _cancel(self, handle: TimerHandle):
+        with self._lock:
+            if handle.callback is None:
+                # Already fired or cancelled.
+                return
+
+            handle._cancelled = True
+            handle.callback = None
+            handle.args = None
+            self._cancelled += 1
+
+            # Drop cancelled entries once they make up most of the heap
+            # so that many cancelled timeouts do not keep memory alive.
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [entry for entry in self._heap if not entry[2]._cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+
+    def _next_expired(self) -> Tuple[Callable[..., None], Tuple[Any, ...]]:
+        with self._lock:
+            while True:
+                if not self._heap:
+                    self._wakeup.wait()
+                    continue
+
+                when, _, handle = self._heap[0]
+                if handle._cancelled:
+                    heapq.heappop(self._heap)
+                    self._cancelled -= 1
+                    continue
+
+                remaining = when - monotonic()
+                if remaining > 0:
+                    self._wakeup.wait(remaining)
+                    continue
+
+                heapq.heappop(self._heap)
+                callback, args = handle.callback, handle.args
+                handle.callback = None
+                handle.args = None
+                return callback, args
+
+    def _run(self):
+        while True:
+            callback, args = self._next_expired()
+            try:
+                callback(*args)
+            except Exception:
+                traceback.print_exc()
+
+
+_service: Optional[TimerService] = None
+_service_lock = Lock()
+
+
+def get_timer_service() -> TimerService:
+    """
+    Returns the process-wide timer service.
+
+    :return: The shared :class:`TimerService`.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TimerService()
+    return _service
+
+
+def call_later(delay: float, callback: Callable[..., None], *args: Any) -> TimerHandle:
+    """
+    Schedules a callback on the process-wide timer service.
+
+    :param delay:    The delay in seconds.
+    :param callback: The callback to run.
+    :param args:     The arguments passed to the callback.
+    :return: A handle that can be used to cancel the timer.
+    """
+    return get_timer_service().call_later(delay, callback, *args)